@@ -0,0 +1,261 @@
+"""
+Data acquisition for the dashboard
+
+The values shown on the dash, the OBD commands they come from, and how
+each response is converted for display, are set in the dash config (see
+widgets.py), as Channels. Only the channels of the page on screen are
+watched, so the adapter's time isn't spent on values nobody sees.
+
+The acquisition can run in its own process (run.py --split), so that
+the serial loop and pygame don't hold each other up through the GIL.
+The latest value and timestamp of each channel are then published in
+shared memory (SharedValues), along with a ring of every reading, which
+the render process reads without blocking (so the data log still gets
+every reading, not just the latest of each frame). The trouble codes
+are sent over a queue.
+
+This module doesn't import pygame, so the acquisition process stays light.
+"""
+
+import multiprocessing
+import queue
+import time
+
+import obd
+
+
+#############################
+#   Channels                #
+#############################
+
+# Conversions written as so defined by Python-OBD authors
+# https://python-obd.readthedocs.io/en/latest/Async%20Connections/
+
+# name -> conversion of a response's value, as named in the dash config
+CONVERSIONS = {
+    "int": lambda v: int(v.magnitude),
+    "float": lambda v: float(v.magnitude),
+    "mph": lambda v: int(v.magnitude * .060934),
+    "fahrenheit": lambda v: int(int(v.magnitude) * 1.8 + 32),  # C to F
+    "psi": lambda v: float(v.magnitude) * .145038,  # kp to psi
+    "afr": lambda v: float(v.magnitude) * 14.64,  # AFR for normal gasoline engines
+    "codes": lambda v: v,  # trouble codes aren't numbers, so they're sent separately
+}
+
+
+class Channel():
+    """ a value shown on the dash, and the OBD command it comes from """
+
+    def __init__(self, name, command, convert="float", default=0.0, interval=None):
+        if convert not in CONVERSIONS:
+            raise ValueError("Unknown conversion '%s' for %s" % (convert, name))
+        self.name = name
+        self.command = command  # name of the OBD command
+        self.convert = convert  # name of the conversion
+        self.default = default  # shown until the first reading arrives
+        self.interval = interval  # least seconds between queries, None for every pass
+
+    @property
+    def is_codes(self):
+        return self.convert == "codes"
+
+    def value(self, response_value):
+        return CONVERSIONS[self.convert](response_value)
+
+
+def watch_channels(connection, channels, on_value, on_codes):
+    """
+    watches channels on an Async connection. on_value(name, value, t)
+    is called for every reading of a channel, repeated values included
+    (the data log and the needle's predictor want each one), and
+    on_codes(codes) when the trouble codes change
+    """
+    last_codes = {}
+
+    def watcher(channel):
+        def on_response(r):
+            if r.is_null():
+                return
+            value = channel.value(r.value)
+            if not channel.is_codes:
+                on_value(channel.name, value, r.time)
+            elif value != last_codes.get(channel.name):
+                last_codes[channel.name] = value
+                on_codes(value)
+        return on_response
+
+    for channel in channels:
+        connection.watch(obd.commands[channel.command], callback=watcher(channel),
+                         interval=channel.interval)
+
+
+def watch_page(connection, channels, on_value, on_codes):
+    """ swaps the watched commands for those of a page's channels """
+    connection.stop()
+    connection.unwatch_all()
+    watch_channels(connection, channels, on_value, on_codes)
+    connection.start()  # does nothing if no commands are watched
+
+
+#############################
+#   Shared memory           #
+#############################
+
+# readings kept in the ring for the reader, about a minute of polling
+RING_SIZE = 4096
+
+
+class SharedValues():
+    """
+    The latest value and timestamp of each channel, in shared memory
+
+    A single writer (the acquisition process) and any number of readers.
+    The first slot is a sequence number, made odd while the writer is
+    updating, so readers can tell a consistent copy without any locking
+    (a seqlock). The second slot counts the readings published. After the
+    latest values, every reading is also written to a ring of
+    (channel, value, time) slots, for one reader to take with samples().
+    """
+
+    def __init__(self, names, ring_size=RING_SIZE):
+        self.names = list(names)
+        self.ring = 2 + 2 * len(self.names)  # where the ring starts in the array
+        self.ring_size = ring_size
+        self.array = multiprocessing.Array('d', self.ring + 3 * ring_size, lock=False)
+        self.wake = multiprocessing.Event()  # set on every update
+        self.codes = multiprocessing.Queue()
+        self.pages = multiprocessing.Queue()  # names of the channels to watch, from the reader
+        self.seen = 0  # reader's last sequence number
+        self.taken = 0  # readings the reader has taken from the ring
+
+    def publish(self, name, value, t):
+        a = self.array
+        j = self.names.index(name)
+        i = 2 + 2 * j
+        r = self.ring + 3 * (int(a[1]) % self.ring_size)
+        a[0] += 1
+        a[i] = value
+        a[i + 1] = t
+        a[r] = j
+        a[r + 1] = value
+        a[r + 2] = t
+        a[1] += 1
+        a[0] += 1
+        self.wake.set()
+
+    def publish_codes(self, codes):
+        self.codes.put(codes)
+        self.wake.set()
+
+    def read(self):
+        """
+        returns ({name: (value, time)}, readings published so far), or
+        None if nothing changed since the last read. Never blocks; if the
+        writer is busy, try again next frame
+        """
+        a = self.array
+        for _ in range(3):
+            seq = a[0]
+            if seq == self.seen:
+                return None
+            if int(seq) % 2:
+                continue
+            data = a[:]
+            if a[0] == seq:
+                self.seen = seq
+                values = {}
+                for j, name in enumerate(self.names):
+                    t = data[3 + 2 * j]
+                    if t:
+                        values[name] = (data[2 + 2 * j], t)
+                return values, int(data[1])
+        return None
+
+    def samples(self):
+        """
+        returns [(name, value, time)] of every reading published since the
+        last call, oldest first. Never blocks. A reader that falls more
+        than ring_size readings behind loses the oldest of them
+        """
+        a = self.array
+        count = int(a[1])  # the ring slots of these readings are written
+        start = max(self.taken, count - self.ring_size)
+        readings = []
+        for n in range(start, count):
+            r = self.ring + 3 * (n % self.ring_size)
+            j, value, t = a[r:r + 3]
+            readings.append((self.names[int(j)], value, t))
+        # drop any slots the writer came round to while they were copied
+        first = int(a[1]) - self.ring_size + 1
+        if first > start:
+            readings = readings[first - start:]
+        self.taken = count
+        return readings
+
+    def watch(self, names):
+        """ asks the acquisition process to watch only these channels """
+        self.pages.put(list(names))
+
+    def read_codes(self):
+        """ returns the latest trouble codes, or None if they haven't changed """
+        codes = None
+        try:
+            while True:
+                codes = self.codes.get_nowait()
+        except queue.Empty:
+            pass
+        return codes
+
+
+#############################
+#   Acquisition process     #
+#############################
+
+def acquire(shared, portstr, stop, channels):
+    """ the acquisition process: polls the car, and publishes to shared """
+    connection = obd.Async(portstr)
+    obd.logger.removeHandler(obd.console_handler)
+    channels = dict((channel.name, channel) for channel in channels)
+
+    while not stop.is_set():
+        try:
+            names = shared.pages.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        watch_page(connection, [channels[name] for name in names], shared.publish, shared.publish_codes)
+
+    connection.stop()
+    connection.close()
+
+
+def start_acquisition(channels, portstr=None):
+    """
+    starts the acquisition process, and returns (process, shared values,
+    stop event). Nothing is watched until shared.watch() is called
+    """
+    shared = SharedValues(channel.name for channel in channels if not channel.is_codes)
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=acquire, args=(shared, portstr, stop, list(channels)), daemon=True)
+    process.start()
+    return process, shared, stop
+
+
+class RateCounter():
+    """ counts events per second, over roughly the last second """
+
+    def __init__(self):
+        self.count = 0
+        self.start = time.time()
+        self.rate = 0.0
+
+    def add(self, n=1):
+        self.count += n
+        self.update()
+
+    def update(self):
+        now = time.time()
+        if now - self.start >= 1.0:
+            self.rate = self.count / (now - self.start)
+            self.count = 0
+            self.start = now
+        return self.rate
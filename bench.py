@@ -0,0 +1,267 @@
+"""
+Headless rendering benchmark for the PiLogger
+
+Draws the home screen, Virtual Dash and code reader pages under SDL's
+dummy video driver, so no screen (or car) is needed, and reports for
+each page:
+    frame time percentiles (ms)
+    CPU time per frame (ms)
+    widgets redrawn per frame
+    memory allocated per frame (peak KB, from tracemalloc, in a
+        second pass so tracing doesn't skew the timings)
+
+The pages are fed telemetry from a synthetic drive (rpm sweeps, with
+the other channels following), or from a recorded data log (a session
+log from sessionlog.py, or a csv log), replayed on a simulated clock of
+--fps frames a second. Frames are drawn back to back, as fast as they
+can be, rather than waiting for the next reading as run.py does.
+
+    python bench.py [--frames 600] [--page home --page vDash --page dtc]
+                    [--log data_logging_....pilog] [--hz 20] [--fps 60]
+"""
+
+import argparse
+import csv
+import math
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import run
+from buttonClass import button
+from constants import black
+from renderer import Renderer
+from sessionlog import SessionLog
+
+PAGES = ["home", "vDash", "dtc"]
+
+
+#############################
+#   Telemetry               #
+#############################
+
+# channel -> value at time t, at an rpm, part way through a pull
+DRIVE = {
+    "speed": lambda t, rpm, phase: 20 + 40 * phase,
+    "rpm": lambda t, rpm, phase: rpm,
+    "load": lambda t, rpm, phase: 20 + rpm / 90.0,
+    "coolant_temp": lambda t, rpm, phase: 190 + 2 * math.sin(t / 30.0),
+    "intake_temp": lambda t, rpm, phase: 80 + t / 60.0,
+    "fuel_rail_press": lambda t, rpm, phase: 600 + rpm / 4.0,
+    "afr": lambda t, rpm, phase: 14.7 - rpm / 3000.0,
+    "maf": lambda t, rpm, phase: rpm / 250.0,
+    "timing_advance": lambda t, rpm, phase: 30 - rpm / 400.0,
+    "o2_trim": lambda t, rpm, phase: 2 * math.sin(t),
+}
+
+
+def synthetic_telemetry(seconds, hz):
+    """
+    (time, name, value) readings of a made up drive, polled round robin
+    like the Async connection does, hz readings a second in total
+    """
+    readings = []
+    defaults = run.engine.defaults
+    names = [name for name in defaults if name in DRIVE]
+    for i in range(int(seconds * hz)):
+        t = i / float(hz)
+        name = names[i % len(names)]
+        # a gear pull every 8 seconds, back down to cruise
+        phase = (t % 8.0) / 8.0
+        rpm = 1500 + 5000 * math.sin(math.pi * phase) ** 2
+        readings.append((t, name, type(defaults[name])(DRIVE[name](t, rpm, phase))))
+    return readings
+
+
+def recorded_telemetry(path):
+    """ (time, name, value) readings from a session log or csv data log, from time 0 """
+    rows = []
+    if path.endswith(".pilog"):
+        with SessionLog(path) as log:
+            names = log.channels
+            for row in log.rows():
+                rows.append((row[0], row[2:]))
+    else:
+        # the column headings of run.py's csv log
+        channels = dict(zip(run.header, run.log_channels))
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            headings = next(reader)
+            names = [channels.get(h, h) for h in headings[2:]]
+            for row in reader:
+                t = datetime.strptime(row[0], "%Y-%m-%dT%H:%M:%S.%f").timestamp()
+                rows.append((t, [float(v) for v in row[2:]]))
+
+    readings = []
+    last = {}
+    defaults = run.engine.defaults
+    for t, row in rows:
+        for name, value in zip(names, row):
+            if name in defaults and value != last.get(name):
+                last[name] = value
+                readings.append((t - rows[0][0], name, type(defaults[name])(value)))
+    return readings
+
+
+# shown on the code reader page, a few changes over the run
+CODES = [
+    [],
+    [("P0301", "Cylinder 1 Misfire Detected")],
+    [("P0301", "Cylinder 1 Misfire Detected"), ("P0171", "System Too Lean (Bank 1)")],
+]
+
+
+#############################
+#   Benchmark               #
+#############################
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100.0), len(ordered) - 1)]
+
+
+class SimClock():
+    """ stands in for run.py's pygame Clock, so the fps readout shows the simulated rate """
+
+    def __init__(self, fps):
+        self.fps = fps
+
+    def get_fps(self):
+        return self.fps
+
+
+class Bench():
+
+    def __init__(self, telemetry, fps):
+        self.telemetry = telemetry
+        self.fps = fps
+        self.duration = telemetry[-1][0] + 1.0 / fps if telemetry else 1.0
+
+        run.screen = pygame.display.set_mode((800, 480))
+        run.clock = SimClock(fps)
+        screen = run.screen
+        self.virtualDash = button(20, 20, "Virtual Dash", screen)
+        self.dtc = button(350, 20, "Read Codes", screen)
+        self.quit = button(670, 20, "Quit", screen)
+        self.go_home = button(20, 20, "Home", screen)
+        self.data_log_off = button(350, 20, "Data Log", screen)
+
+    def reset(self):
+        run.renderer = Renderer(run.screen, black)
+        run.values.clear()
+        run.values.update(run.engine.defaults)
+        run.value_times.clear()
+        run.engine.reset()
+
+    def draw_page(self, page, now):
+        run.update_fps()
+        if page == "home":
+            run.draw_button(self.virtualDash)
+            run.draw_button(self.dtc)
+        else:
+            run.draw_button(self.go_home)
+        run.draw_button(self.quit)
+        if page == "vDash":
+            run.draw_button(self.data_log_off)
+        run.draw_page(page, now)
+        run.renderer.set_page(page, run.engine.pages[page].draw_static)
+
+    def frames(self, count):
+        """ yields (frame, time on the simulated clock), feeding in the readings due by then """
+        start = time.time()
+        i = 0
+        for frame in range(count):
+            sim = frame / float(self.fps)
+            while self.telemetry:
+                t, name, value = self.telemetry[i % len(self.telemetry)]
+                t += (i // len(self.telemetry)) * self.duration  # replay from the start
+                if t > sim:
+                    break
+                run.store_value(name, value, start + t)
+                run.data_rate.add()
+                i += 1
+            run.values["codes"] = CODES[int(sim / 5.0) % len(CODES)]
+            yield frame, start + sim
+
+    def time_page(self, page, count):
+        self.reset()
+        times = []
+        cpu = []
+        redrawn = []
+        for frame, now in self.frames(count):
+            t0 = time.perf_counter()
+            c0 = time.process_time()
+            self.draw_page(page, now)
+            run.renderer.present()
+            times.append(time.perf_counter() - t0)
+            cpu.append(time.process_time() - c0)
+            redrawn.append(run.renderer.redrawn)
+        return times, cpu, redrawn
+
+    def trace_page(self, page, count):
+        """ peak bytes allocated while drawing each frame """
+        self.reset()
+        allocated = []
+        tracemalloc.start()
+        for frame, now in self.frames(count):
+            # restarting the trace resets its peak (reset_peak() needs 3.9)
+            tracemalloc.stop()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            self.draw_page(page, now)
+            run.renderer.present()
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        return allocated
+
+
+def report(page, times, cpu, redrawn, allocated):
+    # the first frame paints the whole page, so is shown on its own
+    first = times[0]
+    times, cpu, redrawn = times[1:], cpu[1:], redrawn[1:]
+    ms = [t * 1000 for t in times]
+    print("%s (%d frames)" % (page, len(times) + 1))
+    print("    frame ms    p50 %.3f  p90 %.3f  p99 %.3f  max %.3f  (first %.3f)" % (
+        percentile(ms, 50), percentile(ms, 90), percentile(ms, 99), max(ms), first * 1000))
+    print("    cpu ms      %.3f per frame" % (1000 * sum(cpu) / len(cpu)))
+    print("    redrawn     %.2f widgets per frame" % (sum(redrawn) / float(len(redrawn))))
+    if allocated:
+        allocated = allocated[1:]
+        print("    allocated   %.1f KB per frame  (max %.1f KB)" % (
+            sum(allocated) / 1024.0 / len(allocated), max(allocated) / 1024.0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark for the PiLogger")
+    parser.add_argument("--frames", type=int, default=600, help="frames drawn per page")
+    parser.add_argument("--page", action="append", choices=PAGES, help="page(s) to draw, all by default")
+    parser.add_argument("--log", help="replay a recorded session log (.pilog) or csv log")
+    parser.add_argument("--hz", type=float, default=20, help="synthetic readings per second")
+    parser.add_argument("--fps", type=float, default=run.max_fps, help="simulated frames per second")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    if args.log:
+        telemetry = recorded_telemetry(args.log)
+    else:
+        telemetry = synthetic_telemetry(args.frames / args.fps, args.hz)
+
+    bench = Bench(telemetry, args.fps)
+    print("%s, %d readings, %d frames at %g fps simulated, SDL driver %s" % (
+        args.log or "synthetic drive", len(telemetry), args.frames, args.fps, pygame.display.get_driver()))
+    for page in args.page or PAGES:
+        times, cpu, redrawn = bench.time_page(page, args.frames)
+        allocated = None if args.no_alloc else bench.trace_page(page, args.frames)
+        report(page, times, cpu, redrawn, allocated)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -39,12 +39,16 @@ class button():
         self.y = y
         self.text = text
         self.screen = screen
+        # the label never changes, so it's only rendered once
+        self.text_img = button_font.render(self.text, True, self.text_col)
 
 
-    def draw_button(self):
+    def check_click(self):
+        """ returns the button's state ('idle', 'hover' or 'click'), and whether it was clicked """
 
         global clicked
         action = False
+        state = 'idle'
 
         # get mouse position
         pos = pygame.mouse.get_pos()
@@ -56,23 +60,39 @@ class button():
         if button_rect.collidepoint(pos):
             if pygame.mouse.get_pressed()[0] == 1:
                 clicked = True
-                pygame.draw.rect(self.screen, self.click_col, button_rect)
+                state = 'click'
             elif pygame.mouse.get_pressed()[0] == 0 and clicked == True:
                 clicked = False
                 action = True
             else:
-                pygame.draw.rect(self.screen, self.hover_col, button_rect)
+                state = 'hover'
+        return state, action
+
+    def draw(self, surface, state):
+        """ draws the button in the given state, and returns the Rect it covers """
+
+        button_rect = Rect(self.x, self.y, self.width, self.height)
+        if state == 'click':
+            pygame.draw.rect(surface, self.click_col, button_rect)
+        elif state == 'hover':
+            pygame.draw.rect(surface, self.hover_col, button_rect)
         else:
-            pygame.draw.rect(self.screen, self.button_col, button_rect)
+            pygame.draw.rect(surface, self.button_col, button_rect)
 
         # add shading to button
-        pygame.draw.line(self.screen, white, (self.x, self.y), (self.x + self.width, self.y), 2)
-        pygame.draw.line(self.screen, white, (self.x, self.y), (self.x, self.y + self.height), 2)
-        pygame.draw.line(self.screen, orange, (self.x, self.y + self.height), (self.x + self.width, self.y + self.height), 2)
-        pygame.draw.line(self.screen, orange, (self.x + self.width, self.y), (self.x + self.width, self.y + self.height), 2)
+        pygame.draw.line(surface, white, (self.x, self.y), (self.x + self.width, self.y), 2)
+        pygame.draw.line(surface, white, (self.x, self.y), (self.x, self.y + self.height), 2)
+        pygame.draw.line(surface, orange, (self.x, self.y + self.height), (self.x + self.width, self.y + self.height), 2)
+        pygame.draw.line(surface, orange, (self.x + self.width, self.y), (self.x + self.width, self.y + self.height), 2)
 
         # add text to button
-        text_img = button_font.render(self.text, True, self.text_col)
-        text_len = text_img.get_width()
-        self.screen.blit(text_img, (self.x + int(self.width / 2) - int(text_len / 2), self.y/2 + 18))
+        text_len = self.text_img.get_width()
+        surface.blit(self.text_img, (self.x + int(self.width / 2) - int(text_len / 2), self.y/2 + 18))
+
+        # the shading lines overhang the bottom right of the button
+        return Rect(self.x, self.y, self.width + 2, self.height + 2)
+
+    def draw_button(self):
+        state, action = self.check_click()
+        self.draw(self.screen, state)
         return action
@@ -0,0 +1,112 @@
+"""
+Buffered data logging for the dashboard
+
+Rows are recorded from the Async callbacks, one per reading (a repeated
+value still adds a row, so a steady engine leaves no gaps), with
+the wall clock time of the response and a monotonic timestamp. Each row
+holds the latest value of every logged channel. Rows are buffered in
+memory, and a background thread writes them to the (already open) file
+in large blocks, so logging costs a few writes a minute rather than a
+file open and write on every frame.
+
+The rows go to a CsvLog, or to a compact binary session log (see
+sessionlog.py).
+"""
+
+import csv
+import threading
+import time
+from datetime import datetime
+
+
+def iso_time(t):
+    """ a wall clock time as ISO 8601 text, to the millisecond """
+    # (datetime.isoformat(timespec=...) needs Python 3.6)
+    d = datetime.fromtimestamp(t)
+    return d.strftime("%Y-%m-%dT%H:%M:%S") + ".%03d" % (d.microsecond // 1000)
+
+
+class CsvLog():
+    """ writes the logged rows as CSV text """
+
+    def __init__(self, path, channels, header=None):
+        self.path = path
+        # the file stays open for the whole session
+        self.file = open(path, "w", newline="", buffering=1024 * 1024)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['Time', 'Monotonic'] + list(header or channels))
+
+    def write_rows(self, rows):
+        self.writer.writerows(
+            [iso_time(t), "%.3f" % m] + values
+            for t, m, values in rows
+        )
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class DataLogger():
+
+    def __init__(self, sink, channels, defaults=None, flush_interval=5.0, block_rows=2000):
+        self.sink = sink  # a CsvLog or SessionLogWriter
+        self.channels = list(channels)  # names of the logged values
+        self.flush_interval = flush_interval  # seconds between writes
+        self.block_rows = block_rows  # write early once this many rows are waiting
+        self.active = False  # rows are only recorded while active
+        self.rows_written = 0
+
+        self.latest = dict((name, "") for name in self.channels)
+        if defaults is not None:
+            self.latest.update((name, defaults[name]) for name in self.channels if name in defaults)
+
+        self.rows = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+
+        self.thread = threading.Thread(target=self.run, name="DataLogger")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def record(self, name, value, t=None):
+        """ notes a new reading of a channel, taken at wall clock time t """
+        if name not in self.latest:
+            return
+        with self.lock:
+            self.latest[name] = value
+            if not self.active:
+                return
+            if t is None:
+                t = time.time()
+            self.rows.append((t, time.monotonic(), [self.latest[c] for c in self.channels]))
+            if len(self.rows) >= self.block_rows:
+                self.wake.set()
+
+    def run(self):
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """ writes out the buffered rows """
+        with self.lock:
+            rows = self.rows
+            self.rows = []
+        if not rows:
+            return
+
+        self.sink.write_rows(rows)
+        self.sink.flush()
+        self.rows_written += len(rows)
+
+    def close(self):
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+        self.sink.close()
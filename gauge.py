@@ -0,0 +1,114 @@
+"""
+Pre-rendered needle for the RPM gauge
+
+Rotating the needle image with rotozoom every frame is one of the most
+expensive things the dash does on the Pi. Instead, the needle is rotated
+once for every angle it can show (in small steps), cropped down to its
+visible pixels, and kept in an atlas. Drawing the needle is then a
+lookup and a single blit.
+
+The atlas can also be saved to disk (one PNG strip, plus a JSON index),
+so it doesn't need to be rebuilt on every start.
+"""
+
+import json
+import logging
+import os
+import zlib
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# pygame < 2.1.3 only has tostring()
+image_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+class NeedleAtlas():
+
+    def __init__(self, needle, min_angle, max_angle, step=0.5, cache_file=None):
+        self.min_angle = min(min_angle, max_angle)
+        self.step = step
+        self.count = int(round(abs(max_angle - min_angle) / step)) + 1
+        self.key = self.cache_key(needle)
+        self.frames = None  # list of (surface, offset from the needle's center)
+
+        if cache_file is not None:
+            self.frames = self.load(cache_file)
+
+        if self.frames is None:
+            self.frames = [self.render(needle, self.angle(i)) for i in range(self.count)]
+            if cache_file is not None:
+                self.save(cache_file)
+
+    def cache_key(self, needle):
+        """ describes what the atlas was built from, to check cached files """
+        return {
+            "needle": zlib.crc32(image_to_bytes(needle, "RGBA")),
+            "size": list(needle.get_size()),
+            "min_angle": self.min_angle,
+            "step": self.step,
+            "count": self.count,
+        }
+
+    def angle(self, index):
+        return self.min_angle + index * self.step
+
+    def index(self, angle):
+        """ the atlas frame closest to an angle, clamped to the gauge's sweep """
+        i = int(round((angle - self.min_angle) / self.step))
+        return min(max(i, 0), self.count - 1)
+
+    @staticmethod
+    def render(needle, angle):
+        rotated = pygame.transform.rotozoom(needle, angle, 1)
+        # rotated about its center, as in the original centering equation, courtesy of
+        # DaFluffyPotato on Youtube: https://www.youtube.com/channel/UCYNrBrBOgTfHswcz2DdZQFA
+        center = rotated.get_rect().center
+        # most of the rotated image is transparent, so only keep the needle
+        crop = rotated.get_bounding_rect()
+        frame = rotated.subsurface(crop).copy()
+        if pygame.display.get_surface() is not None:
+            frame = frame.convert_alpha()
+        return frame, (crop.x - center[0], crop.y - center[1])
+
+    def blit(self, surface, angle, center):
+        """ draws the needle at an angle, rotated about center, and returns the Rect it covered """
+        frame, offset = self.frames[self.index(angle)]
+        return surface.blit(frame, (center[0] + offset[0], center[1] + offset[1]))
+
+    def save(self, cache_file):
+        width = sum(frame.get_width() for frame, _ in self.frames)
+        height = max(frame.get_height() for frame, _ in self.frames)
+        strip = pygame.Surface((max(width, 1), max(height, 1)), pygame.SRCALPHA)
+        index = []
+        x = 0
+        for frame, offset in self.frames:
+            strip.blit(frame, (x, 0))
+            index.append([x, frame.get_width(), frame.get_height(), offset[0], offset[1]])
+            x += frame.get_width()
+
+        try:
+            pygame.image.save(strip, cache_file + ".png")
+            with open(cache_file + ".json", "w") as f:
+                json.dump({"key": self.key, "frames": index}, f)
+        except (OSError, pygame.error) as e:
+            # the atlas is just rebuilt on the next start
+            logger.warning("Could not save the needle atlas: %s", e)
+
+    def load(self, cache_file):
+        """ returns the cached frames, or None if they're missing or stale """
+        if not (os.path.exists(cache_file + ".json") and os.path.exists(cache_file + ".png")):
+            return None
+        try:
+            with open(cache_file + ".json") as f:
+                index = json.load(f)
+            if index["key"] != self.key:
+                return None
+            strip = pygame.image.load(cache_file + ".png")
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+
+        if pygame.display.get_surface() is not None:
+            strip = strip.convert_alpha()
+        return [(strip.subsurface((x, 0, w, h)), (ox, oy)) for x, w, h, ox, oy in index["frames"]]
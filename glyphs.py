@@ -0,0 +1,59 @@
+"""
+Cached glyph text for the numeric readouts
+
+Rasterizing text with font.render is slow on the Pi, and the dash shows
+the same few characters (digits, '.', '-', ' fps'...) over and over.
+A GlyphFont renders each character once per font and colour, and draws
+strings by blitting the cached glyphs side by side.
+"""
+
+import pygame
+
+
+class GlyphFont():
+
+    def __init__(self, font, color, antialias=True):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.glyphs = {}  # character -> rendered surface
+
+    def glyph(self, char):
+        g = self.glyphs.get(char)
+        if g is None:
+            g = self.font.render(char, self.antialias, self.color)
+            if pygame.display.get_surface() is not None:
+                g = g.convert_alpha()
+            self.glyphs[char] = g
+        return g
+
+    def size(self, text):
+        return sum(self.glyph(c).get_width() for c in text), self.font.get_height()
+
+    def draw(self, surface, text, pos):
+        """ draws text with its top left at pos, and returns the Rect it covered """
+        x, y = pos
+        rect = pygame.Rect(x, y, 0, self.font.get_height())
+        for c in text:
+            g = self.glyph(c)
+            surface.blit(g, (x, y))
+            x += g.get_width()
+        rect.width = int(x - rect.x)
+        return rect
+
+    def render(self, text):
+        """ like font.render, returns the text on its own (transparent) surface """
+        out = pygame.Surface(self.size(text), pygame.SRCALPHA)
+        self.draw(out, text, (0, 0))
+        return out
+
+
+# (font, colour) -> GlyphFont, shared by everything drawing in that style
+glyph_fonts = {}
+
+
+def glyph_font(font, color):
+    key = (font, tuple(color))
+    if key not in glyph_fonts:
+        glyph_fonts[key] = GlyphFont(font, color)
+    return glyph_fonts[key]
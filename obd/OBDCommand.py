@@ -38,8 +38,19 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class OBDCommand:
+    """
+        Immutable description of a command. The mode, PID, request
+        bytes and hash are computed once, since commands are looked
+        up and hashed on every query. Use clone() to derive a copy.
+    """
+
+    __slots__ = ("name", "desc", "command", "bytes", "decode", "ecu", "fast",
+                 "header", "mode", "pid", "request", "_hash")
+
     def __init__(self,
                  name,
                  desc,
@@ -49,14 +60,38 @@ class OBDCommand:
                  ecu=ECU.ALL,
                  fast=False,
                  header=ECU_HEADER.ENGINE):
-        self.name = name  # human readable name (also used as key in commands dict)
-        self.desc = desc  # human readable description
-        self.command = command  # command string
-        self.bytes = _bytes  # number of bytes expected in return
-        self.decode = decoder  # decoding function
-        self.ecu = ecu  # ECU ID from which this command expects messages from
-        self.fast = fast  # can an extra digit be added to the end of the command? (to make the ELM return early)
-        self.header = header  # ECU header used for the queries
+        init = object.__setattr__
+        init(self, "name", name)  # human readable name (also used as key in commands dict)
+        init(self, "desc", desc)  # human readable description
+        init(self, "command", command)  # command string
+        init(self, "bytes", _bytes)  # number of bytes expected in return
+        init(self, "decode", decoder)  # decoding function
+        init(self, "ecu", ecu)  # ECU ID from which this command expects messages from
+        init(self, "fast", fast)  # can an extra digit be added to the end of the command? (to make the ELM return early)
+        init(self, "header", header)  # ECU header used for the queries
+
+        # precomputed identity
+        is_hex = len(command) >= 2 and isHex(command.decode())
+        init(self, "mode", int(command[:2], 16) if is_hex else None)
+        init(self, "pid", int(command[2:], 16) if (is_hex and len(command) > 2) else None)
+        init(self, "request", header + command)  # header and command bytes, unique per command
+        init(self, "_hash", hash(self.request))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("OBDCommand objects are immutable (use clone() to make a modified copy)")
+
+    def __delattr__(self, name):
+        raise AttributeError("OBDCommand objects are immutable")
+
+    def __reduce__(self):
+        return (OBDCommand, (self.name,
+                             self.desc,
+                             self.command,
+                             self.bytes,
+                             self.decode,
+                             self.ecu,
+                             self.fast,
+                             self.header))
 
     def clone(self):
         return OBDCommand(self.name,
@@ -69,38 +104,62 @@ class OBDCommand:
                           self.header)
 
     @property
-    def mode(self):
-        if len(self.command) >= 2 and isHex(self.command.decode()):
-            return int(self.command[:2], 16)
-        else:
-            return None
-
-    @property
-    def pid(self):
-        if len(self.command) > 2 and isHex(self.command.decode()):
-            return int(self.command[2:], 16)
-        else:
-            return None
-
-    def __call__(self, messages):
+    def unit(self):
+        """ name of the unit of this command's numeric values (None if not numeric) """
+        return getattr(self.decode, "unit", None)
 
-        # filter for applicable messages (from the right ECU(s))
-        messages = [m for m in messages if (self.ecu & m.ecu) > 0]
+    def __call__(self, messages, response=None, raw=False, cache=None):
 
-        # guarantee data size for the decoder
+        # filter for applicable messages (from the right ECU(s)), and
+        # guarantee data size for the decoder. The list is only copied
+        # when some messages have to be dropped
+        applicable = messages
         for m in messages:
-            self.__constrain_message_data(m)
+            if (self.ecu & m.ecu) > 0:
+                self.__constrain_message_data(m)
+            elif applicable is messages:
+                applicable = [m for m in messages if (self.ecu & m.ecu) > 0]
+        messages = applicable
 
         # create the response object with the raw data received
         # and reference to original command
-        r = OBDResponse(self, messages)
+        # (pooled connections pass in their previous response for reuse)
+        if response is None:
+            r = OBDResponse(self, messages)
+        else:
+            r = response._reuse(self, messages)
         if messages:
-            r.value = self.decode(messages)
+            # raw mode skips building a pint Quantity for numeric values
+            if raw and hasattr(self.decode, "raw"):
+                decode = self.decode.raw
+            else:
+                decode = self.decode
+
+            # repeated payloads share the value decoded the first time
+            # (AT commands are decoded from the raw frames, so aren't cached)
+            if cache is not None and self.mode is not None:
+                key = cache.key(self, messages, raw)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    r.value = value
+                    return r
+                decode = self.__caching_decoder(decode, cache, key)
+
+            # the value is only decoded once somebody reads it
+            r._defer(decode)
         else:
             logger.info(str(self) + " did not receive any acceptable messages")
 
         return r
 
+    @staticmethod
+    def __caching_decoder(decode, cache, key):
+        def decoder(messages):
+            value = decode(messages)
+            cache.put(key, value)
+            return value
+        return decoder
+
     def __constrain_message_data(self, message):
         """ pads or chops the data field to the size specified by this command """
         len_msg_data = len(message.data)
@@ -144,7 +203,7 @@ class OBDCommand:
 
     def __hash__(self):
         # needed for using commands as keys in a dict (see async.py)
-        return hash(self.header + self.command)
+        return self._hash
 
     def __eq__(self, other):
         if isinstance(other, OBDCommand):
@@ -45,26 +45,76 @@ else:
     string_types = (str,)
 
 
+# the state of a response without a value to decode
+_NO_VALUE = (None, None, None)
+
+
 class OBDResponse:
     """ Standard response object for any OBDCommand """
 
+    __slots__ = ("command", "messages", "time", "__state")
+
     def __init__(self, command=None, messages=None):
         self.command = command
         self.messages = messages if messages else []
-        self.value = None
         self.time = time.time()
+        # [pending decoder, messages, value], replaced as a whole when a
+        # pooled response is refilled, so that a reader racing the refill
+        # never stores the old value against the new messages
+        self.__state = _NO_VALUE
+
+    def _reuse(self, command, messages):
+        """ reinitializes this object in place, for pooled connections """
+        self.__init__(command, messages)
+        return self
+
+    def _defer(self, decoder):
+        """ the value will be decoder(self.messages), computed when first read """
+        self.__state = [decoder, self.messages, None]
+
+    @property
+    def value(self):
+        state = self.__state
+        decoder = state[0]
+        if decoder is not None:
+            value = decoder(state[1])
+            state[2] = value
+            state[0] = None
+            return value
+        return state[2]
+
+    @value.setter
+    def value(self, value):
+        self.__state = (None, None, value)
 
     @property
     def unit(self):
         # for backwards compatibility
-        from obd import Unit  # local import to avoid cyclic-dependency
-        if isinstance(self.value, Unit.Quantity):
+        from .UnitsAndScaling import is_quantity
+        if is_quantity(self.value):
             return str(self.value.u)
         elif self.value is None:
             return None
+        elif self.__is_raw():
+            return self.command.unit
         else:
             return str(type(self.value))
 
+    @property
+    def quantity(self):
+        """ the value as a pint Quantity, built on request for raw mode responses """
+        if self.__is_raw():
+            from .UnitsAndScaling import Unit
+            return Unit.Quantity(self.value, self.command.unit)
+        return self.value
+
+    def __is_raw(self):
+        """ whether the value is a plain number decoded in raw mode """
+        return isinstance(self.value, (int, float)) and \
+            not isinstance(self.value, bool) and \
+            self.command is not None and \
+            self.command.unit is not None
+
     def is_null(self):
         return (not self.messages) or (self.value == None)
 
@@ -78,22 +128,9 @@ class OBDResponse:
 """
 
 
-class Status:
-    def __init__(self):
-        self.MIL = False
-        self.DTC_count = 0
-        self.ignition_type = ""
-
-        # make sure each test is available by name
-        # until real data comes it. This also prevents things from
-        # breaking when the user looks up a standard test that's null.
-        null_test = StatusTest()
-        for name in BASE_TESTS + SPARK_TESTS + COMPRESSION_TESTS:
-            if name:  # filter out None/reserved tests
-                self.__dict__[name] = null_test
-
-
 class StatusTest():
+    __slots__ = ("name", "available", "complete")
+
     def __init__(self, name="", available=False, complete=False):
         self.name = name
         self.available = available
@@ -105,48 +142,75 @@ class StatusTest():
         return "Test %s: %s, %s" % (self.name, a, c)
 
 
-class Monitor:
+class _NullStatusTest(StatusTest):
+    """ shared result for tests that weren't reported (can't be modified) """
+    __slots__ = ()
+
     def __init__(self):
-        self._tests = {}  # tid : MonitorTest
+        for name in StatusTest.__slots__:
+            object.__setattr__(self, name, "" if name == "name" else False)
 
-        # make the standard TIDs available as null monitor tests
-        # until real data comes it. This also prevents things from
-        # breaking when the user looks up a standard test that's null.
-        null_test = MonitorTest()
+    def __setattr__(self, name, value):
+        raise AttributeError("The null StatusTest is shared, and can't be modified")
 
-        for tid in TEST_IDS:
-            name = TEST_IDS[tid][0]
-            self.__dict__[name] = null_test
-            self._tests[tid] = null_test
 
-    def add_test(self, test):
-        self._tests[test.tid] = test
-        if test.name is not None:
-            self.__dict__[test.name] = test
+NULL_STATUS_TEST = _NullStatusTest()
 
-    @property
-    def tests(self):
-        return [test for test in self._tests.values() if not test.is_null()]
 
-    def __str__(self):
-        if len(self.tests) > 0:
-            return "\n".join([str(t) for t in self.tests])
-        else:
-            return "No tests to report"
+def _status_test_bits(tests, offset):
+    """ name --> (available bit, not-complete bit) for each test of a group """
+    # reverse to correct for bit vs. indexing order
+    return dict((name, (offset + i, offset + 8 + i))
+                for i, name in enumerate(tests[::-1]) if name)
 
-    def __len__(self):
-        return len(self.tests)
 
-    def __getitem__(self, key):
-        if isinstance(key, int):
-            return self._tests.get(key, MonitorTest())
-        elif isinstance(key, string_types):
-            return self.__dict__.get(key, MonitorTest())
+_BASE_TEST_BITS = dict((name, (13 + i, 9 + i)) for i, name in enumerate(BASE_TESTS[::-1]))
+_STATUS_TEST_BITS = [
+    dict(_BASE_TEST_BITS, **_status_test_bits(SPARK_TESTS, 2 * 8)),  # spark
+    dict(_BASE_TEST_BITS, **_status_test_bits(COMPRESSION_TESTS, 2 * 8)),  # compression
+]
+_STATUS_TEST_NAMES = frozenset(_STATUS_TEST_BITS[0]) | frozenset(_STATUS_TEST_BITS[1])
+
+
+class Status:
+    """
+        Decoded status bits (PIDs 01 and 41). The individual tests are
+        only built from the bits when they're first looked up by name,
+        and are stored in the instance __dict__ from then on (so they
+        won't show in vars() before being read). Tests that don't apply
+        to the engine's ignition type are null.
+    """
+
+    def __init__(self, bits=None):
+        self._bits = bits  # BitArray of the four status bytes, if any
+        if bits is None:
+            self.MIL = False
+            self.DTC_count = 0
+            self.ignition_type = ""
         else:
-            logger.warning("Monitor test results can only be retrieved by TID value or property name")
+            self.MIL = bits[0]
+            self.DTC_count = bits.value(1, 8)
+            self.ignition_type = IGNITION_TYPE[int(bits[12])]
+
+    def __getattr__(self, name):
+        # only called for names that aren't set yet, ie: the tests
+        if name not in _STATUS_TEST_NAMES:
+            raise AttributeError("'Status' object has no attribute '%s'" % name)
+
+        test = NULL_STATUS_TEST
+        if self._bits is not None:
+            positions = _STATUS_TEST_BITS[int(self._bits[12])].get(name)
+            if positions is not None:
+                available, incomplete = positions
+                test = StatusTest(name, self._bits[available], not self._bits[incomplete])
+
+        self.__dict__[name] = test  # memoize
+        return test
 
 
 class MonitorTest:
+    __slots__ = ("tid", "name", "desc", "value", "min", "max")
+
     def __init__(self):
         self.tid = None
         self.name = None
@@ -172,3 +236,95 @@ class MonitorTest:
         return "%s : %s [%s]" % (self.desc,
                                  str(self.value),
                                  "PASSED" if self.passed else "FAILED")
+
+
+class _NullMonitorTest(MonitorTest):
+    """ shared result for tests that weren't reported (can't be modified) """
+    __slots__ = ()
+
+    def __init__(self):
+        for name in MonitorTest.__slots__:
+            object.__setattr__(self, name, None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The null MonitorTest is shared, and can't be modified")
+
+
+NULL_MONITOR_TEST = _NullMonitorTest()
+
+# name --> TID, for the standard tests
+_TEST_NAMES = dict((TEST_IDS[tid][0], tid) for tid in TEST_IDS)
+
+
+class Monitor:
+    """
+        Mode 06 test results. The raw 9 byte test records are only
+        parsed when a result is first looked up, and named tests are
+        stored in the instance __dict__ once they've been read. Tests
+        that weren't reported are the shared NULL_MONITOR_TEST.
+    """
+
+    def __init__(self, data=b"", parse=None):
+        self._data = data  # raw test records, a multiple of 9 bytes
+        self._parse = parse  # function(record) --> MonitorTest or None
+        self._parsed = None  # tid : MonitorTest
+        self._named = None  # name : MonitorTest
+
+    def __load(self):
+        if self._parsed is None:
+            parsed = {}
+            named = {}
+            if self._parse is not None:
+                for n in range(0, len(self._data), 9):
+                    test = self._parse(self._data[n:n + 9])
+                    if test is not None:
+                        parsed[test.tid] = test
+                        if test.name is not None:
+                            named[test.name] = test
+            self._named = named
+            self._parsed = parsed
+        return self._parsed
+
+    def add_test(self, test):
+        self.__load()[test.tid] = test
+        if test.name is not None:
+            self._named[test.name] = test
+            self.__dict__[test.name] = test
+
+    @property
+    def tests(self):
+        return [test for test in self.__load().values() if not test.is_null()]
+
+    def __getattr__(self, name):
+        # only called for names that aren't regular attributes, ie: the tests
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self.__load()
+        if name in self._named:
+            test = self._named[name]
+        elif name in _TEST_NAMES:
+            test = NULL_MONITOR_TEST
+        else:
+            raise AttributeError("'Monitor' object has no attribute '%s'" % name)
+        self.__dict__[name] = test  # memoize
+        return test
+
+    def __str__(self):
+        if len(self.tests) > 0:
+            return "\n".join([str(t) for t in self.tests])
+        else:
+            return "No tests to report"
+
+    def __len__(self):
+        return len(self.tests)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.__load().get(key, NULL_MONITOR_TEST)
+        elif isinstance(key, string_types):
+            self.__load()
+            if key in self._named:
+                return self._named[key]
+            return NULL_MONITOR_TEST
+        else:
+            logger.warning("Monitor test results can only be retrieved by TID value or property name")
@@ -30,17 +30,60 @@
 #                                                                      #
 ########################################################################
 
-import pint
+import threading
 
 from .utils import *
 
+
+class UnitRegistry(object):
+    """
+    Stand-in for the pint unit registry, which is slow to build (and
+    pint slow to import), so it's only loaded the first time a unit or
+    Quantity is asked for. Everything else is passed through to pint.
+    """
+
+    def __init__(self):
+        self.__registry = None
+        self.__lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.__registry is not None
+
+    def load(self):
+        """ returns the real pint registry, building it if needed """
+        if self.__registry is None:
+            with self.__lock:
+                if self.__registry is None:
+                    import pint
+                    registry = pint.UnitRegistry()
+                    registry.define("percent = [] = %")
+                    registry.define("ratio = []")
+                    registry.define("gps = gram / second = GPS = grams_per_second")
+                    registry.define("lph = liter / hour = LPH = liters_per_hour")
+                    registry.define("ppm = count / 1000000 = PPM = parts_per_million")
+                    self.__registry = registry
+        return self.__registry
+
+    def __getattr__(self, name):
+        if name.startswith("_UnitRegistry__"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self.load())
+
+
 # export the unit registry
-Unit = pint.UnitRegistry()
-Unit.define("percent = [] = %")
-Unit.define("ratio = []")
-Unit.define("gps = gram / second = GPS = grams_per_second")
-Unit.define("lph = liter / hour = LPH = liters_per_hour")
-Unit.define("ppm = count / 1000000 = PPM = parts_per_million")
+Unit = UnitRegistry()
+
+
+def is_quantity(value):
+    """ checks for a pint Quantity, without loading pint for other values """
+    return Unit.loaded and isinstance(value, Unit.Quantity)
 
 
 class UAS:
@@ -52,123 +95,126 @@ class UAS:
     def __init__(self, signed, scale, unit, offset=0.0):
         self.signed = signed
         self.scale = scale
-        self.unit = unit
+        self.unit = unit  # unit name, as printed by pint
         self.offset = offset
+        self.__units = None  # the pint unit, resolved on first use
 
     def __call__(self, _bytes):
-        value = bytes_to_int(_bytes)
-
-        if self.signed:
-            value = twos_comp(value, len(_bytes) * 8)
+        if self.__units is None:
+            self.__units = Unit.Unit(self.unit)
+        return Unit.Quantity(self.raw(_bytes), self.__units)
 
+    def raw(self, _bytes):
+        """ the scaled value as a plain number, in self.unit """
+        value = int.from_bytes(_bytes, "big", signed=self.signed)
         value *= self.scale
         value += self.offset
-        return Unit.Quantity(value, self.unit)
+        return value
 
 
 # dict for looking up standardized UAS IDs with conversion objects
 UAS_IDS = {
     # unsigned -----------------------------------------
-    0x01: UAS(False, 1, Unit.count),
-    0x02: UAS(False, 0.1, Unit.count),
-    0x03: UAS(False, 0.01, Unit.count),
-    0x04: UAS(False, 0.001, Unit.count),
-    0x05: UAS(False, 0.0000305, Unit.count),
-    0x06: UAS(False, 0.000305, Unit.count),
-    0x07: UAS(False, 0.25, Unit.rpm),
-    0x08: UAS(False, 0.01, Unit.kph),
-    0x09: UAS(False, 1, Unit.kph),
-    0x0A: UAS(False, 0.122, Unit.millivolt),
-    0x0B: UAS(False, 0.001, Unit.volt),
-    0x0C: UAS(False, 0.01, Unit.volt),
-    0x0D: UAS(False, 0.00390625, Unit.milliampere),
-    0x0E: UAS(False, 0.001, Unit.ampere),
-    0x0F: UAS(False, 0.01, Unit.ampere),
-    0x10: UAS(False, 1, Unit.millisecond),
-    0x11: UAS(False, 100, Unit.millisecond),
-    0x12: UAS(False, 1, Unit.second),
-    0x13: UAS(False, 1, Unit.milliohm),
-    0x14: UAS(False, 1, Unit.ohm),
-    0x15: UAS(False, 1, Unit.kiloohm),
-    0x16: UAS(False, 0.1, Unit.celsius, offset=-40.0),
-    0x17: UAS(False, 0.01, Unit.kilopascal),
-    0x18: UAS(False, 0.0117, Unit.kilopascal),
-    0x19: UAS(False, 0.079, Unit.kilopascal),
-    0x1A: UAS(False, 1, Unit.kilopascal),
-    0x1B: UAS(False, 10, Unit.kilopascal),
-    0x1C: UAS(False, 0.01, Unit.degree),
-    0x1D: UAS(False, 0.5, Unit.degree),
-    0x1E: UAS(False, 0.0000305, Unit.ratio),
-    0x1F: UAS(False, 0.05, Unit.ratio),
-    0x20: UAS(False, 0.00390625, Unit.ratio),
-    0x21: UAS(False, 1, Unit.millihertz),
-    0x22: UAS(False, 1, Unit.hertz),
-    0x23: UAS(False, 1, Unit.kilohertz),
-    0x24: UAS(False, 1, Unit.count),
-    0x25: UAS(False, 1, Unit.kilometer),
-    0x26: UAS(False, 0.1, Unit.millivolt / Unit.millisecond),
-    0x27: UAS(False, 0.01, Unit.grams_per_second),
-    0x28: UAS(False, 1, Unit.grams_per_second),
-    0x29: UAS(False, 0.25, Unit.pascal / Unit.second),
-    0x2A: UAS(False, 0.001, Unit.kilogram / Unit.hour),
-    0x2B: UAS(False, 1, Unit.count),
-    0x2C: UAS(False, 0.01, Unit.gram),  # per-cylinder
-    0x2D: UAS(False, 0.01, Unit.milligram),  # per-stroke
+    0x01: UAS(False, 1, "count"),
+    0x02: UAS(False, 0.1, "count"),
+    0x03: UAS(False, 0.01, "count"),
+    0x04: UAS(False, 0.001, "count"),
+    0x05: UAS(False, 0.0000305, "count"),
+    0x06: UAS(False, 0.000305, "count"),
+    0x07: UAS(False, 0.25, "revolutions_per_minute"),
+    0x08: UAS(False, 0.01, "kilometer_per_hour"),
+    0x09: UAS(False, 1, "kilometer_per_hour"),
+    0x0A: UAS(False, 0.122, "millivolt"),
+    0x0B: UAS(False, 0.001, "volt"),
+    0x0C: UAS(False, 0.01, "volt"),
+    0x0D: UAS(False, 0.00390625, "milliampere"),
+    0x0E: UAS(False, 0.001, "ampere"),
+    0x0F: UAS(False, 0.01, "ampere"),
+    0x10: UAS(False, 1, "millisecond"),
+    0x11: UAS(False, 100, "millisecond"),
+    0x12: UAS(False, 1, "second"),
+    0x13: UAS(False, 1, "milliohm"),
+    0x14: UAS(False, 1, "ohm"),
+    0x15: UAS(False, 1, "kiloohm"),
+    0x16: UAS(False, 0.1, "degree_Celsius", offset=-40.0),
+    0x17: UAS(False, 0.01, "kilopascal"),
+    0x18: UAS(False, 0.0117, "kilopascal"),
+    0x19: UAS(False, 0.079, "kilopascal"),
+    0x1A: UAS(False, 1, "kilopascal"),
+    0x1B: UAS(False, 10, "kilopascal"),
+    0x1C: UAS(False, 0.01, "degree"),
+    0x1D: UAS(False, 0.5, "degree"),
+    0x1E: UAS(False, 0.0000305, "ratio"),
+    0x1F: UAS(False, 0.05, "ratio"),
+    0x20: UAS(False, 0.00390625, "ratio"),
+    0x21: UAS(False, 1, "millihertz"),
+    0x22: UAS(False, 1, "hertz"),
+    0x23: UAS(False, 1, "kilohertz"),
+    0x24: UAS(False, 1, "count"),
+    0x25: UAS(False, 1, "kilometer"),
+    0x26: UAS(False, 0.1, "millivolt / millisecond"),
+    0x27: UAS(False, 0.01, "gps"),
+    0x28: UAS(False, 1, "gps"),
+    0x29: UAS(False, 0.25, "pascal / second"),
+    0x2A: UAS(False, 0.001, "kilogram / hour"),
+    0x2B: UAS(False, 1, "count"),
+    0x2C: UAS(False, 0.01, "gram"),  # per-cylinder
+    0x2D: UAS(False, 0.01, "milligram"),  # per-stroke
     0x2E: lambda _bytes: any([bool(x) for x in _bytes]),
-    0x2F: UAS(False, 0.01, Unit.percent),
-    0x30: UAS(False, 0.001526, Unit.percent),
-    0x31: UAS(False, 0.001, Unit.liter),
-    0x32: UAS(False, 0.0000305, Unit.inch),
-    0x33: UAS(False, 0.00024414, Unit.ratio),
-    0x34: UAS(False, 1, Unit.minute),
-    0x35: UAS(False, 10, Unit.millisecond),
-    0x36: UAS(False, 0.01, Unit.gram),
-    0x37: UAS(False, 0.1, Unit.gram),
-    0x38: UAS(False, 1, Unit.gram),
-    0x39: UAS(False, 0.01, Unit.percent, offset=-327.68),
-    0x3A: UAS(False, 0.001, Unit.gram),
-    0x3B: UAS(False, 0.0001, Unit.gram),
-    0x3C: UAS(False, 0.1, Unit.microsecond),
-    0x3D: UAS(False, 0.01, Unit.milliampere),
-    0x3E: UAS(False, 0.00006103516, Unit.millimeter ** 2),
-    0x3F: UAS(False, 0.01, Unit.liter),
-    0x40: UAS(False, 1, Unit.ppm),
-    0x41: UAS(False, 0.01, Unit.microampere),
+    0x2F: UAS(False, 0.01, "percent"),
+    0x30: UAS(False, 0.001526, "percent"),
+    0x31: UAS(False, 0.001, "liter"),
+    0x32: UAS(False, 0.0000305, "inch"),
+    0x33: UAS(False, 0.00024414, "ratio"),
+    0x34: UAS(False, 1, "minute"),
+    0x35: UAS(False, 10, "millisecond"),
+    0x36: UAS(False, 0.01, "gram"),
+    0x37: UAS(False, 0.1, "gram"),
+    0x38: UAS(False, 1, "gram"),
+    0x39: UAS(False, 0.01, "percent", offset=-327.68),
+    0x3A: UAS(False, 0.001, "gram"),
+    0x3B: UAS(False, 0.0001, "gram"),
+    0x3C: UAS(False, 0.1, "microsecond"),
+    0x3D: UAS(False, 0.01, "milliampere"),
+    0x3E: UAS(False, 0.00006103516, "millimeter ** 2"),
+    0x3F: UAS(False, 0.01, "liter"),
+    0x40: UAS(False, 1, "ppm"),
+    0x41: UAS(False, 0.01, "microampere"),
 
     # signed -----------------------------------------
-    0x81: UAS(True, 1, Unit.count),
-    0x82: UAS(True, 0.1, Unit.count),
-    0x83: UAS(True, 0.01, Unit.count),
-    0x84: UAS(True, 0.001, Unit.count),
-    0x85: UAS(True, 0.0000305, Unit.count),
-    0x86: UAS(True, 0.000305, Unit.count),
-    0x87: UAS(True, 1, Unit.ppm),
+    0x81: UAS(True, 1, "count"),
+    0x82: UAS(True, 0.1, "count"),
+    0x83: UAS(True, 0.01, "count"),
+    0x84: UAS(True, 0.001, "count"),
+    0x85: UAS(True, 0.0000305, "count"),
+    0x86: UAS(True, 0.000305, "count"),
+    0x87: UAS(True, 1, "ppm"),
     #
-    0x8A: UAS(True, 0.122, Unit.millivolt),
-    0x8B: UAS(True, 0.001, Unit.volt),
-    0x8C: UAS(True, 0.01, Unit.volt),
-    0x8D: UAS(True, 0.00390625, Unit.milliampere),
-    0x8E: UAS(True, 0.001, Unit.ampere),
+    0x8A: UAS(True, 0.122, "millivolt"),
+    0x8B: UAS(True, 0.001, "volt"),
+    0x8C: UAS(True, 0.01, "volt"),
+    0x8D: UAS(True, 0.00390625, "milliampere"),
+    0x8E: UAS(True, 0.001, "ampere"),
     #
-    0x90: UAS(True, 1, Unit.millisecond),
+    0x90: UAS(True, 1, "millisecond"),
     #
-    0x96: UAS(True, 0.1, Unit.celsius),
+    0x96: UAS(True, 0.1, "degree_Celsius"),
     #
-    0x99: UAS(True, 0.1, Unit.kilopascal),
+    0x99: UAS(True, 0.1, "kilopascal"),
     #
-    0x9C: UAS(True, 0.01, Unit.degree),
-    0x9D: UAS(True, 0.5, Unit.degree),
+    0x9C: UAS(True, 0.01, "degree"),
+    0x9D: UAS(True, 0.5, "degree"),
     #
-    0xA8: UAS(True, 1, Unit.grams_per_second),
-    0xA9: UAS(True, 0.25, Unit.pascal / Unit.second),
+    0xA8: UAS(True, 1, "gps"),
+    0xA9: UAS(True, 0.25, "pascal / second"),
     #
-    0xAD: UAS(True, 0.01, Unit.milligram),  # per-stroke
-    0xAE: UAS(True, 0.1, Unit.milligram),  # per-stroke
-    0xAF: UAS(True, 0.01, Unit.percent),
-    0xB0: UAS(True, 0.003052, Unit.percent),
-    0xB1: UAS(True, 2, Unit.millivolt / Unit.second),
+    0xAD: UAS(True, 0.01, "milligram"),  # per-stroke
+    0xAE: UAS(True, 0.1, "milligram"),  # per-stroke
+    0xAF: UAS(True, 0.01, "percent"),
+    0xB0: UAS(True, 0.003052, "percent"),
+    0xB1: UAS(True, 2, "millivolt / second"),
     #
-    0xFC: UAS(True, 0.01, Unit.kilopascal),
-    0xFD: UAS(True, 0.001, Unit.kilopascal),
-    0xFE: UAS(True, 0.25, Unit.pascal),
+    0xFC: UAS(True, 0.01, "kilopascal"),
+    0xFD: UAS(True, 0.001, "kilopascal"),
+    0xFE: UAS(True, 0.25, "pascal"),
 }
@@ -40,9 +40,11 @@
 from .__version__ import __version__
 from .obd import OBD
 from .asynchronous import Async
+from .daemon import OBDDaemon, OBDClient
 from .commands import commands
 from .OBDCommand import OBDCommand
 from .OBDResponse import OBDResponse
+from .cache import DecodeCache
 from .protocols import ECU
 from .utils import scan_serial, OBDStatus
 from .UnitsAndScaling import Unit
@@ -47,12 +47,16 @@ class Async(OBD):
 
     def __init__(self, portstr=None, baudrate=None, protocol=None, fast=True,
                  timeout=0.1, check_voltage=True, start_low_power=False,
-                 delay_cmds=0.25):
+                 delay_cmds=0.25, pooled=False, raw=False, decode_cache=None):
         self.__thread = None
-        super(Async, self).__init__(portstr, baudrate, protocol, fast,
-                                    timeout, check_voltage, start_low_power)
         self.__commands = {}   # key = OBDCommand, value = Response
         self.__callbacks = {}  # key = OBDCommand, value = list of Functions
+        self.__intervals = {}  # key = OBDCommand, value = minimum seconds between queries
+        self.__due = {}  # key = OBDCommand, value = time.monotonic() of the next query
+        self.__pooled = pooled  # reuse each command's Response object in the update loop
+        super(Async, self).__init__(portstr, baudrate, protocol, fast,
+                                    timeout, check_voltage, start_low_power,
+                                    raw, decode_cache)
         self.__running = False
         self.__was_running = False  # used with __enter__() and __exit__()
         self.__delay_cmds = delay_cmds
@@ -121,11 +125,12 @@ class Async(OBD):
         self.stop()
         super(Async, self).close()
 
-    def watch(self, c, callback=None, force=False):
+    def watch(self, c, callback=None, force=False, interval=None):
         """
             Subscribes the given command for continuous updating. Once subscribed,
             query() will return that command's latest value. Optional callbacks can
-            be given, which will be fired upon every new value.
+            be given, which will be fired upon every new value. An optional interval
+            (in seconds) limits how often the command is queried.
         """
 
         # the dict shouldn't be changed while the daemon thread is iterating
@@ -142,6 +147,10 @@ class Async(OBD):
                 logger.info("Watching command: %s" % str(c))
                 self.__commands[c] = OBDResponse()  # give it an initial value
                 self.__callbacks[c] = []  # create an empty list
+                self.__intervals[c] = interval or 0
+            else:
+                # the command is shared, so query it as often as its most frequent watcher asks
+                self.__intervals[c] = min(self.__intervals[c], interval or 0)
 
             # if a callback was given, push it
             if hasattr(callback, "__call__") and (callback not in self.__callbacks[c]):
@@ -169,10 +178,14 @@ class Async(OBD):
                     # if no more callbacks are left, remove the command entirely
                     if len(self.__callbacks[c]) == 0:
                         self.__commands.pop(c, None)
+                        self.__intervals.pop(c, None)
+                        self.__due.pop(c, None)
                 else:
                     # no callback was specified, pop everything
                     self.__callbacks.pop(c, None)
                     self.__commands.pop(c, None)
+                    self.__intervals.pop(c, None)
+                    self.__due.pop(c, None)
 
     def unwatch_all(self):
         """ Unsubscribes all commands and callbacks from being updated """
@@ -184,6 +197,8 @@ class Async(OBD):
             logger.info("Unwatching all")
             self.__commands = {}
             self.__callbacks = {}
+            self.__intervals = {}
+            self.__due = {}
 
     def query(self, c, force=False):
         """
@@ -196,6 +211,16 @@ class Async(OBD):
         else:
             return OBDResponse()
 
+    def _response(self, cmd, messages):
+        """
+            In pooled mode, watched commands refill their previous
+            Response object, rather than allocating a new one per query.
+        """
+        if self.__pooled and cmd in self.__commands:
+            return cmd(messages, response=self.__commands[cmd],
+                       raw=self.raw, cache=self.decode_cache)
+        return cmd(messages, raw=self.raw, cache=self.decode_cache)
+
     def run(self):
         """ Daemon thread """
 
@@ -205,12 +230,22 @@ class Async(OBD):
             if len(self.__commands) > 0:
                 # loop over the requested commands, send, and collect the response
                 for c in self.__commands:
+                    if not self.__running:
+                        break  # stop() shouldn't have to wait for the whole pass
+
                     if not self.is_connected():
                         logger.info("Async thread terminated because device disconnected")
                         self.__running = False
                         self.__thread = None
                         return
 
+                    # skip commands watched with an interval, until they're due
+                    if self.__intervals[c]:
+                        now = time.monotonic()
+                        if now < self.__due.get(c, 0):
+                            continue
+                        self.__due[c] = now + self.__intervals[c]
+
                     # force, since commands are checked for support in watch()
                     r = super(Async, self).query(c, force=True)
 
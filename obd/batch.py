@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#                                                                      #
+# python-OBD: A python OBD-II serial module derived from pyobd         #
+#                                                                      #
+# Copyright 2004 Donour Sizemore (donour@uchicago.edu)                 #
+# Copyright 2009 Secons Ltd. (www.obdtester.com)                       #
+# Copyright 2009 Peter J. Creath                                       #
+# Copyright 2016 Brendan Whitfield (brendan-w.com)                     #
+#                                                                      #
+########################################################################
+#                                                                      #
+# batch.py                                                             #
+#                                                                      #
+# This file is part of python-OBD (a derivative of pyOBD)              #
+#                                                                      #
+# python-OBD is free software: you can redistribute it and/or modify   #
+# it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation, either version 2 of the License, or    #
+# (at your option) any later version.                                  #
+#                                                                      #
+# python-OBD is distributed in the hope that it will be useful,        #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+# GNU General Public License for more details.                         #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with python-OBD.  If not, see <http://www.gnu.org/licenses/>.  #
+#                                                                      #
+########################################################################
+
+"""
+
+Columnar decoding of recorded responses, for offline analysis
+
+Rather than building Frame, Message and OBDResponse objects one line at
+a time, whole arrays of recorded frames are decoded at once with NumPy.
+Only single frame CAN responses to the standard numeric PIDs are
+supported; everything else should go through the normal per-message path.
+
+NumPy is an optional dependency, and is only needed by this module.
+
+"""
+
+import numpy as np
+
+from . import decoders as d
+from .UnitsAndScaling import UAS_IDS
+
+# ASCII --> nibble value, for parsing hex text without a Python loop
+_HEX_LUT = np.zeros(256, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789ABCDEF"):
+    _HEX_LUT[_c] = _i
+for _i, _c in enumerate(b"abcdef"):
+    _HEX_LUT[_c] = 10 + _i
+
+
+class DecodedBatch(object):
+    """ the typed columns produced by decode_lines() and decode_data() """
+
+    def __init__(self, values, valid, tx_id, unit):
+        self.values = values  # float64, NaN where invalid
+        self.valid = valid  # bool, whether each row was a response to the command
+        self.tx_id = tx_id  # uint8, transmitter of each row
+        self.unit = unit  # string, as in OBDResponse.unit
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _int(d):
+    """ big-endian unsigned integer from each row of a byte matrix """
+    v = np.zeros(d.shape[0], dtype=np.int64)
+    for i in range(d.shape[1]):
+        v = (v << 8) | d[:, i]
+    return v
+
+
+def _twos_comp(v, num_bits):
+    return np.where(v & (1 << (num_bits - 1)), v - (1 << num_bits), v)
+
+
+# vectorized equivalents of the scalar decoders
+# key = decoder, value = function of the payload byte matrix
+# (the units are the same as the scalar decoders, see decoder.unit)
+_FORMULAS = {
+    d.count:              lambda p: _int(p),
+    d.percent:            lambda p: p[:, 0] * 100.0 / 255.0,
+    d.percent_centered:   lambda p: (p[:, 0] - 128.0) * 100.0 / 128.0,
+    d.temp:               lambda p: _int(p) - 40.0,
+    d.current_centered:   lambda p: (_int(p[:, 2:4]) / 256.0) - 128,
+    d.sensor_voltage:     lambda p: p[:, 0] / 200.0,
+    d.sensor_voltage_big: lambda p: (_int(p[:, 2:4]) * 8.0) / 65535,
+    d.fuel_pressure:      lambda p: p[:, 0] * 3.0,
+    d.pressure:           lambda p: p[:, 0] * 1.0,
+    d.evap_pressure:      lambda p: ((_twos_comp(p[:, 0].astype(np.int64), 8) * 256.0) +
+                                     _twos_comp(p[:, 1].astype(np.int64), 8)) / 4.0,
+    d.abs_evap_pressure:  lambda p: _int(p) / 200.0,
+    d.evap_pressure_alt:  lambda p: _int(p) - 32767.0,
+    d.timing_advance:     lambda p: (p[:, 0] - 128.0) / 2.0,
+    d.inject_timing:      lambda p: (_int(p) - 26880) / 128.0,
+    d.max_maf:            lambda p: p[:, 0] * 10.0,
+    d.fuel_rate:          lambda p: _int(p) * 0.05,
+    d.absolute_load:      lambda p: _int(p) * 100.0 / 255.0,
+}
+
+
+def _formula(cmd):
+    """ returns (unit, function) for a command, or None if it can't be vectorized """
+    decoder = cmd.decode
+
+    if hasattr(decoder, "uas_id"):
+        uas = UAS_IDS[decoder.uas_id]
+
+        def f(p):
+            v = _int(p)
+            if uas.signed:
+                v = _twos_comp(v, p.shape[1] * 8)
+            return v * uas.scale + uas.offset
+
+        return uas.unit, f
+
+    try:
+        f = _FORMULAS.get(decoder)
+    except TypeError:
+        return None  # unhashable decoder
+
+    if f is None:
+        return None
+    return decoder.unit, f
+
+
+def supports(cmd):
+    """ whether a command can be decoded by this module """
+    return (cmd.bytes > 2) and (_formula(cmd) is not None)
+
+
+def hex_matrix(lines, pad=0):
+    """
+        parses hex strings (spaces are ignored) into a 2D uint8 array,
+        and an array of their lengths in hex digits. Lines are given as a
+        sequence of strings, or as one newline separated str/bytes blob,
+        as read from a log file. Each line is virtually prefixed with
+        `pad` zero digits, and zero padded on the right.
+    """
+    if isinstance(lines, str):
+        lines = lines.encode("ascii")
+    if not isinstance(lines, (bytes, bytearray)):
+        lines = "\n".join(lines).encode("ascii")
+
+    # strip spaces and carriage returns, and find the line boundaries
+    text = np.frombuffer(bytes(lines).translate(None, b" \r") + b"\n", dtype=np.uint8)
+    ends = np.flatnonzero(text == ord("\n"))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = (ends - starts) + pad
+
+    # drop blank lines
+    keep = lengths > pad
+    starts = starts[keep]
+    lengths = lengths[keep]
+
+    width = int(lengths.max()) if len(lengths) else 0
+    width += width & 1  # whole bytes only
+
+    # gather every line's digits into a fixed width matrix in one go
+    columns = np.arange(width) - pad
+    index = starts[:, np.newaxis] + columns[np.newaxis, :]
+    inside = (columns[np.newaxis, :] >= 0) & (index < (starts + lengths - pad)[:, np.newaxis])
+    digits = np.where(inside, text[np.clip(index, 0, len(text) - 1)], ord("0"))
+
+    nibbles = _HEX_LUT[digits]
+    matrix = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    return matrix, lengths
+
+
+def decode_lines(cmd, lines, id_bits=11):
+    """
+        decodes raw CAN lines as recorded from the ELM (with headers on),
+        for example "7E8 04 41 0C 1A F8", into a DecodedBatch
+    """
+    # pad 11-bit headers out to 32 bits, as CANProtocol does
+    raw, lengths = hex_matrix(lines, pad=5 if id_bits == 11 else 0)
+    n = raw.shape[0]
+
+    # ------------------------------ header ------------------------------
+    if id_bits == 11:
+        tx_id = (raw[:, 3] & 0x07).astype(np.uint8)
+        from_ecu = (raw[:, 3] & 0x08) != 0
+    else:
+        tx_id = raw[:, 3].astype(np.uint8)
+        from_ecu = np.ones(n, dtype=bool)
+
+    # -------------------------------- PCI --------------------------------
+    pci = raw[:, 4]
+    data_len = (pci & 0x0F).astype(np.int64)
+    valid = from_ecu & \
+        ((pci & 0xF0) == 0x00) & \
+        (data_len > 0) & \
+        ((lengths & 1) == 0) & \
+        (lengths >= 12) & (lengths <= 24)
+
+    # bytes past the marked length are zeroed, like message padding
+    data = raw[:, 5:]
+    columns = np.arange(data.shape[1])
+    data = np.where(columns[np.newaxis, :] < data_len[:, np.newaxis], data, 0).astype(np.uint8)
+
+    return _decode(cmd, data, valid, tx_id)
+
+
+def decode_data(cmd, data, tx_id=None):
+    """
+        decodes a 2D uint8 array of message data (one message per row,
+        starting with the mode and PID bytes) into a DecodedBatch
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    if tx_id is None:
+        tx_id = np.zeros(data.shape[0], dtype=np.uint8)
+    return _decode(cmd, data, np.ones(data.shape[0], dtype=bool), tx_id)
+
+
+def _decode(cmd, data, valid, tx_id):
+    formula = _formula(cmd)
+    if formula is None or cmd.bytes <= 2:
+        raise ValueError("No vectorized decoder for %s" % cmd.name)
+    unit, f = formula
+
+    # guarantee data size for the formula, like OBDCommand does
+    if data.shape[1] < cmd.bytes:
+        pad = np.zeros((data.shape[0], cmd.bytes - data.shape[1]), dtype=np.uint8)
+        data = np.hstack((data, pad))
+    data = data[:, :cmd.bytes]
+
+    # only keep responses to this command
+    valid = valid & (data[:, 0] == 0x40 + cmd.mode) & (data[:, 1] == cmd.pid)
+
+    payload = data[:, 2:].astype(np.int64)
+    values = np.asarray(f(payload), dtype=np.float64)
+    values = np.where(valid, values, np.nan)
+
+    return DecodedBatch(values, valid, tx_id, unit)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#                                                                      #
+# python-OBD: A python OBD-II serial module derived from pyobd         #
+#                                                                      #
+# Copyright 2004 Donour Sizemore (donour@uchicago.edu)                 #
+# Copyright 2009 Secons Ltd. (www.obdtester.com)                       #
+# Copyright 2009 Peter J. Creath                                       #
+# Copyright 2016 Brendan Whitfield (brendan-w.com)                     #
+#                                                                      #
+########################################################################
+#                                                                      #
+# cache.py                                                             #
+#                                                                      #
+# This file is part of python-OBD (a derivative of pyOBD)              #
+#                                                                      #
+# python-OBD is free software: you can redistribute it and/or modify   #
+# it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation, either version 2 of the License, or    #
+# (at your option) any later version.                                  #
+#                                                                      #
+# python-OBD is distributed in the hope that it will be useful,        #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+# GNU General Public License for more details.                         #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with python-OBD.  If not, see <http://www.gnu.org/licenses/>.  #
+#                                                                      #
+########################################################################
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# decoded values of these types can't be modified in place
+_IMMUTABLE = (type(None), bool, int, float, complex, str, bytes, frozenset)
+
+
+def _approx_size(obj, depth=2):
+    """ rough memory footprint of a decoded value, following containers a little way """
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _approx_size(k, depth - 1) + _approx_size(v, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += _approx_size(v, depth - 1)
+    elif hasattr(obj, "__dict__"):
+        size += _approx_size(obj.__dict__, depth - 1)
+
+    return size
+
+
+def _shareable(value):
+    """ whether a decoded value is immutable, and so safe to share between responses """
+    if isinstance(value, tuple):
+        return all(_shareable(v) for v in value)
+    return isinstance(value, _IMMUTABLE)
+
+
+class DecodeCache(object):
+    """
+        Bounded LRU cache of decoded values, keyed by the command
+        and the exact message data it was decoded from.
+
+        Values returned from the cache are shared between every
+        response with the same payload, so only immutable values
+        (numbers, strings and tuples of them) are cached, which makes
+        it mostly useful with raw decoding. Pint Quantities (which
+        ito() changes in place), lists (such as trouble codes), Status
+        and Monitor objects are decoded for every response.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # approximate cap on the memory held by cached values
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()  # key = payload key, value = (value, size)
+        self.__size = 0
+        self.__lock = threading.Lock()  # shared with the Async thread
+
+    @staticmethod
+    def key(cmd, messages, raw=False):
+        """ the cache key for decoding these messages with this command """
+        return (cmd.header,
+                cmd.command,
+                cmd.decode,
+                raw,
+                tuple((m.ecu, bytes(m.data)) for m in messages))
+
+    def get(self, key, default=None):
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if not _shareable(value):
+            return
+
+        size = _approx_size(key) + _approx_size(value)
+        if size > self.max_bytes:
+            logger.debug("Decoded value too large to cache (%d bytes)" % size)
+            return
+
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__size -= old[1]
+
+            self.__entries[key] = (value, size)
+            self.__size += size
+
+            # evict the least recently used values
+            while (len(self.__entries) > self.max_entries) or \
+                  (self.__size > self.max_bytes):
+                _, (_, evicted) = self.__entries.popitem(last=False)
+                self.__size -= evicted
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def size(self):
+        """ approximate number of bytes held by cached values """
+        return self.__size
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return (float(self.hits) / total) if total else 0.0
+
+    def __contains__(self, key):
+        with self.__lock:
+            return key in self.__entries
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    def __str__(self):
+        return "DecodeCache: %d entries, %d bytes, %.1f%% hits" % \
+            (len(self), self.size, self.hit_rate * 100)
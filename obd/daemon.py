@@ -0,0 +1,554 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#                                                                      #
+# python-OBD: A python OBD-II serial module derived from pyobd         #
+#                                                                      #
+# Copyright 2004 Donour Sizemore (donour@uchicago.edu)                 #
+# Copyright 2009 Secons Ltd. (www.obdtester.com)                       #
+# Copyright 2009 Peter J. Creath                                       #
+# Copyright 2016 Brendan Whitfield (brendan-w.com)                     #
+#                                                                      #
+########################################################################
+#                                                                      #
+# daemon.py                                                            #
+#                                                                      #
+# This file is part of python-OBD (a derivative of pyOBD)              #
+#                                                                      #
+# python-OBD is free software: you can redistribute it and/or modify   #
+# it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation, either version 2 of the License, or    #
+# (at your option) any later version.                                  #
+#                                                                      #
+# python-OBD is distributed in the hope that it will be useful,        #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+# GNU General Public License for more details.                         #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with python-OBD.  If not, see <http://www.gnu.org/licenses/>.  #
+#                                                                      #
+########################################################################
+
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import logging
+
+from .OBDResponse import OBDResponse
+from .commands import commands
+from .obd import OBD
+from .protocols.protocol import Frame, Message
+
+logger = logging.getLogger(__name__)
+
+"""
+
+A local daemon that owns the (single) serial connection to the ELM327,
+and shares it with any number of client processes over a Unix socket.
+
+Every packet on the wire is a fixed header followed by a payload:
+
+    [op: u8][tag: u16][length: u32][payload ...]
+
+Requests carry the command name as their payload. Replies echo the tag
+of the request they answer, while pushed updates use tag 0. Responses
+are sent as raw message bytes, and are decoded by the client with its
+own copy of the command tables:
+
+    [time: f64][message count: u8]
+    ([ecu: u8][data length: u16][raw length: u16][data ...][raw ...]) * count
+
+Payloads are limited to MAX_PAYLOAD bytes. Responses that don't fit the
+fields above (or the limit) are refused with a ValueError, rather than
+sent with wrapped lengths.
+
+Each client has its own writer thread, draining a bounded queue of
+outgoing packets, so a slow client can't hold up the polling loop or the
+other clients. A client that falls more than max_queue packets behind is
+disconnected.
+
+"""
+
+DEFAULT_SOCKET_PATH = "/tmp/python-obd.sock"
+
+OP_QUERY = 0x01  # client -> daemon: latest value for a command
+OP_WATCH = 0x02  # client -> daemon: subscribe to updates for a command
+OP_UNWATCH = 0x03  # client -> daemon: unsubscribe from a command
+OP_RESPONSE = 0x81  # daemon -> client: encoded OBDResponse
+OP_OK = 0x82  # daemon -> client: request succeeded (no payload)
+OP_ERROR = 0x83  # daemon -> client: request failed (utf-8 reason)
+
+HEADER = struct.Struct(">BHI")
+RESPONSE_HEADER = struct.Struct(">dB")
+MESSAGE_HEADER = struct.Struct(">BHH")
+
+MAX_PAYLOAD = 1 << 20  # bytes
+
+
+def encode_response(r):
+    """ packs an OBDResponse into the daemon's wire format """
+    if len(r.messages) > 0xFF:
+        raise ValueError("Too many messages to encode: %d" % len(r.messages))
+    parts = [RESPONSE_HEADER.pack(r.time, len(r.messages))]
+    for m in r.messages:
+        raw = m.raw().encode("utf-8")
+        if len(m.data) > 0xFFFF or len(raw) > 0xFFFF:
+            raise ValueError("Message too large to encode: %d data bytes" % len(m.data))
+        parts.append(MESSAGE_HEADER.pack(m.ecu, len(m.data), len(raw)))
+        parts.append(bytes(m.data))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def decode_response(cmd, payload):
+    """ unpacks a wire response, and decodes it with the given command """
+    t, count = RESPONSE_HEADER.unpack_from(payload, 0)
+    offset = RESPONSE_HEADER.size
+
+    messages = []
+    for _ in range(count):
+        ecu, data_len, raw_len = MESSAGE_HEADER.unpack_from(payload, offset)
+        offset += MESSAGE_HEADER.size
+        data = bytearray(payload[offset:offset + data_len])
+        offset += data_len
+        raw = payload[offset:offset + raw_len].decode("utf-8")
+        offset += raw_len
+
+        message = Message([Frame(line) for line in raw.split("\n")] if raw else [])
+        message.ecu = ecu
+        message.data = data
+        messages.append(message)
+
+    if not messages:
+        r = OBDResponse()
+    else:
+        r = cmd(messages)
+    r.time = t
+    return r
+
+
+def pack(op, tag, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError("Payload too large: %d bytes" % len(payload))
+    return HEADER.pack(op, tag, len(payload)) + payload
+
+
+def recv_exactly(sock, n):
+    """ reads exactly n bytes, or returns None if the socket closed """
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_packet(sock):
+    """ returns (op, tag, payload), or None if the socket closed """
+    header = recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    op, tag, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise socket.error("Oversized packet: %d bytes" % length)
+    payload = recv_exactly(sock, length) if length else b""
+    if payload is None:
+        return None
+    return op, tag, payload
+
+
+class _Client(object):
+    """
+        the daemon's handle on one connected client. Packets are queued,
+        and written to the socket by the client's own writer thread
+    """
+
+    def __init__(self, sock, max_queue):
+        self.sock = sock
+        self.watching = set()
+        self.closed = False
+        self.__queue = queue.Queue(max_queue)
+        self.__writer = threading.Thread(target=self.__write)
+        self.__writer.daemon = True
+        self.__writer.start()
+
+    def send(self, packet):
+        """ queues a packet, without blocking. Returns False if the client was too far behind """
+        if self.closed:
+            return False
+        try:
+            self.__queue.put_nowait(packet)
+        except queue.Full:
+            logger.warning("OBD daemon client fell too far behind, disconnecting it")
+            self.close()
+            return False
+        return True
+
+    def __write(self):
+        while True:
+            packet = self.__queue.get()
+            if packet is None or self.closed:
+                break
+            try:
+                self.sock.sendall(packet)
+            except socket.error as e:
+                logger.debug("failed to write to client: %s" % str(e))
+                self.close()
+                break
+
+    def close(self):
+        """ disconnects the client. Its handler thread notices, and drops it """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        try:
+            self.__queue.put_nowait(None)  # wake the writer
+        except queue.Full:
+            pass  # the writer stops on its next packet, as closed is set
+
+
+class OBDDaemon(object):
+    """
+        Serves an Async connection to local clients over a Unix socket.
+
+        The watch sets of all clients are merged into the single polling
+        loop of the Async connection, and each new value is encoded once
+        and pushed to every client that watches it.
+    """
+
+    def __init__(self, connection, path=DEFAULT_SOCKET_PATH, max_age=0.5, max_queue=256):
+        self.connection = connection  # an obd.Async object
+        self.path = path
+        self.max_age = max_age  # seconds a one-off query is served from cache
+        self.max_queue = max_queue  # packets a client may fall behind before it's dropped
+        self.__server = None
+        self.__thread = None
+        self.__running = False
+        self.__clients = set()
+        self.__watchers = {}  # key = OBDCommand, value = set of _Clients
+        self.__cache = {}  # key = OBDCommand, value = (OBDResponse, encoded payload)
+        self.__lock = threading.RLock()  # guards the watch sets and the connection
+
+    @property
+    def running(self):
+        return self.__running
+
+    def start(self):
+        """ binds the socket, and starts accepting clients """
+        if self.__thread is not None:
+            return
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a previous run
+
+        self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__server.bind(self.path)
+        self.__server.listen(16)
+
+        logger.info("OBD daemon listening on %s" % self.path)
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__accept)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        """ disconnects all clients, and closes the socket """
+        if self.__thread is None:
+            return
+
+        logger.info("Stopping OBD daemon...")
+        self.__running = False
+        try:
+            # unblock accept()
+            self.__server.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.__server.close()
+        self.__thread.join()
+        self.__thread = None
+
+        for client in list(self.__clients):
+            self.__drop(client)
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def serve_forever(self):
+        """ blocking variant of start(), for use as a standalone process """
+        self.start()
+        try:
+            while self.__running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __accept(self):
+        while self.__running:
+            try:
+                sock, _ = self.__server.accept()
+            except socket.error:
+                break  # socket was closed by stop()
+
+            client = _Client(sock, self.max_queue)
+            self.__clients.add(client)
+            t = threading.Thread(target=self.__handle, args=(client,))
+            t.daemon = True
+            t.start()
+
+    def __handle(self, client):
+        """ per-client request loop """
+        try:
+            while self.__running:
+                packet = recv_packet(client.sock)
+                if packet is None:
+                    break
+
+                op, tag, payload = packet
+                name = payload.decode("utf-8", "ignore")
+
+                if not commands.has_name(name):
+                    client.send(pack(OP_ERROR, tag, b"unknown command"))
+                    continue
+
+                cmd = commands[name]
+
+                if op == OP_QUERY:
+                    try:
+                        client.send(pack(OP_RESPONSE, tag, self.__query(cmd)))
+                    except ValueError as e:
+                        client.send(pack(OP_ERROR, tag, str(e).encode("utf-8")))
+                elif op == OP_WATCH:
+                    if self.__watch(client, cmd):
+                        client.send(pack(OP_OK, tag))
+                    else:
+                        client.send(pack(OP_ERROR, tag, b"unsupported command"))
+                elif op == OP_UNWATCH:
+                    self.__unwatch(client, cmd)
+                    client.send(pack(OP_OK, tag))
+                else:
+                    client.send(pack(OP_ERROR, tag, b"unknown operation"))
+        except socket.error as e:
+            logger.debug("client connection failed: %s" % str(e))
+        finally:
+            self.__drop(client)
+
+    def __drop(self, client):
+        for cmd in list(client.watching):
+            self.__unwatch(client, cmd)
+        self.__clients.discard(client)
+        client.close()
+        try:
+            client.sock.close()
+        except socket.error:
+            pass
+
+    def __query(self, cmd):
+        """ returns the encoded latest value for a command """
+        with self.__lock:
+            cached = self.__cache.get(cmd)
+
+            # watched commands are always kept fresh by the Async loop
+            if cmd in self.__watchers:
+                if cached is not None:
+                    return cached[1]
+                return encode_response(self.connection.query(cmd))
+
+            if cached is not None and (time.time() - cached[0].time) < self.max_age:
+                return cached[1]
+
+            # a one-off read: borrow the serial port from the Async loop
+            with self.connection.paused():
+                r = OBD.query(self.connection, cmd)
+
+            payload = encode_response(r)
+            self.__cache[cmd] = (r, payload)
+            return payload
+
+    def __watch(self, client, cmd):
+        with self.__lock:
+            if cmd not in self.__watchers:
+                if not self.connection.test_cmd(cmd):
+                    return False
+
+                with self.connection.paused():
+                    self.connection.watch(cmd, callback=self.__publish)
+                self.__watchers[cmd] = set()
+
+                if not self.connection.running:
+                    self.connection.start()
+
+            self.__watchers[cmd].add(client)
+            client.watching.add(cmd)
+            return True
+
+    def __unwatch(self, client, cmd):
+        with self.__lock:
+            client.watching.discard(cmd)
+            clients = self.__watchers.get(cmd)
+            if clients is None:
+                return
+
+            clients.discard(client)
+            if not clients:
+                # nobody is left watching, drop it from the polling loop
+                del self.__watchers[cmd]
+                self.__cache.pop(cmd, None)
+                with self.connection.paused():
+                    self.connection.unwatch(cmd, callback=self.__publish)
+
+    def __publish(self, r):
+        """ Async callback: encode the new value once, push it to all watchers """
+        cmd = r.command
+        if cmd is None:
+            return
+
+        try:
+            payload = encode_response(r)
+            packet = pack(OP_RESPONSE, 0, cmd.name.encode("utf-8") + b"\x00" + payload)
+        except ValueError as e:
+            logger.warning("Can't push '%s': %s" % (cmd.name, str(e)))
+            return
+        self.__cache[cmd] = (r, payload)
+
+        # only queues the packet, so a slow client can't hold up the polling loop
+        for client in list(self.__watchers.get(cmd, ())):
+            client.send(packet)
+
+
+class OBDClient(object):
+    """
+        Connection to an OBDDaemon, with an API resembling Async.
+
+        Watched commands are pushed by the daemon, so query() returns
+        their latest values without a round trip.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, timeout=5.0):
+        self.timeout = timeout
+        self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__sock.connect(path)
+        self.__send_lock = threading.Lock()
+        self.__tag = 0
+        self.__pending = {}  # key = tag, value = [Event, reply]
+        self.__latest = {}  # key = OBDCommand, value = OBDResponse
+        self.__callbacks = {}  # key = OBDCommand, value = list of Functions
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__read)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def close(self):
+        self.__running = False
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.__sock.close()
+        self.__thread.join()
+
+    def watch(self, c, callback=None):
+        """ Subscribes the given command, optionally with a callback """
+        if c not in self.__latest:
+            op, payload = self.__request(OP_WATCH, c)
+            if op != OP_OK:
+                logger.warning("Daemon refused to watch '%s': %s" %
+                               (str(c), payload.decode("utf-8", "ignore")))
+                return
+            self.__latest[c] = OBDResponse()
+            self.__callbacks[c] = []
+
+        if hasattr(callback, "__call__") and (callback not in self.__callbacks[c]):
+            self.__callbacks[c].append(callback)
+
+    def unwatch(self, c, callback=None):
+        """ Unsubscribes a command (or only one of its callbacks) """
+        if c not in self.__latest:
+            return
+
+        if hasattr(callback, "__call__") and (callback in self.__callbacks[c]):
+            self.__callbacks[c].remove(callback)
+            if self.__callbacks[c]:
+                return
+
+        self.__latest.pop(c, None)
+        self.__callbacks.pop(c, None)
+        self.__request(OP_UNWATCH, c)
+
+    def query(self, c):
+        """ latest value of a command; watched commands don't hit the socket """
+        if c in self.__latest:
+            return self.__latest[c]
+
+        op, payload = self.__request(OP_QUERY, c)
+        if op != OP_RESPONSE:
+            return OBDResponse()
+        return decode_response(c, payload)
+
+    def __request(self, op, c):
+        with self.__send_lock:
+            self.__tag = (self.__tag % 0xFFFF) + 1  # tag 0 is reserved for pushes
+            tag = self.__tag
+            slot = [threading.Event(), None]
+            self.__pending[tag] = slot
+            self.__sock.sendall(pack(op, tag, c.name.encode("utf-8")))
+
+        if not slot[0].wait(self.timeout):
+            self.__pending.pop(tag, None)
+            logger.warning("Timed out waiting for the OBD daemon")
+            return OP_ERROR, b"timeout"
+
+        return slot[1]
+
+    def __read(self):
+        while self.__running:
+            try:
+                packet = recv_packet(self.__sock)
+            except socket.error:
+                packet = None
+
+            if packet is None:
+                break
+
+            op, tag, payload = packet
+
+            if tag == 0:
+                # pushed update: "<name>\0<response>"
+                name, _, payload = payload.partition(b"\x00")
+                c = commands[name.decode("utf-8")]
+                if c not in self.__latest:
+                    continue
+                r = decode_response(c, payload)
+                self.__latest[c] = r
+                for callback in self.__callbacks.get(c, ()):
+                    callback(r)
+            else:
+                slot = self.__pending.pop(tag, None)
+                if slot is not None:
+                    slot[1] = (op, payload)
+                    slot[0].set()
+
+        # wake anybody still waiting on a reply
+        for slot in list(self.__pending.values()):
+            slot[1] = (OP_ERROR, b"disconnected")
+            slot[0].set()
+        self.__pending.clear()
+
+
+if __name__ == "__main__":
+    import sys
+    from .asynchronous import Async
+
+    port = sys.argv[1] if len(sys.argv) > 1 else None
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOCKET_PATH
+    OBDDaemon(Async(port, delay_cmds=0), path).serve_forever()
@@ -34,8 +34,9 @@ import math
 import functools
 from .utils import *
 from .codes import *
-from .OBDResponse import Status, StatusTest, Monitor, MonitorTest
-from .UnitsAndScaling import Unit, UAS_IDS
+from .dtc import dtc_code
+from .OBDResponse import Status, Monitor, MonitorTest
+from .UnitsAndScaling import Unit, UAS, UAS_IDS
 
 import logging
 
@@ -81,7 +82,46 @@ Unit/Scaling in that table, simply to avoid redundant code.
 
 def uas(id_):
     """ get the corresponding decoder for this UAS ID """
-    return functools.partial(decode_uas, id_=id_)
+    if not isinstance(UAS_IDS[id_], UAS):
+        # non-numeric conversions (0x2E) keep the generic path
+        return functools.partial(decode_uas, id_=id_)
+    return UASDecoder(id_)
+
+
+class UASDecoder(object):
+    """
+        Decoder for a numeric UAS ID
+
+        The signedness, scale, offset and unit of the UAS entry are looked
+        up once, when the command tables are loaded, rather than on every
+        call. Like the quantity() decoders, the plain number decoder is
+        kept as .raw, and the unit name as .unit. Pickles by its UAS ID.
+    """
+
+    def __init__(self, id_):
+        conversion = UAS_IDS[id_]
+        self.uas_id = id_
+        self.unit = conversion.unit
+        self.__name__ = "uas_0x%02X" % id_
+        self.raw = functools.partial(uas_raw, conversion.signed, conversion.scale, conversion.offset)
+        self.__pint = None  # Quantity class and resolved unit, cached on first use
+
+    def __call__(self, messages):
+        v = self.raw(messages)
+        if self.__pint is None:
+            self.__pint = (Unit.Quantity, Unit.Unit(self.unit))
+        return self.__pint[0](v, self.__pint[1])
+
+    def __reduce__(self):
+        return (UASDecoder, (self.uas_id,))
+
+    def __repr__(self):
+        return "<UASDecoder 0x%02X>" % self.uas_id
+
+
+def uas_raw(signed, scale, offset, messages, from_bytes=int.from_bytes):
+    v = from_bytes(messages[0].data[2:], "big", signed=signed)
+    return v * scale + offset
 
 
 def decode_uas(messages, id_):
@@ -89,134 +129,181 @@ def decode_uas(messages, id_):
     return UAS_IDS[id_](d)
 
 
+"""
+Numeric decoders compute a plain number, which is wrapped in a pint
+Quantity of the given unit. The plain number decoder is kept as
+<decoder>.raw, and the unit name as <decoder>.unit, for connections
+in raw mode (see OBDCommand.__call__).
+"""
+
+
+def quantity(unit):
+    """
+        decorator for decoders that return a plain number in the given unit
+        (the unit name as printed by pint, which is only loaded when a
+        Quantity is first built)
+    """
+    def wrap(raw):
+        pint = []  # Quantity class and resolved unit, cached on first use
+
+        @functools.wraps(raw)
+        def decoder(messages):
+            v = raw(messages)
+            if v is None:
+                return None
+            if not pint:
+                pint[:] = [Unit.Quantity, Unit.Unit(unit)]
+            return pint[0](v, pint[1])
+        decoder.raw = raw
+        decoder.unit = unit
+        return decoder
+    return wrap
+
+
 """
 General sensor decoders
-Return pint Quantities
+Return pint Quantities (see quantity() above)
 """
 
+@quantity("count")
 def count(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
-    return v * Unit.count
+    return v
 
 # 0 to 100 %
+@quantity("percent")
 def percent(messages):
     d = messages[0].data[2:]
     v = d[0]
     v = v * 100.0 / 255.0
-    return v * Unit.percent
+    return v
 
 
 # -100 to 100 %
+@quantity("percent")
 def percent_centered(messages):
     d = messages[0].data[2:]
     v = d[0]
     v = (v - 128) * 100.0 / 128.0
-    return v * Unit.percent
+    return v
 
 
 # -40 to 215 C
+@quantity("degree_Celsius")
 def temp(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v = v - 40
-    return Unit.Quantity(v, Unit.celsius)  # non-multiplicative unit
+    return v
 
 
 # -128 to 128 mA
+@quantity("milliampere")
 def current_centered(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d[2:4])
     v = (v / 256.0) - 128
-    return v * Unit.milliampere
+    return v
 
 
 # 0 to 1.275 volts
+@quantity("volt")
 def sensor_voltage(messages):
     d = messages[0].data[2:]
     v = d[0] / 200.0
-    return v * Unit.volt
+    return v
 
 
 # 0 to 8 volts
+@quantity("volt")
 def sensor_voltage_big(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d[2:4])
     v = (v * 8.0) / 65535
-    return v * Unit.volt
+    return v
 
 
 # 0 to 765 kPa
+@quantity("kilopascal")
 def fuel_pressure(messages):
     d = messages[0].data[2:]
     v = d[0]
     v = v * 3
-    return v * Unit.kilopascal
+    return v
 
 
 # 0 to 255 kPa
+@quantity("kilopascal")
 def pressure(messages):
     d = messages[0].data[2:]
     v = d[0]
-    return v * Unit.kilopascal
+    return v
 
 
 # -8192 to 8192 Pa
+@quantity("pascal")
 def evap_pressure(messages):
     # decode the twos complement
     d = messages[0].data[2:]
     a = twos_comp(d[0], 8)
     b = twos_comp(d[1], 8)
     v = ((a * 256.0) + b) / 4.0
-    return v * Unit.pascal
+    return v
 
 
 # 0 to 327.675 kPa
+@quantity("kilopascal")
 def abs_evap_pressure(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v = v / 200.0
-    return v * Unit.kilopascal
+    return v
 
 
 # -32767 to 32768 Pa
+@quantity("pascal")
 def evap_pressure_alt(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v = v - 32767
-    return v * Unit.pascal
+    return v
 
 
 # -64 to 63.5 degrees
+@quantity("degree")
 def timing_advance(messages):
     d = messages[0].data[2:]
     v = d[0]
     v = (v - 128) / 2.0
-    return v * Unit.degree
+    return v
 
 
 # -210 to 301 degrees
+@quantity("degree")
 def inject_timing(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v = (v - 26880) / 128.0
-    return v * Unit.degree
+    return v
 
 
 # 0 to 2550 grams/sec
+@quantity("gps")
 def max_maf(messages):
     d = messages[0].data[2:]
     v = d[0]
     v = v * 10
-    return v * Unit.gps
+    return v
 
 
 # 0 to 3212 Liters/hour
+@quantity("lph")
 def fuel_rate(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v = v * 0.05
-    return v * Unit.liters_per_hour
+    return v
 
 
 # special bit encoding for PID 13
@@ -249,13 +336,15 @@ def o2_sensors_alt(messages):
 
 
 # 0 to 25700 %
+@quantity("percent")
 def absolute_load(messages):
     d = messages[0].data[2:]
     v = bytes_to_int(d)
     v *= 100.0 / 255.0
-    return v * Unit.percent
+    return v
 
 
+@quantity("volt")
 def elm_voltage(messages):
     # doesn't register as a normal OBD response,
     # so access the raw frame data
@@ -265,7 +354,7 @@ def elm_voltage(messages):
     v = v.replace('v', '')
 
     try:
-        return float(v) * Unit.volt
+        return float(v)
     except ValueError:
         logger.warning("Failed to parse ELM voltage")
         return None
@@ -292,30 +381,8 @@ def status(messages):
     #  10000011 00000111 11111111 00000000
     #   [# DTC] X        [supprt] [~ready]
 
-    output = Status()
-    output.MIL = bits[0]
-    output.DTC_count = bits.value(1, 8)
-    output.ignition_type = IGNITION_TYPE[int(bits[12])]
-
-    # load the 3 base tests that are always present
-    for i, name in enumerate(BASE_TESTS[::-1]):
-        t = StatusTest(name, bits[13 + i], not bits[9 + i])
-        output.__dict__[name] = t
-
-    # different tests for different ignition types
-    if bits[12]:  # compression
-        for i, name in enumerate(COMPRESSION_TESTS[::-1]):  # reverse to correct for bit vs. indexing order
-            t = StatusTest(name, bits[(2 * 8) + i],
-                           not bits[(3 * 8) + i])
-            output.__dict__[name] = t
-
-    else:  # spark
-        for i, name in enumerate(SPARK_TESTS[::-1]):  # reverse to correct for bit vs. indexing order
-            t = StatusTest(name, bits[(2 * 8) + i],
-                           not bits[(3 * 8) + i])
-            output.__dict__[name] = t
-
-    return output
+    # the tests are only built from the bits when they're looked up
+    return Status(bits)
 
 
 def fuel_status(messages):
@@ -402,9 +469,7 @@ def parse_dtc(_bytes):
     #         | / /
     # DTC:    C0123
 
-    dtc = ['P', 'C', 'B', 'U'][_bytes[0] >> 6]  # the last 2 bits of the first byte
-    dtc += str((_bytes[0] >> 4) & 0b0011)  # the next pair of 2 bits. Mask off the bits we read above
-    dtc += bytes_to_hex(_bytes)[1:4]
+    dtc = dtc_code((_bytes[0] << 8) | _bytes[1])  # precomputed for all 65,536 byte pairs
 
     # pull a description if we have one
     return (dtc, DTC.get(dtc, ""))
@@ -436,7 +501,7 @@ def dtc(messages):
     return codes
 
 
-def parse_monitor_test(d, mon):
+def parse_monitor_test(d):
     test = MonitorTest()
 
     tid = d[1]
@@ -471,7 +536,6 @@ def monitor(messages):
     # even though we never use the MID byte, it may
     # show up multiple times. Thus, keeping it make
     # for easier parsing.
-    mon = Monitor()
 
     # test that we got the right number of bytes
     extra_bytes = len(d) % 9
@@ -480,14 +544,9 @@ def monitor(messages):
         logger.debug("Encountered monitor message with non-multiple of 9 bytes. Truncating...")
         d = d[:len(d) - extra_bytes]
 
-    # look at data in blocks of 9 bytes (one test result)
-    for n in range(0, len(d), 9):
-        # extract the 9 byte block, and parse a new MonitorTest
-        test = parse_monitor_test(d[n:n + 9], mon)
-        if test is not None:
-            mon.add_test(test)
-
-    return mon
+    # the blocks of 9 bytes (one test result each) are
+    # parsed into MonitorTests when they're looked up
+    return Monitor(d, parse_monitor_test)
 
 
 def encoded_string(length):
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#                                                                      #
+# python-OBD: A python OBD-II serial module derived from pyobd         #
+#                                                                      #
+# Copyright 2004 Donour Sizemore (donour@uchicago.edu)                 #
+# Copyright 2009 Secons Ltd. (www.obdtester.com)                       #
+# Copyright 2009 Peter J. Creath                                       #
+# Copyright 2016 Brendan Whitfield (brendan-w.com)                     #
+#                                                                      #
+########################################################################
+#                                                                      #
+# dtc.py                                                               #
+#                                                                      #
+# This file is part of python-OBD (a derivative of pyOBD)              #
+#                                                                      #
+# python-OBD is free software: you can redistribute it and/or modify   #
+# it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation, either version 2 of the License, or    #
+# (at your option) any later version.                                  #
+#                                                                      #
+# python-OBD is distributed in the hope that it will be useful,        #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+# GNU General Public License for more details.                         #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with python-OBD.  If not, see <http://www.gnu.org/licenses/>.  #
+#                                                                      #
+########################################################################
+
+"""
+
+Diagnostic Trouble Code lookups
+
+DTC descriptions are kept on disk as a sorted, tab separated text file
+(code, description), which is memory mapped the first time a code is
+looked up, and binary searched in place. Nothing is parsed at import,
+and only the pages of the file that are actually searched are loaded.
+
+Manufacturer specific descriptions can be layered on top of the
+standard table with DTCTable.add_pack(), using the same file format.
+
+"""
+
+import logging
+import mmap
+import os
+import threading
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # python 2
+    from collections import Mapping
+
+logger = logging.getLogger(__name__)
+
+STANDARD_TABLE = os.path.join(os.path.dirname(__file__), "data", "dtc.tsv")
+
+
+# -------------------------- DTC bytes --> code --------------------------
+
+# first byte: category letter, second digit and the first hex digit
+_FIRST = ["PCBU"[b >> 6] + str((b >> 4) & 0b0011) + "%X" % (b & 0x0F) for b in range(256)]
+# second byte: the last two hex digits
+_SECOND = ["%02X" % b for b in range(256)]
+
+_CODES = None  # all 65,536 codes, built on first use
+
+
+def dtc_code(value):
+    """ converts the two DTC bytes (as a 16 bit integer) into a code string """
+    global _CODES
+    if _CODES is None:
+        _CODES = [f + s for f in _FIRST for s in _SECOND]
+    return _CODES[value]
+
+
+# --------------------------- descriptions ---------------------------
+
+
+class _TableFile(object):
+    """ a sorted code/description file, memory mapped and searched on demand """
+
+    def __init__(self, path):
+        self.path = path
+        self.__map = None
+        self.__lock = threading.Lock()
+
+    def __data(self):
+        if self.__map is None:
+            with self.__lock:
+                if self.__map is None:
+                    with open(self.path, "rb") as f:
+                        if os.fstat(f.fileno()).st_size == 0:
+                            self.__map = b""
+                        else:
+                            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.__map
+
+    def get(self, code):
+        """ binary search for the line starting with the given code """
+        data = self.__data()
+        key = code.encode("ascii")
+        lo = 0
+        hi = len(data)
+
+        # lo and hi always sit on line boundaries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", lo, mid) + 1 or lo
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+
+            line_code = data[start:start + len(key)]
+            if line_code == key:
+                return data[start + len(key) + 1:end].decode("utf-8")
+            elif line_code < key:
+                lo = end + 1
+            else:
+                hi = start
+
+        return None
+
+    def __iter__(self):
+        """ iterates over (code, description) pairs """
+        for line in self.__data()[:].decode("utf-8").splitlines():
+            if line:
+                code, _, desc = line.partition("\t")
+                yield code, desc
+
+
+class DTCTable(Mapping):
+    """
+        Read-only mapping of DTC code strings to descriptions, backed by
+        the on-disk table and any manufacturer packs that were added.
+    """
+
+    def __init__(self, path=STANDARD_TABLE):
+        self.__tables = [_TableFile(path)]
+
+    def add_pack(self, path):
+        """
+            adds a manufacturer specific table, which takes
+            priority over the standard descriptions
+        """
+        if not os.path.isfile(path):
+            raise IOError("No DTC pack found at %s" % path)
+        self.__tables.insert(0, _TableFile(path))
+        logger.info("Loaded DTC pack: %s" % path)
+
+    def __getitem__(self, code):
+        if len(code) == 5:
+            for table in self.__tables:
+                desc = table.get(code)
+                if desc is not None:
+                    return desc
+        raise KeyError(code)
+
+    def __contains__(self, code):
+        try:
+            self[code]
+            return True
+        except (KeyError, TypeError):
+            return False
+
+    def __iter__(self):
+        seen = set()
+        for table in self.__tables:
+            for code, _ in table:
+                if code not in seen:
+                    seen.add(code)
+                    yield code
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def write_table(descriptions, path):
+    """ writes a {code: description} dict in the table format, for use as a pack """
+    with open(path, "wb") as f:
+        for code in sorted(descriptions):
+            f.write(("%s\t%s\n" % (code, descriptions[code])).encode("utf-8"))
@@ -462,17 +462,20 @@ class ELM327:
         if self.__low_power == True:
             self.normal_power()
 
-        lines = self.__send(cmd)
-        messages = self.__protocol(lines)
+        # frames are parsed as their lines arrive, rather than after the prompt
+        stream = self.__protocol.stream()
+        self.__send(cmd, stream=stream)
+        messages = stream.finish()
         return messages
 
-    def __send(self, cmd, delay=None):
+    def __send(self, cmd, delay=None, stream=None):
         """
             unprotected send() function
 
             will __write() the given string, no questions asked.
             returns result of __read() (a list of line strings)
-            after an optional delay.
+            after an optional delay. Lines are also fed to the
+            optional ProtocolStream as they arrive.
         """
         self.__write(cmd)
 
@@ -482,13 +485,13 @@ class ELM327:
             time.sleep(delay)
             delayed += delay
 
-        r = self.__read()
+        r = self.__read(stream)
         while delayed < 1.0 and len(r) <= 0:
             d = 0.1
             logger.debug("no response; wait: %f seconds" % d)
             time.sleep(d)
             delayed += d
-            r = self.__read()
+            r = self.__read(stream)
         return r
 
     def __write(self, cmd):
@@ -512,18 +515,23 @@ class ELM327:
         else:
             logger.info("cannot perform __write() when unconnected")
 
-    def __read(self):
+    def __read(self, stream=None):
         """
             "low-level" read function
 
             accumulates characters until the prompt character is seen
             returns a list of [/r/n] delimited strings
+
+            complete lines are handed to the optional stream
+            as soon as they are received
         """
         if not self.__port:
             logger.info("cannot perform __read() when unconnected")
             return []
 
         buffer = bytearray()
+        lines = []
+        start = 0  # the first byte of the buffer not yet split into lines
 
         while True:
             # retrieve as much data as possible
@@ -543,6 +551,12 @@ class ELM327:
 
             buffer.extend(data)
 
+            # pass on any lines that are already complete
+            end = max(buffer.rfind(b"\r", start), buffer.rfind(b"\n", start))
+            if end >= start:
+                self.__split_lines(buffer[start:end], lines, stream)
+                start = end + 1
+
             # end on chevron (ELM prompt character) or an 'OK' which
             # indicates we are entering low power state
             if self.ELM_PROMPT in buffer or self.ELM_LP_ACTIVE in buffer:
@@ -552,16 +566,25 @@ class ELM327:
         logger.debug("read: " + repr(buffer)[10:-1])
 
         # clean out any null characters
-        buffer = re.sub(b"\x00", b"", buffer)
+        tail = re.sub(b"\x00", b"", buffer[start:])
 
         # remove the prompt character
-        if buffer.endswith(self.ELM_PROMPT):
-            buffer = buffer[:-1]
+        if tail.endswith(self.ELM_PROMPT):
+            tail = tail[:-1]
 
-        # convert bytes into a standard string
-        string = buffer.decode("utf-8", "ignore")
+        self.__split_lines(tail, lines, stream)
+        return lines
 
-        # splits into lines while removing empty lines and trailing spaces
-        lines = [s.strip() for s in re.split("[\r\n]", string) if bool(s)]
+    def __split_lines(self, buffer, lines, stream):
+        """ splits bytes into lines, appending them to the given list (and stream) """
 
-        return lines
+        # clean out any null characters, and convert into a standard string
+        string = re.sub(b"\x00", b"", buffer).decode("utf-8", "ignore")
+
+        # splits into lines while removing empty lines and trailing spaces
+        for s in re.split("[\r\n]", string):
+            if s:
+                s = s.strip()
+                lines.append(s)
+                if stream is not None:
+                    stream.feed(s)
@@ -38,6 +38,7 @@ from .__version__ import __version__
 from .commands import commands
 from .elm327 import ELM327
 from .protocols import ECU_HEADER
+from .supported import SupportedCommands
 from .utils import scan_serial, OBDStatus
 
 logger = logging.getLogger(__name__)
@@ -50,14 +51,18 @@ class OBD(object):
     """
 
     def __init__(self, portstr=None, baudrate=None, protocol=None, fast=True,
-                 timeout=0.1, check_voltage=True, start_low_power=False):
+                 timeout=0.1, check_voltage=True, start_low_power=False,
+                 raw=False, decode_cache=None):
         self.interface = None
-        self.supported_commands = set(commands.base_commands())
+        self.supported_commands = SupportedCommands(commands.base_commands())
         self.fast = fast  # global switch for disabling optimizations
+        self.raw = raw  # decode numeric values to plain numbers, rather than pint Quantities
+        self.decode_cache = decode_cache  # optional DecodeCache, shared by repeated payloads
         self.timeout = timeout
         self.__last_command = b""  # used for running the previous command with a CR
         self.__last_header = ECU_HEADER.ENGINE  # for comparing with the previously used header
         self.__frame_counts = {}  # keeps track of the number of return frames for each command
+        self.__fast_commands = {}  # command strings with their frame counts, built once
 
         logger.info("======================= python-OBD (v%s) =======================" % __version__)
         self.__connect(portstr, baudrate, protocol,
@@ -125,19 +130,12 @@ class OBD(object):
                 logger.info("No valid data for PID listing command: %s" % get)
                 continue
 
-            # loop through PIDs bit-array
-            for i, bit in enumerate(response.value):
-                if bit:
+            # the PIDs bit-array is merged straight into the bitsets
+            self.supported_commands.add_bitmap(get.mode, get.pid, response.value)
 
-                    mode = get.mode
-                    pid = get.pid + i + 1
-
-                    if commands.has_pid(mode, pid):
-                        self.supported_commands.add(commands[mode][pid])
-
-                    # set support for mode 2 commands
-                    if mode == 1 and commands.has_pid(2, pid):
-                        self.supported_commands.add(commands[2][pid])
+            # set support for mode 2 commands
+            if get.mode == 1:
+                self.supported_commands.add_bitmap(2, get.pid, response.value)
 
         logger.info("finished querying with %d commands supported" % len(self.supported_commands))
 
@@ -158,7 +156,7 @@ class OBD(object):
             Closes the connection, and clears supported_commands
         """
 
-        self.supported_commands = set()
+        self.supported_commands = SupportedCommands()
 
         if self.interface is not None:
             logger.info("Closing connection")
@@ -276,7 +274,7 @@ class OBD(object):
 
         self.__set_header(cmd.header)
 
-        logger.info("Sending command: %s" % str(cmd))
+        logger.info("Sending command: %s", cmd)
         cmd_string = self.__build_command_string(cmd)
         messages = self.interface.send_and_parse(cmd_string)
 
@@ -295,7 +293,11 @@ class OBD(object):
             logger.info("No valid OBD Messages returned")
             return OBDResponse()
 
-        return cmd(messages)  # compute a response object
+        return self._response(cmd, messages)  # compute a response object
+
+    def _response(self, cmd, messages):
+        """ builds the response object, overridden by Async for pooling """
+        return cmd(messages, raw=self.raw, cache=self.decode_cache)
 
     def __build_command_string(self, cmd):
         """ assembles the appropriate command string """
@@ -305,7 +307,9 @@ class OBD(object):
         # only wait for exactly that number. This avoids some harsh
         # timeouts from the ELM, thus speeding up queries.
         if self.fast and cmd.fast and (cmd in self.__frame_counts):
-            cmd_string += str(self.__frame_counts[cmd]).encode()
+            if cmd not in self.__fast_commands:
+                self.__fast_commands[cmd] = cmd_string + str(self.__frame_counts[cmd]).encode()
+            cmd_string = self.__fast_commands[cmd]
 
         # if we sent this last time, just send a CR
         # (CR is added by the ELM327 class)
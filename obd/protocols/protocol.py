@@ -64,6 +64,9 @@ class ECU:
 class Frame(object):
     """ represents a single parsed line of OBD output """
 
+    __slots__ = ("raw", "data", "priority", "addr_mode", "rx_id",
+                 "tx_id", "type", "seq_index", "data_len")
+
     def __init__(self, raw):
         self.raw = raw
         self.data = bytearray()
@@ -79,6 +82,8 @@ class Frame(object):
 class Message(object):
     """ represents a fully parsed OBD message of one or more Frames (lines) """
 
+    __slots__ = ("frames", "ecu", "data")
+
     def __init__(self, frames):
         self.frames = frames
         self.ecu = ECU.UNKNOWN
@@ -112,6 +117,78 @@ class Message(object):
             return False
 
 
+class ProtocolStream(object):
+    """
+        Incremental form of Protocol.__call__()
+
+        Lines are fed in one at a time with feed(), and turned into Frames
+        immediately. finish() assembles the Frames into Messages.
+    """
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.frames_by_ECU = {}  # frames_by_ECU[tx_id] = [Frame, Frame]
+        self.non_obd_lines = []
+
+    def feed(self, line):
+        """ accepts a single raw string from the car """
+
+        # Non-hex (non-OBD) lines shouldn't go through the big parsers,
+        # since they are typically messages such as: "NO DATA", "CAN ERROR",
+        # "UNABLE TO CONNECT", etc, so set them aside
+        line_no_spaces = line.replace(' ', '')
+
+        if not isHex(line_no_spaces):
+            self.non_obd_lines.append(line)  # keep the original, un-scrubbed line
+            return
+
+        frame = Frame(line_no_spaces)
+
+        # subclass function to parse the lines into Frames
+        # drop frames that couldn't be parsed
+        if self.protocol.parse_frame(frame):
+            self.add_frame(frame)
+
+    def add_frame(self, frame):
+        """ group frames by transmitting ECU """
+        if frame.tx_id not in self.frames_by_ECU:
+            self.frames_by_ECU[frame.tx_id] = [frame]
+        else:
+            self.frames_by_ECU[frame.tx_id].append(frame)
+
+    def parse_message(self, tx_id, message):
+        """ assembles the frames of a single ECU, override to reuse earlier work """
+        return self.protocol.parse_message(message)
+
+    def finish(self):
+        """ returns the list of Messages for all lines fed so far """
+
+        # ---------------------- handle valid OBD lines ----------------------
+
+        # parse frames into whole messages
+        messages = []
+        for ecu in sorted(self.frames_by_ECU.keys()):
+
+            # new message object with a copy of the raw data
+            # and frames addressed for this ecu
+            message = Message(self.frames_by_ECU[ecu])
+
+            # subclass function to assemble frames into Messages
+            if self.parse_message(ecu, message):
+                # mark with the appropriate ECU ID
+                message.ecu = self.protocol.ecu_map.get(ecu, ECU.UNKNOWN)
+                messages.append(message)
+
+        # ----------- handle invalid lines (probably from the ELM) -----------
+
+        for line in self.non_obd_lines:
+            # give each line its own message object
+            # messages are ECU.UNKNOWN by default
+            messages.append(Message([Frame(line)]))
+
+        return messages
+
+
 """
 
 Protocol objects are factories for Frame and Message objects. They are
@@ -172,68 +249,17 @@ class Protocol(object):
 
             accepts a list of raw strings from the car, split by lines
         """
-
-        # ---------------------------- preprocess ----------------------------
-
-        # Non-hex (non-OBD) lines shouldn't go through the big parsers,
-        # since they are typically messages such as: "NO DATA", "CAN ERROR",
-        # "UNABLE TO CONNECT", etc, so sort them into these two lists:
-        obd_lines = []
-        non_obd_lines = []
-
+        stream = self.stream()
         for line in lines:
+            stream.feed(line)
+        return stream.finish()
 
-            line_no_spaces = line.replace(' ', '')
-
-            if isHex(line_no_spaces):
-                obd_lines.append(line_no_spaces)
-            else:
-                non_obd_lines.append(line)  # pass the original, un-scrubbed line
-
-        # ---------------------- handle valid OBD lines ----------------------
-
-        # parse each frame (each line)
-        frames = []
-        for line in obd_lines:
-
-            frame = Frame(line)
-
-            # subclass function to parse the lines into Frames
-            # drop frames that couldn't be parsed
-            if self.parse_frame(frame):
-                frames.append(frame)
-
-        # group frames by transmitting ECU
-        # frames_by_ECU[tx_id] = [Frame, Frame]
-        frames_by_ECU = {}
-        for frame in frames:
-            if frame.tx_id not in frames_by_ECU:
-                frames_by_ECU[frame.tx_id] = [frame]
-            else:
-                frames_by_ECU[frame.tx_id].append(frame)
-
-        # parse frames into whole messages
-        messages = []
-        for ecu in sorted(frames_by_ECU.keys()):
-
-            # new message object with a copy of the raw data
-            # and frames addressed for this ecu
-            message = Message(frames_by_ECU[ecu])
-
-            # subclass function to assemble frames into Messages
-            if self.parse_message(message):
-                # mark with the appropriate ECU ID
-                message.ecu = self.ecu_map.get(ecu, ECU.UNKNOWN)
-                messages.append(message)
-
-        # ----------- handle invalid lines (probably from the ELM) -----------
-
-        for line in non_obd_lines:
-            # give each line its own message object
-            # messages are ECU.UNKNOWN by default
-            messages.append(Message([Frame(line)]))
-
-        return messages
+    def stream(self):
+        """
+            returns a ProtocolStream, which parses lines one at a time,
+            as they are read from the adapter
+        """
+        return ProtocolStream(self)
 
     def populate_ecu_map(self, messages):
         """
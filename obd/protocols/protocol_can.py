@@ -33,8 +33,7 @@
 import logging
 from binascii import unhexlify
 
-from obd.utils import contiguous
-from .protocol import Protocol
+from .protocol import Protocol, ProtocolStream, Message
 
 logger = logging.getLogger(__name__)
 
@@ -160,7 +159,10 @@ class CANProtocol(Protocol):
 
         return True
 
-    def parse_message(self, message):
+    def stream(self):
+        return CANProtocolStream(self)
+
+    def parse_message(self, message, reassembler=None):
 
         frames = message.frames
 
@@ -178,81 +180,18 @@ class CANProtocol(Protocol):
             message.data = frame.data[1:1 + frame.data_len]
 
         else:
-            # sort FF and CF into their own lists
-
-            ff = []
-            cf = []
-
-            for f in frames:
-                if f.type == self.FRAME_TYPE_FF:
-                    ff.append(f)
-                elif f.type == self.FRAME_TYPE_CF:
-                    cf.append(f)
-                else:
-                    logger.debug("Dropping frame in multi-frame response not marked as FF or CF")
-
-            # check that we captured only one first-frame
-            if len(ff) > 1:
-                logger.debug("Recieved multiple frames marked FF")
-                return False
-            elif len(ff) == 0:
-                logger.debug("Never received frame marked FF")
-                return False
-
-            # check that there was at least one consecutive-frame
-            if len(cf) == 0:
-                logger.debug("Never received frame marked CF")
+            # multi-frame messages are normally reassembled while the lines
+            # are still arriving (see CANProtocolStream), otherwise do it now
+            if reassembler is None:
+                reassembler = IsoTpReassembler()
+                for f in frames:
+                    reassembler.add(f)
+
+            data = reassembler.result()
+            if data is None:
                 return False
 
-            # calculate proper sequence indices from the lower 4 bits given
-            for prev, curr in zip(cf, cf[1:]):
-                # Frame sequence numbers only specify the low order bits, so compute the
-                # full sequence number from the frame number and the last sequence number seen:
-                # 1) take the high order bits from the last_sn and low order bits from the frame
-                seq = (prev.seq_index & ~0x0F) + curr.seq_index
-                # 2) if this is more than 7 frames away, we probably just wrapped (e.g.,
-                # last=0x0F current=0x01 should mean 0x11, not 0x01)
-                if seq < prev.seq_index - 7:
-                    # untested
-                    seq += 0x10
-
-                curr.seq_index = seq
-
-            # sort the sequence indices
-            cf = sorted(cf, key=lambda f: f.seq_index)
-
-            # check contiguity, and that we aren't missing any frames
-            indices = [f.seq_index for f in cf]
-            if not contiguous(indices, 1, len(cf)):
-                logger.debug("Recieved multiline response with missing frames")
-                return False
-
-            # first frame:
-            #             [       Frame         ]
-            #             [PCI]                   <-- first frame has a 2 byte PCI
-            #              [L ] [     Data      ] L = length of message in bytes
-            # 00 00 07 E8 10 13 49 04 01 35 36 30
-
-            # consecutive frame:
-            #             [       Frame         ]
-            #             []                       <-- consecutive frames have a 1 byte PCI
-            #              N [       Data       ]  N = current frame number (rolls over to 0 after F)
-            # 00 00 07 E8 21 32 38 39 34 39 41 43
-            # 00 00 07 E8 22 00 00 00 00 00 00 31
-
-            # original data:
-            # [     specified message length (from first-frame)      ]
-            # 49 04 01 35 36 30 32 38 39 34 39 41 43 00 00 00 00 00 00 31
-
-            # on the first frame, skip PCI byte AND length code
-            message.data = ff[0].data[2:]
-
-            # now that they're in order, load/accumulate the data from each CF frame
-            for f in cf:
-                message.data += f.data[1:]  # chop off the PCI byte
-
-            # chop to the correct size (as specified in the first frame)
-            message.data = message.data[:ff[0].data_len]
+            message.data = data
 
         # trim DTC requests based on DTC count
         # this ISN'T in the decoder because the legacy protocols
@@ -270,6 +209,186 @@ class CANProtocol(Protocol):
         return True
 
 
+class IsoTpReassembler(object):
+    """
+        Reassembles the frames of one ECU's multi-frame (ISO-TP) message,
+        one frame at a time.
+
+        first frame:
+                    [       Frame         ]
+                    [PCI]                   <-- first frame has a 2 byte PCI
+                     [L ] [     Data      ] L = length of message in bytes
+        00 00 07 E8 10 13 49 04 01 35 36 30
+
+        consecutive frame:
+                    [       Frame         ]
+                    []                       <-- consecutive frames have a 1 byte PCI
+                     N [       Data       ]  N = current frame number (rolls over to 0 after F)
+        00 00 07 E8 21 32 38 39 34 39 41 43
+        00 00 07 E8 22 00 00 00 00 00 00 31
+
+        original data:
+        [     specified message length (from first-frame)      ]
+        49 04 01 35 36 30 32 38 39 34 39 41 43 00 00 00 00 00 00 31
+
+        The data is written straight into a buffer sized from the first
+        frame's length code. Consecutive frames land at the offset given by
+        their sequence index, so they may arrive in any order.
+    """
+
+    CF_DATA_LEN = 7  # data bytes carried by every (non-final) consecutive frame
+
+    def __init__(self):
+        self.ff = None
+        self.data = None  # preallocated once the first frame arrives
+        self.early_cf = []  # consecutive frames seen before the first frame
+        self.last_seq = None  # full sequence index of the previous CF
+        self.cf_count = 0
+        self.max_seq = 0
+        self.min_seq = None
+        self.seen = set()
+        self.filled = 0  # number of data bytes written
+        self.end = 0  # highest data offset written
+        self.multiple_ff = False
+
+    def add(self, frame):
+        """ accepts the next frame (in arrival order) """
+        if frame.type == CANProtocol.FRAME_TYPE_FF:
+            if self.ff is not None:
+                self.multiple_ff = True
+                return
+
+            self.ff = frame
+            self.data = bytearray(frame.data_len)
+
+            # on the first frame, skip PCI byte AND length code
+            self.__write(0, frame.data, 2)
+
+            for f in self.early_cf:
+                self.__write_cf(f)
+            self.early_cf = []
+
+        elif frame.type == CANProtocol.FRAME_TYPE_CF:
+            if self.last_seq is not None:
+                # Frame sequence numbers only specify the low order bits, so compute the
+                # full sequence number from the frame number and the last sequence number seen:
+                # 1) take the high order bits from the last_sn and low order bits from the frame
+                seq = (self.last_seq & ~0x0F) + frame.seq_index
+                # 2) if this is more than 7 frames away, we probably just wrapped (e.g.,
+                # last=0x0F current=0x01 should mean 0x11, not 0x01)
+                if seq < self.last_seq - 7:
+                    # untested
+                    seq += 0x10
+
+                frame.seq_index = seq
+
+            seq = frame.seq_index
+            self.last_seq = seq
+            self.cf_count += 1
+            self.max_seq = max(self.max_seq, seq)
+            self.min_seq = seq if self.min_seq is None else min(self.min_seq, seq)
+
+            self.seen.add(seq)
+
+            if self.ff is None:
+                self.early_cf.append(frame)
+            else:
+                self.__write_cf(frame)
+
+        else:
+            logger.debug("Dropping frame in multi-frame response not marked as FF or CF")
+
+    def __write_cf(self, frame):
+        offset = (len(self.ff.data) - 2) + (frame.seq_index - 1) * self.CF_DATA_LEN
+        self.__write(offset, frame.data, 1)  # chop off the PCI byte
+
+    def __write(self, offset, data, skip):
+        """ copies data[skip:] into the buffer at offset, without growing it """
+        length = len(data) - skip
+        self.end = max(self.end, offset + length)
+
+        n = min(length, len(self.data) - offset)
+        if n > 0:
+            self.data[offset:offset + n] = data[skip:skip + n]
+            self.filled += n
+
+    def contiguous(self):
+        """ checks that sequence indices 1 through N were each seen once """
+        return (self.cf_count > 0) and \
+               (len(self.seen) == self.cf_count) and \
+               (self.min_seq == 1) and \
+               (self.max_seq == self.cf_count)
+
+    @property
+    def complete(self):
+        """ whether every byte of the message has arrived """
+        return (self.ff is not None) and \
+               (not self.multiple_ff) and \
+               (self.filled >= len(self.data)) and \
+               self.contiguous()
+
+    def result(self):
+        """ returns the message data, or None if the frames were invalid """
+        # check that we captured only one first-frame
+        if self.multiple_ff:
+            logger.debug("Recieved multiple frames marked FF")
+            return None
+        elif self.ff is None:
+            logger.debug("Never received frame marked FF")
+            return None
+
+        if self.cf_count == 0:
+            logger.debug("Never received frame marked CF")
+            return None
+
+        # check contiguity, and that we aren't missing any frames
+        if not self.contiguous():
+            logger.debug("Recieved multiline response with missing frames")
+            return None
+
+        # chop to the correct size (as specified in the first frame)
+        return self.data[:min(self.end, len(self.data))]
+
+
+class CANProtocolStream(ProtocolStream):
+    """
+        Reassembles multi-frame messages while the lines are arriving,
+        finishing each one as soon as its last consecutive frame is read.
+    """
+
+    def __init__(self, protocol):
+        ProtocolStream.__init__(self, protocol)
+        self.reassemblers = {}  # key = tx_id, value = IsoTpReassembler
+        self.ready = {}  # key = tx_id, value = completed Message
+
+    def add_frame(self, frame):
+        ProtocolStream.add_frame(self, frame)
+
+        # lone single frames don't need reassembly
+        if frame.type == self.protocol.FRAME_TYPE_SF:
+            return
+
+        tx_id = frame.tx_id
+        self.ready.pop(tx_id, None)  # a late frame reopens the message
+
+        if tx_id not in self.reassemblers:
+            self.reassemblers[tx_id] = IsoTpReassembler()
+
+        reassembler = self.reassemblers[tx_id]
+        reassembler.add(frame)
+
+        if reassembler.complete:
+            message = Message(self.frames_by_ECU[tx_id])
+            if self.protocol.parse_message(message, reassembler):
+                self.ready[tx_id] = message
+
+    def parse_message(self, tx_id, message):
+        if tx_id in self.ready:
+            message.data = self.ready[tx_id].data
+            return True
+        return self.protocol.parse_message(message, self.reassemblers.get(tx_id))
+
+
 ##############################################
 #                                            #
 # Here lie the class stubs for each protocol #
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+########################################################################
+#                                                                      #
+# python-OBD: A python OBD-II serial module derived from pyobd         #
+#                                                                      #
+# Copyright 2004 Donour Sizemore (donour@uchicago.edu)                 #
+# Copyright 2009 Secons Ltd. (www.obdtester.com)                       #
+# Copyright 2009 Peter J. Creath                                       #
+# Copyright 2016 Brendan Whitfield (brendan-w.com)                     #
+#                                                                      #
+########################################################################
+#                                                                      #
+# supported.py                                                         #
+#                                                                      #
+# This file is part of python-OBD (a derivative of pyOBD)              #
+#                                                                      #
+# python-OBD is free software: you can redistribute it and/or modify   #
+# it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation, either version 2 of the License, or    #
+# (at your option) any later version.                                  #
+#                                                                      #
+# python-OBD is distributed in the hope that it will be useful,        #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of       #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the        #
+# GNU General Public License for more details.                         #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with python-OBD.  If not, see <http://www.gnu.org/licenses/>.  #
+#                                                                      #
+########################################################################
+
+try:
+    from collections.abc import MutableSet, Set
+except ImportError:  # python 2
+    from collections import MutableSet, Set
+
+from .OBDCommand import OBDCommand
+from .commands import commands
+from .protocols import ECU_HEADER
+from .utils import _popcount
+
+# every byte value with its bits in reverse order
+_REVERSED = bytes(int(format(b, "08b")[::-1], 2) for b in range(256))
+
+# mode --> bitset of the PIDs that are in python-OBD's tables
+_KNOWN = {}
+
+
+def _known(mode):
+    if mode not in _KNOWN:
+        mask = 0
+        if 0 <= mode < len(commands.modes):
+            for pid, c in enumerate(commands.modes[mode]):
+                if c is not None:
+                    mask |= 1 << pid
+        _KNOWN[mode] = mask
+    return _KNOWN[mode]
+
+
+class SupportedCommands(MutableSet):
+    """
+        Set of the commands supported by the car
+
+        Commands from python-OBD's tables are held as one integer per
+        mode, with bit N set when PID N is supported, so they can be
+        filled straight from the PID listing responses, tested with a
+        shift, and intersected with a bitwise AND. Anything else (custom
+        commands, or the ELM's AT commands) is kept in a normal set.
+    """
+
+    def __init__(self, cmds=()):
+        self.__bits = {}  # mode --> bitset of supported PIDs
+        self.__extra = set()  # commands that aren't in the tables
+        for c in cmds:
+            self.add(c)
+
+    @staticmethod
+    def __slot(c):
+        """ returns (mode, pid) for commands from the tables, else None """
+        mode = c.mode
+        if mode is None or c.header != ECU_HEADER.ENGINE:
+            return None
+        pid = c.pid or 0  # lone commands in a mode are found at PID 0
+        try:
+            table = commands.modes[mode][pid]
+        except IndexError:
+            return None
+        # the tables hold the very same objects in the common case
+        if table is c or (table is not None and table == c):
+            return (mode, pid)
+        return None
+
+    def __contains__(self, c):
+        if not isinstance(c, OBDCommand):
+            return False
+        slot = self.__slot(c)
+        if slot is None:
+            return c in self.__extra
+        mode, pid = slot
+        return (self.__bits.get(mode, 0) >> pid) & 1 == 1
+
+    def __iter__(self):
+        for mode in sorted(self.__bits):
+            v = self.__bits[mode]
+            while v:
+                low = v & -v
+                yield commands.modes[mode][low.bit_length() - 1]
+                v ^= low
+        for c in list(self.__extra):
+            yield c
+
+    def __len__(self):
+        return sum(_popcount(v) for v in self.__bits.values()) + len(self.__extra)
+
+    def __repr__(self):
+        return "SupportedCommands(%r)" % list(self)
+
+    def add(self, c):
+        slot = self.__slot(c)
+        if slot is None:
+            self.__extra.add(c)
+        else:
+            mode, pid = slot
+            self.__bits[mode] = self.__bits.get(mode, 0) | (1 << pid)
+
+    def discard(self, c):
+        slot = self.__slot(c)
+        if slot is None:
+            self.__extra.discard(c)
+        else:
+            mode, pid = slot
+            self.__bits[mode] = self.__bits.get(mode, 0) & ~(1 << pid)
+
+    def clear(self):
+        self.__bits = {}
+        self.__extra = set()
+
+    def update(self, *others):
+        for other in others:
+            for c in other:
+                self.add(c)
+
+    def copy(self):
+        result = SupportedCommands()
+        result.__bits = dict(self.__bits)
+        result.__extra = set(self.__extra)
+        return result
+
+    def add_bitmap(self, mode, offset, bits):
+        """
+            marks the commands listed in a PID listing response as
+            supported, where bit i of `bits` (a BitArray, as decoded
+            from a PIDS_* command with PID `offset`) is PID offset + i + 1
+        """
+        v = int.from_bytes(bytes(bits).translate(_REVERSED), "little") << (offset + 1)
+        self.__bits[mode] = self.__bits.get(mode, 0) | (v & _known(mode))
+
+    def has_pid(self, mode, pid):
+        """ checks for support of a command from the tables by int mode and int pid """
+        return pid >= 0 and (self.__bits.get(mode, 0) >> pid) & 1 == 1
+
+    def mask(self, mode):
+        """ returns the bitset of supported PIDs for a mode """
+        return self.__bits.get(mode, 0)
+
+    def __and__(self, other):
+        if isinstance(other, SupportedCommands):
+            result = SupportedCommands()
+            result.__bits = dict((m, v & other.mask(m)) for m, v in self.__bits.items())
+            result.__extra = self.__extra & other.__extra
+            return result
+        return MutableSet.__and__(self, other)
+
+    __rand__ = __and__
+
+    @staticmethod
+    def __as_set(other):
+        """ lets the named set methods take any iterable, as set()'s do """
+        return other if isinstance(other, Set) else set(other)
+
+    def intersection(self, *others):
+        """ like set.intersection(), accepting any iterables of commands """
+        result = self
+        for other in others:
+            result = result & self.__as_set(other)
+        return result if others else self.copy()
+
+    def union(self, *others):
+        """ like set.union(), accepting any iterables of commands """
+        result = self.copy()
+        result.update(*others)
+        return result
+
+    def difference(self, *others):
+        """ like set.difference(), accepting any iterables of commands """
+        result = self
+        for other in others:
+            result = result - self.__as_set(other)
+        return result if others else self.copy()
+
+    def symmetric_difference(self, other):
+        """ like set.symmetric_difference(), accepting any iterable of commands """
+        return self ^ self.__as_set(other)
+
+    def issubset(self, other):
+        """ like set.issubset(), accepting any iterable of commands """
+        return self <= self.__as_set(other)
+
+    def issuperset(self, other):
+        """ like set.issuperset(), accepting any iterable of commands """
+        return self >= self.__as_set(other)
@@ -32,6 +32,7 @@
 
 import errno
 import glob
+from itertools import chain
 import logging
 import string
 import sys
@@ -52,63 +53,98 @@ class OBDStatus:
 
 class BitArray:
     """
-    Class for representing bitarrays (inefficiently)
+    Class for representing bitarrays
 
-    There's a nice C-optimized lib for this: https://github.com/ilanschnell/bitarray
-    but python-OBD doesn't use it enough to be worth adding the dependency.
-    But, if this class starts getting used too much, we should switch to that lib.
+    The bits are held in a single integer, with bit 0 being the most
+    significant bit of the first byte (the order in which the OBD specs
+    number them). Indexing, counting and extracting values are all
+    integer operations, rather than string manipulation.
     """
 
+    __slots__ = ("_bytes", "_int", "_len")
+
     def __init__(self, _bytearray):
-        self.bits = ""
-        for b in _bytearray:
-            v = bin(b)[2:]
-            self.bits += ("0" * (8 - len(v))) + v  # pad it with zeros
+        self._bytes = bytes(_bytearray)
+        self._int = int.from_bytes(self._bytes, "big")
+        self._len = len(self._bytes) * 8
+
+    @property
+    def bits(self):
+        """ the bits as a string of 1s and 0s """
+        if self._len == 0:
+            return ""
+        return format(self._int, "0%db" % self._len)
 
     def __getitem__(self, key):
         if isinstance(key, int):
-            if key >= 0 and key < len(self.bits):
-                return self.bits[key] == "1"
+            if key >= 0 and key < self._len:
+                return (self._int >> (self._len - 1 - key)) & 1 == 1
             else:
                 return False
         elif isinstance(key, slice):
-            bits = self.bits[key]
-            if bits:
-                return [b == "1" for b in bits]
-            else:
+            start, stop, step = key.indices(self._len)
+            if step != 1:
+                return list(self)[key]
+            if stop <= start:
                 return []
+            # only expand the bytes covering the slice
+            offset = start % 8
+            bits = _expand(self._bytes[start // 8:(stop + 7) // 8])
+            return bits[offset:offset + stop - start]
 
     def num_set(self):
-        return self.bits.count("1")
+        return _popcount(self._int)
 
     def num_cleared(self):
-        return self.bits.count("0")
+        return self._len - _popcount(self._int)
 
     def value(self, start, stop):
-        bits = self.bits[start:stop]
-        if bits:
-            return int(bits, 2)
-        else:
+        """ the unsigned integer held in bits [start, stop) """
+        start, stop, _ = slice(start, stop).indices(self._len)
+        if stop <= start:
             return 0
+        return (self._int >> (self._len - stop)) & ((1 << (stop - start)) - 1)
+
+    def set_bits(self):
+        """ iterates over the indices of the set bits, in ascending order """
+        v = self._int
+        while v:
+            b = v.bit_length() - 1
+            yield self._len - 1 - b
+            v ^= 1 << b
 
     def __len__(self):
-        return len(self.bits)
+        return self._len
 
     def __str__(self):
         return self.bits
 
+    def __bytes__(self):
+        return self._bytes
+
     def __iter__(self):
-        return [b == "1" for b in self.bits].__iter__()
+        return iter(_expand(self._bytes))
+
+
+# the bits of every byte value, most significant first
+_BYTE_BITS = [tuple(bool((b >> (7 - i)) & 1) for i in range(8)) for b in range(256)]
+
+
+def _expand(_bytes):
+    """ list of bools for the bits of some bytes, through the lookup table """
+    return list(chain.from_iterable(map(_BYTE_BITS.__getitem__, _bytes)))
+
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:
+    def _popcount(v):
+        return bin(v).count("1")
 
 
 def bytes_to_int(bs):
     """ converts a big-endian byte array into a single integer """
-    v = 0
-    p = 0
-    for b in reversed(bs):
-        v += b * (2 ** p)
-        p += 8
-    return v
+    return int.from_bytes(bs, "big")
 
 
 def bytes_to_hex(bs):
@@ -0,0 +1,114 @@
+"""
+Smooth, predicted values for the gauges
+
+RPM only arrives a few times a second, so drawing the needle at the last
+reading makes it jump between values, and lag the engine by up to a full
+poll cycle. A Predictor tracks the value and its rate of change with an
+alpha-beta filter over the response timestamps, and gives an estimate
+for any moment in between, extrapolating a little past the last reading.
+
+The shown value never moves faster than max_rate (units per second), and
+stays within [low, high], so a noisy or dropped reading can't throw the
+needle further than an engine could actually go.
+"""
+
+import threading
+import time
+
+
+class Predictor():
+
+    def __init__(self, alpha=0.9, beta=0.5, max_rate=None, low=None, high=None):
+        self.alpha = alpha  # how much of each new reading is trusted
+        self.beta = beta  # how quickly the rate follows the readings
+        self.max_rate = max_rate
+        self.low = low
+        self.high = high
+
+        self.value = None  # filtered value, at self.time
+        self.rate = 0.0  # filtered rate of change (per second)
+        self.time = None  # timestamp of the last reading
+        self.interval = None  # average time between readings
+        self.shown = None  # last value given by estimate(), and when
+        self.shown_time = None
+        self.lock = threading.Lock()  # readings come from the Async thread
+
+    def clamp(self, value):
+        if self.low is not None:
+            value = max(value, self.low)
+        if self.high is not None:
+            value = min(value, self.high)
+        return value
+
+    def update(self, value, t=None):
+        """ adds a reading taken at time t (as from time.time()) """
+        if t is None:
+            t = time.time()
+        with self.lock:
+            if self.value is None:
+                self.value = value
+                self.time = t
+                return
+
+            dt = t - self.time
+            if dt <= 0:
+                return  # a repeated (or out of order) reading
+
+            # predict where the value should be now, and correct by the residual
+            predicted = self.value + self.rate * dt
+            residual = value - predicted
+            self.value = predicted + self.alpha * residual
+            self.rate += self.beta * residual / dt
+            if self.max_rate is not None:
+                self.rate = min(max(self.rate, -self.max_rate), self.max_rate)
+
+            self.time = t
+            if self.interval is None:
+                self.interval = dt
+            else:
+                self.interval += 0.2 * (dt - self.interval)
+
+    def horizon(self):
+        """ how far past the last reading to extrapolate (s) """
+        if self.interval is None:
+            return 0.0
+        return min(1.5 * self.interval, 1.0)
+
+    def target(self, t):
+        """ the filter's estimate at time t, without the rate limit """
+        with self.lock:
+            if self.value is None:
+                return None
+            dt = min(max(t - self.time, 0.0), self.horizon())
+            return self.clamp(self.value + self.rate * dt)
+
+    def estimate(self, t=None):
+        """ the value to show at time t, moving at most max_rate from the last one shown """
+        if t is None:
+            t = time.time()
+        target = self.target(t)
+        if target is None:
+            return None
+
+        if self.shown is None or self.max_rate is None:
+            self.shown = target
+        else:
+            step = self.max_rate * max(t - self.shown_time, 0.0)
+            if abs(target - self.shown) <= step:
+                self.shown = target
+            elif target > self.shown:
+                self.shown += step
+            else:
+                self.shown -= step
+        self.shown_time = t
+        return self.shown
+
+    def settled(self, t=None):
+        """ whether estimate() will keep returning the same value until the next reading """
+        if t is None:
+            t = time.time()
+        target = self.target(t)
+        if target is None:
+            return True
+        moving = self.rate != 0.0 and (t - self.time) < self.horizon()
+        return not moving and self.shown == target
@@ -0,0 +1,94 @@
+"""
+Dirty-rectangle renderer for the PiLogger screens
+
+The static parts of a page (labels, units, images) are drawn once onto
+a cached background layer. Everything else is a widget, registered each
+frame with a key describing what it shows (its value, colour, state...).
+A widget is only redrawn when its key changes, and only the rectangles
+that changed are pushed to the display with pygame.display.update(rects).
+
+Widgets that aren't registered during a frame are erased, so screens can
+still be written in the "draw everything every frame" style.
+"""
+
+import pygame
+
+
+class Renderer():
+
+    def __init__(self, screen, color=(0, 0, 0)):
+        self.screen = screen
+        self.color = color  # fill colour of every background
+        self.background = pygame.Surface(screen.get_size())
+        self.page = None
+        self.full = True  # repaint (and flip) the whole screen next frame
+        self.shown = {}  # name -> (key, rect) of the widgets on screen
+        self.frame = []  # (name, key, draw) registered this frame
+        self.redrawn = 0  # widgets redrawn in the last frame, for profiling
+
+    def set_page(self, page, draw_static):
+        """
+        switches page, drawing its static parts onto the background
+        layer with draw_static(surface). Does nothing for the current page
+        """
+        if page == self.page:
+            return
+        self.page = page
+        self.background.fill(self.color)
+        draw_static(self.background)
+        self.invalidate()
+
+    def invalidate(self):
+        """ forces every widget to be redrawn on the next frame """
+        self.full = True
+        self.shown = {}
+
+    def draw(self, name, key, draw):
+        """
+        registers a widget for this frame. draw(surface) paints it and
+        returns the Rect it covered, and is only called when the key
+        differs from the one on screen
+        """
+        self.frame.append((name, key, draw))
+
+    def present(self):
+        """ repaints what changed this frame, and updates the display """
+        frame = self.frame
+        self.frame = []
+
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+
+        # erase widgets that changed or disappeared
+        current = set(name for name, _, _ in frame)
+        damaged = []
+        for name, (key, rect) in list(self.shown.items()):
+            if name not in current:
+                damaged.append(rect)
+                del self.shown[name]
+        for name, key, _ in frame:
+            old = self.shown.get(name)
+            if old is not None and old[0] != key:
+                damaged.append(old[1])
+
+        for rect in damaged:
+            self.screen.blit(self.background, rect, rect)
+
+        # redraw changed widgets, and any that were partly erased
+        dirty = list(damaged)
+        self.redrawn = 0
+        for name, key, draw in frame:
+            old = self.shown.get(name)
+            if old is not None and old[0] == key and old[1].collidelist(damaged) == -1:
+                continue
+            rect = draw(self.screen)
+            self.shown[name] = (key, rect)
+            dirty.append(rect)
+            self.redrawn += 1
+
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        elif dirty:
+            pygame.display.update(dirty)
+        return dirty
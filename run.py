@@ -15,7 +15,8 @@ Available modes:
     Home
     DTC (engine code) reader:
     Virtual Dash
-        -with data logging capability to csv file
+        -with data logging capability to a binary session log
+         (see sessionlog.py) or csv file
 
 
     Program works in conjunction with ELM 327 adapter and has
@@ -27,6 +28,12 @@ Available modes:
     Initial debug mode set on to view connection
     process - turned off once GUI is launched
 
+    python run.py --split runs the OBD connection in its own
+    process (see acquisition.py), so that drawing and polling
+    the car don't slow each other down
+
+    python run.py --csv logs to a csv file instead of a session log
+
 
     Python-OBD: https://python-obd.readthedocs.io/en/latest/
         elm327.py file modified to support ELM327v1.5 (slow adapter)
@@ -36,32 +43,36 @@ Available modes:
 """
 
 import obd
-import csv
+import sys
+import threading
 from datetime import date
 from constants import *
-
-obd.logger.setLevel(obd.logging.DEBUG)
-
-if raspberry_pi:
-    connection = obd.Async()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-else:
-    connection = obd.Async("\\.\\COM3")  # PC -> connected port may vary between devices
-    screen = pygame.display.set_mode((800, 480))
-
-pygame.display.set_caption('PiLogger')
-
-# Text size for flash messages
-textPopUp = 100
-
-
-# GUI buttons
-virtualDash = button(20, 20, "Virtual Dash", screen)
-dtc = button(350, 20, "Read Codes", screen)
-quit = button(670, 20, "Quit", screen)
-go_home = button(20, 20, "Home", screen)
-data_log_off = button(350, 20, "Data Log", screen)
-data_log_on = button(350, 20, "Logging", screen)
+from renderer import Renderer
+from glyphs import glyph_font
+from widgets import WidgetEngine
+from acquisition import watch_page, start_acquisition, RateCounter
+from datalogger import DataLogger, CsvLog
+from sessionlog import SessionLogWriter, column_type
+
+# How long flash messages are shown for (ms)
+textPopUp = 1700
+
+# The screen is only redrawn when new data or input arrives, but at
+# least idle_fps times a second, and at most max_fps times a second.
+# While idle, input is checked poll_fps times a second
+idle_fps = 2
+max_fps = 60
+poll_fps = 30
+
+# Posted by the Async callbacks when a value changes, and new_data set to
+# wake the game loop straight away
+TELEMETRY = pygame.USEREVENT + 1
+new_data = threading.Event()
+
+# Set up by main()
+screen = None
+renderer = None
+clock = None
 
 
 #############################
@@ -69,34 +80,14 @@ data_log_on = button(350, 20, "Logging", screen)
 #                           #
 #############################
 
+# The pages, their widgets, and the commands they show, are set in
+# dash.json, see widgets.py
+engine = WidgetEngine(dash_config)
 
-rpm = 0
-load = 0
-maf = 0.0
-o2_trim = 0.0
-timing_advance = 0.0
-coolant_temp = 160
-fuel_rail_press = 0.0
-intake_temp = 0
-afr = 0.0
-codes = []
-
-
-#############################
-#    RPM GAUGE FUNCTIONS    #
-#                           #
-#############################
-
-def rpm_gauge():
-    rpm_gauge = pygame.transform.scale(gauge_image, (210,210))
-    return rpm_gauge
-def gauge_needle():
-    needle = pygame.transform.scale(needle_image, (190, 2))
-    return needle
-def rotate_needle(needle, angle):
-    rotated_needle = pygame.transform.rotozoom(needle, angle, 1)
-    return rotated_needle
-
+# Latest value of each channel, see acquisition.py
+values = engine.defaults
+value_times = {}
+data_rate = RateCounter()  # readings per second
 
 
 #############################
@@ -109,65 +100,11 @@ def virtualDashIntro():
     text = small_font.render("WELCOME TO VIRTUAL DASH", True, green)
     text_box = text.get_rect()
     text_box.center = (405, 80)
-    screen.blit(text, text_box)
-
-def virtDash():
-    gauge = rpm_gauge()
-    angle = 36 * (rpm * -.001) + 90
-    needle_copy = gauge_needle()
-    needle_rotated = rotate_needle(needle_copy, angle)
-    screen.blit(gauge, (screen.get_width() / 2 - 105, 200))
-    # Centering equation courtesy of DaFluffyPotato on Youtube: https://www.youtube.com/channel/UCYNrBrBOgTfHswcz2DdZQFA
-    screen.blit(needle_rotated, (screen.get_width() / 2 - int(needle_rotated.get_width() / 2),
-                                 305 - int(needle_rotated.get_height() / 2)))
-    if rpm < 3500:
-        display_rpm = rpm_font.render(str(rpm), True, green)
-    else:
-        display_rpm = rpm_font.render(str(rpm), True, red)
-    screen.blit(display_rpm, (365, 430))
-    screen.blit(rpm_text, (440, 450))
-
-    screen.blit(coolant_temp_text, (500, 160))
-    coolant_temp_display = font.render(str(coolant_temp), True, silver)
-    screen.blit(coolant_temp_display, (500, 190))
-    screen.blit(deg_F, (560, 210))
-
-    screen.blit(o2_trim_text, (375, 100))
-    o2_display = font.render(str("{:.1f}".format(o2_trim)), True, silver)
-    screen.blit(o2_display, (380, 130))
-    screen.blit(percent, (440, 148))
-
-    screen.blit(intake_temp_text, (230, 160))
-    intake_temp_display = font.render(str(intake_temp), True, silver)
-    screen.blit(intake_temp_display, (230, 190))
-    screen.blit(deg_F, (290, 210))
-
-    screen.blit(maf_text, (205, 300))
-    maf_display = font.render(str("{:.1f}".format(maf)), True, silver)
-    screen.blit(maf_display, (205, 340))
-    screen.blit(gs_text, (260, 360))
-
-    screen.blit(timing_text, (535, 300))
-    timing_adv_display = font.render(str("{:.1f}".format(timing_advance)), True, silver)
-    screen.blit(timing_adv_display, (535, 340))
-    deg = small_font.render(degree_sign, True, orange)
-    screen.blit(deg, (595, 346))
-
-    screen.blit(fuel_rail_text, (670, 100))
-    screen.blit(fuel_rail_text2, (670, 140))
-    fuel_rail_display = big_font.render(str("{:.1f}".format(fuel_rail_press)), True, white)
-    screen.blit(fuel_rail_display, (655, 180))
-    screen.blit(psi_text, (670, 270))
-
-    screen.blit(engine_load_e, (20, 100))
-    screen.blit(engine_load_l, (20, 140))
-    engine_l_display = big_font.render(str(int(load)), True, white)
-    screen.blit(engine_l_display, (20, 180))
-    screen.blit(percent, (100, 228))
-
-    screen.blit(afr_text, (700, 335))
-    afr_display = big_font.render(str("{:.1f}".format(afr)), True, white)
-    screen.blit(afr_display, (690, 370))
+    return text, text_box
+
+def draw_page(page, now=None):
+    # now is the time to draw animated widgets at (time.time() by default)
+    engine.pages[page].draw(renderer, values, now)
 
 #############################
 #   DATA LOGGING FUNCTIONS  #
@@ -175,18 +112,33 @@ def virtDash():
 
 logging_active = small_font.render("Logging Active", True, red)
 
-filename = "data_logging_" + str(date.today()) + ".csv"
+log_base = "data_logging_" + str(date.today())
+filename = log_base + ".csv"
 header = ['RPM', 'Intake Temp.', 'MAF (g/s)', 'Engine Load', 'Fuel Rail Press.', 'AFR', 'Long B2 Trim', 'Timing Adv.']
-with open(filename, "w", newline="") as dl:
-    writer = csv.writer(dl)
-    writer.writerow(header)
+log_channels = ['rpm', 'intake_temp', 'maf', 'load', 'fuel_rail_press', 'afr', 'o2_trim', 'timing_advance']
+
+# Session logs are compressed, and a new file started every
+# log_rotate_bytes or log_rotate_seconds
+log_compression = "zlib"
+log_rotate_bytes = 16 * 1024 * 1024
+log_rotate_seconds = 60 * 60
+
+# Rows are recorded as readings arrive, and written in blocks by a
+# background thread, see datalogger.py
+data_logger = None  # set up by main()
+
+def new_logger(csv_log=False):
+    if csv_log:
+        sink = CsvLog(filename, log_channels, header)
+    else:
+        types = [column_type(engine.channels[name].default) for name in log_channels]
+        sink = SessionLogWriter(log_base, log_channels, types,
+                                compression=log_compression, max_bytes=log_rotate_bytes,
+                                max_seconds=log_rotate_seconds)
+    return DataLogger(sink, log_channels, values)
 
-def log_to_file(file_name):
-    screen.blit(logging_active, (510, 20))
-    row = [str(rpm), str(intake_temp), str(maf), str(load), str(fuel_rail_press), str(afr), str(o2_trim), str(timing_advance)]
-    with open(filename, "a", newline="") as dl:
-        writer = csv.writer(dl)
-        writer.writerow(row)
+def log_indicator():
+    renderer.draw("logging_active", None, lambda surface: surface.blit(logging_active, (510, 20)))
 
 
 #############################
@@ -197,19 +149,16 @@ def log_to_file(file_name):
 def dtcIntro():
     text_box = text.get_rect()
     text_box.center = (400, 30)
-    screen.blit(text, text_box)
-
-def display_dtc(code_list):
-    screen.blit(dtc_text, (50, 100))
-    y_loc = 200
-    # Display DTC codes
-    if len(code_list) != 0:
-        for code in code_list:
-            code = small_font.render(str(code), True, white)
-            screen.blit(code, (60, y_loc))
-            y_loc += 50
-    else:
-        screen.blit(no_codes, (60, 200))
+    return text, text_box
+
+def draw_button(b):
+    """ polls a button, and redraws it when its state changes """
+    state, action = b.check_click()
+    renderer.draw(b.text, state, lambda surface: b.draw(surface, state))
+    return action
+
+def popup(name, intro):
+    renderer.draw(name, None, lambda surface: surface.blit(*intro()))
 
 
 #############################
@@ -220,184 +169,216 @@ def display_dtc(code_list):
 # https://pythonprogramming.altervista.org/pygame-how-to-display-the-frame-rate-fps-on-the-screen/
 
 def update_fps():
-    fps = str(int(clock.get_fps()))
-    fps_text = small_font.render(fps + " fps", 1, pygame.Color("coral"))
-    return fps_text
+    # frames drawn, and readings from the car, per second
+    fps = "%d fps  %d Hz" % (clock.get_fps(), data_rate.update())
+    renderer.draw("fps", fps, lambda surface: glyph_font(small_font, pygame.Color("coral")).draw(
+        surface, fps, (0, 456)))
 
 
 #########################################
 #   Functions to retrieve ECU data      #
 #########################################
 
-# Functions written as so defined by Python-OBD authors
-# https://python-obd.readthedocs.io/en/latest/Async%20Connections/
-def get_speed(s):
-    global speed
-    if not s.is_null():
-        # speed = int(s.value.magnitude) #for kph
-        speed = int(s.value.magnitude * .060934)  # for mph
-
-
-def get_fuel_rail_press(fp):
-    global fuel_rail_press
-    if not fp.is_null():
-        fuel_rail_press = float(fp.value.magnitude) * .145038  # kp to psi
-
-
-def get_intake_temp(it):
-    global intake_temp
-    if not it.is_null():
-        intake_temp = int(int(it.value.magnitude) * 1.8 + 32)  # C to F
-
-
-def get_afr(af):
-    global afr
-    if not af.is_null():
-        afr = float(af.value.magnitude) * 14.64 # Convert to AFR for normal gasoline engines
-
-
-def get_rpm(r):
-    global rpm
-    if not r.is_null():
-        rpm = int(r.value.magnitude)
-
-
-def get_load(l):
-    global load
-    if not l.is_null():
-        load = int(l.value.magnitude)
-
-
-def get_coolant_temp(ct):
-    global coolant_temp
-    if not ct.is_null():
-        coolant_temp = int(int(ct.value.magnitude) * 1.8 + 32) # convert to F
-
-
-def get_intake_press(ip):
-    global intake_pressure
-    if not ip.is_null():
-        intake_pressure = float(ip.value.magnitude)
-
-
-def get_baro_press(bp):
-    global baro_pressure
-    if not bp.is_null():
-        baro_pressure = float(bp.value.magnitude)
-
-
-def get_dtc(c):
-    global codes
-    if not c.is_null():
-        codes = c.value
-
-
-def get_timing_a(ta):
-    global timing_advance
-    if not ta.is_null():
-        timing_advance = str(ta.value).replace("degree", "") # in degrees / remove text from val
-        timing_advance = float(timing_advance)
-
-
-def get_maf(m):
-    global maf
-    if not m.is_null():
-        maf = str(m.value).replace("gps", "")  # grams / second / remove text from val
-        maf = float(maf)
-
-
-def get_o2(o):
-    global o2_trim
-    if not o.is_null():
-        o2_trim = str(o.value).replace("percent", "")  # +/- 3 percent normal range - negative = rich, positive = lean
-        o2_trim = float(o2_trim)
-
-def ecu_connections():
-    connection.watch(obd.commands.SPEED, callback=get_speed)
-    connection.watch(obd.commands.RPM, callback=get_rpm)
-    connection.watch(obd.commands.ENGINE_LOAD, callback=get_load)
-    connection.watch(obd.commands.GET_DTC, callback=get_dtc)
-    connection.watch(obd.commands.COOLANT_TEMP, callback=get_coolant_temp)
-    connection.watch(obd.commands.INTAKE_TEMP, callback=get_intake_temp)
-    connection.watch(obd.commands.FUEL_RAIL_PRESSURE_DIRECT, callback=get_fuel_rail_press)
-    connection.watch(obd.commands.COMMANDED_EQUIV_RATIO, callback=get_afr)
-    connection.watch(obd.commands.MAF, callback=get_maf)
-    connection.watch(obd.commands.TIMING_ADVANCE, callback=get_timing_a)
-    connection.watch(obd.commands.LONG_O2_TRIM_B1, callback=get_o2)
-
-    connection.start()
-
-
-# Turn off debug mode
-obd.logger.removeHandler(obd.console_handler)
-
-
-# Game loop variables
-run = True
-home = True
-vDash = False
-dtcMode = False
-logging = False
-cnt = 0  # For flash messages
-clock = pygame.time.Clock()  # Initiate clock for fps
-
-# Call watch() for ecu connections
-ecu_connections()
+def store_value(name, value, t):
+    """
+    takes a reading (logged and given to the predictor even if repeated),
+    and returns whether the screen needs redrawing: the value changed, or
+    a needle following it is now moving
+    """
+    changed = value != values.get(name)
+    values[name] = value
+    value_times[name] = t
+    moving = engine.update(name, value, t)
+    if data_logger is not None:
+        data_logger.record(name, value, t)
+    return changed or moving
+
+def on_value(name, value, t):
+    """ called from the Async thread for every reading of a channel """
+    data_rate.add()  # the poll rate, whether or not the value changed
+    if store_value(name, value, t):
+        pygame.event.post(pygame.event.Event(TELEMETRY, channel=name))
+        new_data.set()
+
+def on_codes(new_codes):
+    values["codes"] = new_codes
+    pygame.event.post(pygame.event.Event(TELEMETRY, channel="codes"))
+    new_data.set()
+
+def watch_channels(page, connection, shared):
+    """ polls only the channels shown on a page """
+    channels = engine.page_channels(page)
+    if shared is not None:
+        shared.watch(channel.name for channel in channels)
+    else:
+        watch_page(connection, channels, on_value, on_codes)
+
+def read_shared(shared):
+    """ takes every reading from the acquisition process since the last frame, and returns whether there were any """
+    changed = False
+    readings = shared.samples()
+    data_rate.add(len(readings))
+    for name, value, t in readings:
+        # shared memory only holds floats
+        if store_value(name, type(engine.channels[name].default)(value), t):
+            changed = True
+    new_codes = shared.read_codes()
+    if new_codes is not None:
+        values["codes"] = new_codes
+        changed = True
+    return changed
+
+def poll_events(shared):
+    events = pygame.event.get()
+    if shared is not None and read_shared(shared):
+        events.append(pygame.event.Event(TELEMETRY))
+    return events
 
 
 #################################
 #          Game Loop            #
 #################################
-while run:
-
-    screen.fill(black)
-    screen.blit(update_fps(), (0, 456))
-
-    if home:
-        screen.blit(quattro_image, (155, 200))
-        vDash = False
-        dtcMode = False
-        cnt = 0
-        if virtualDash.draw_button():
-            counter = 0
-            home = False
-            vDash = True
-
-        if dtc.draw_button():
-            home = False
-            dtcMode = True
-    if quit.draw_button():
-        run = False
-    if not home:
-        if go_home.draw_button():
-            home = True
-
-    if vDash and cnt < textPopUp:
-        virtualDashIntro()
-        cnt += 1
-    if dtcMode and cnt < textPopUp:
-        dtcIntro()
-        cnt += 1
-    if vDash:
-        virtDash()
-        if not logging:
-            if data_log_off.draw_button():
-                logging = True
-
-        if logging:
-            log_to_file(filename)
-
-            if data_log_on.draw_button():
-                logging = False
-
-    if dtcMode:
-        display_dtc(codes)
-    clock.tick(60)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            run = False
-    pygame.display.update()
-    pygame.display.flip()
 
-pygame.quit()
+def wait_time(page, popup_start):
+    """ ms until the next frame is due, if nothing happens before """
+    wait = int(1000 / idle_fps)
+    if engine.pages[page].animating():
+        # keep animating the needle
+        wait = int(1000 / max_fps)
+    if page != "home":
+        # wake up to clear the flash message
+        remaining = textPopUp - (pygame.time.get_ticks() - popup_start)
+        if remaining > 0:
+            wait = min(wait, remaining + 1)
+    return wait
+
+
+def main(split=False, csv_log=False):
+    global screen, renderer, clock, data_logger
+
+    obd.logger.setLevel(obd.logging.DEBUG)
+
+    port = None if raspberry_pi else "\\.\\COM3"  # PC -> connected port may vary between devices
+    if split:
+        # poll the car from another process, see acquisition.py
+        acquisition, shared, stop = start_acquisition(list(engine.channels.values()), port)
+        wake = shared.wake
+    else:
+        connection = obd.Async(port)
+        shared = None
+        wake = new_data
+
+    if raspberry_pi:
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    else:
+        screen = pygame.display.set_mode((800, 480))
+
+    pygame.display.set_caption('PiLogger')
+
+    # Only redraws what changed each frame, see renderer.py
+    renderer = Renderer(screen, black)
+
+    # GUI buttons
+    virtualDash = button(20, 20, "Virtual Dash", screen)
+    dtc = button(350, 20, "Read Codes", screen)
+    quit = button(670, 20, "Quit", screen)
+    go_home = button(20, 20, "Home", screen)
+    data_log_off = button(350, 20, "Data Log", screen)
+    data_log_on = button(350, 20, "Logging", screen)
+
+    data_logger = new_logger(csv_log)
+
+    # Turn off debug mode
+    obd.logger.removeHandler(obd.console_handler)
+
+    # Game loop variables
+    run = True
+    home = True
+    vDash = False
+    dtcMode = False
+    logging = False
+    popup_start = 0  # For flash messages
+    clock = pygame.time.Clock()  # Initiate clock for fps
+    watched = None  # page whose channels are being polled
+
+    while run:
+
+        update_fps()
+
+        if home:
+            vDash = False
+            dtcMode = False
+            if draw_button(virtualDash):
+                home = False
+                vDash = True
+                popup_start = pygame.time.get_ticks()
+
+            if draw_button(dtc):
+                home = False
+                dtcMode = True
+                popup_start = pygame.time.get_ticks()
+        if draw_button(quit):
+            run = False
+        if not home:
+            if draw_button(go_home):
+                home = True
+
+        if home:
+            page = "home"
+        elif vDash:
+            page = "vDash"
+        else:
+            page = "dtc"
+
+        # only poll what's on screen
+        if page != watched:
+            watch_channels(page, None if split else connection, shared)
+            watched = page
+
+        show_popup = pygame.time.get_ticks() - popup_start < textPopUp
+        if vDash and show_popup:
+            popup("intro", virtualDashIntro)
+        if dtcMode and show_popup:
+            popup("intro", dtcIntro)
+        draw_page(page)
+        if vDash:
+            if not logging:
+                if draw_button(data_log_off):
+                    logging = True
+
+            if logging:
+                log_indicator()
+
+                if draw_button(data_log_on):
+                    logging = False
+        # only log while the Virtual Dash (and its channels) are polled
+        data_logger.active = vDash and logging
+
+
+        # pick the background after the buttons, so page changes show at once
+        renderer.set_page(page, engine.pages[page].draw_static)
+        renderer.present()
+        clock.tick(max_fps)
+
+        # sleep until there is new telemetry, input, or the idle frame is due
+        # (pygame.event.wait() busy-polls on some SDL video drivers)
+        deadline = pygame.time.get_ticks() + wait_time(page, popup_start)
+        events = poll_events(shared)
+        while not events and pygame.time.get_ticks() < deadline:
+            wake.wait(1.0 / poll_fps)
+            wake.clear()
+            events = poll_events(shared)
+        for event in events:
+            if event.type == pygame.QUIT:
+                run = False
+
+    if split:
+        stop.set()
+        acquisition.join(2)
+    data_logger.close()
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(split="--split" in sys.argv[1:], csv_log="--csv" in sys.argv[1:])
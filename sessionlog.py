@@ -0,0 +1,332 @@
+"""
+Compact binary session logs
+
+A session log stores the data log in typed columns rather than CSV text:
+the wall clock time and monotonic time as doubles, and each channel as
+an int32 or float32 column. Rows are written in chunks (one per block
+the DataLogger flushes). Each chunk is prefixed with its row count, its
+time range, and the min/max of every column, and each column is stored
+(and optionally compressed, with zlib or lzma) on its own. A reader can
+then skip whole chunks outside a time range, and load a single channel
+without decoding the others.
+
+Layout of a .pilog file (all numbers little endian):
+
+    MAGIC, uint32 header length, JSON header
+        {"channels": [[name, typecode], ...], "compression": ..., "created": ...}
+    then chunks of
+        CHUNK (magic, rows, first time, last time)
+        COLUMN (min, max, stored bytes) for each column, times first
+        the stored bytes of each column, in the same order
+
+A log can be rotated into several files by size or age. The files of a
+session are named <base>-001.pilog, <base>-002.pilog...
+
+    python sessionlog.py <file.pilog> [channel ...]
+
+prints a log (or just some of its channels) as CSV.
+"""
+
+import csv
+import glob
+import json
+import lzma
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from datalogger import iso_time
+
+MAGIC = b"PILOG1\n"
+HEADER_LENGTH = struct.Struct("<I")
+CHUNK = struct.Struct("<4sIdd")
+CHUNK_MAGIC = b"CHNK"
+COLUMN = struct.Struct("<ddI")
+
+EXTENSION = ".pilog"
+
+# the time columns stored before the channels in every chunk
+TIME_COLUMNS = [("Time", "d"), ("Monotonic", "d")]
+
+COMPRESSORS = {
+    None: (lambda data: data, lambda data: data),
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def column_type(value):
+    """ the column typecode for a channel holding values like this one """
+    if isinstance(value, bool) or isinstance(value, int):
+        return "i"
+    return "f"
+
+
+def pack(typecode, values):
+    a = array(typecode, values)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a.tobytes()
+
+
+def unpack(typecode, data):
+    a = array(typecode)
+    a.frombytes(data)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+
+def session_files(base):
+    """ the files of a rotated session, in order """
+    return sorted(glob.glob(glob.escape(base) + "-[0-9][0-9][0-9]" + EXTENSION))
+
+
+#############################
+#   Writing                 #
+#############################
+
+class SessionLogWriter():
+    """
+    Writes rows of (wall time, monotonic time, [channel values]), as
+    given by the DataLogger, to a session log
+
+    A new file is started once the current one reaches max_bytes, or has
+    been open for max_seconds (if given).
+    """
+
+    def __init__(self, base, channels, types, compression="zlib",
+                 max_bytes=None, max_seconds=None):
+        if compression not in COMPRESSORS:
+            raise ValueError("Unknown compression '%s'" % compression)
+        self.base = base
+        self.channels = list(channels)
+        self.types = list(types)  # typecode of each channel, 'i' or 'f'
+        if len(self.types) != len(self.channels):
+            raise ValueError("Every channel needs a type")
+        self.compression = compression
+        self.compress = COMPRESSORS[compression][0]
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+        self.file = None
+        self.path = None
+        self.opened = None
+        self.number = len(session_files(base))  # don't overwrite an earlier session's files
+        self.paths = []  # every file written
+
+    def open_next(self):
+        if self.file is not None:
+            self.file.close()
+        self.number += 1
+        self.path = "%s-%03d%s" % (self.base, self.number, EXTENSION)
+        self.file = open(self.path, "wb")
+        self.opened = time.monotonic()
+        self.paths.append(self.path)
+
+        header = json.dumps({
+            "channels": TIME_COLUMNS + [list(c) for c in zip(self.channels, self.types)],
+            "compression": self.compression,
+            "created": time.time(),
+        }).encode()
+        self.file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+
+    def should_rotate(self):
+        if self.file is None:
+            return True
+        if self.max_bytes is not None and self.file.tell() >= self.max_bytes:
+            return True
+        if self.max_seconds is not None and time.monotonic() - self.opened >= self.max_seconds:
+            return True
+        return False
+
+    def write_rows(self, rows):
+        """ writes rows of (time, monotonic, values) as one chunk """
+        if not rows:
+            return
+        if self.should_rotate():
+            self.open_next()
+
+        columns = [[r[0] for r in rows], [r[1] for r in rows]]
+        columns += [[r[2][i] for r in rows] for i in range(len(self.channels))]
+        typecodes = [t for _, t in TIME_COLUMNS] + self.types
+
+        stats = []
+        payload = []
+        for typecode, column in zip(typecodes, columns):
+            if typecode == "i":
+                column = [int(v) for v in column]
+            else:
+                column = [float(v) for v in column]
+            data = self.compress(pack(typecode, column))
+            stats.append(COLUMN.pack(min(column), max(column), len(data)))
+            payload.append(data)
+
+        self.file.write(CHUNK.pack(CHUNK_MAGIC, len(rows), columns[0][0], columns[0][-1]))
+        self.file.write(b"".join(stats))
+        self.file.write(b"".join(payload))
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+#############################
+#   Reading                 #
+#############################
+
+class Chunk():
+    """ where a chunk's columns are in the file, and what they hold """
+
+    def __init__(self, rows, start, end, stats, offsets):
+        self.rows = rows
+        self.start = start  # wall clock time of the first and last rows
+        self.end = end
+        self.stats = stats  # column name -> (min, max)
+        self.offsets = offsets  # column name -> (file offset, stored bytes)
+
+
+class SessionLog():
+    """
+    Reads a session log file. Only the chunk headers are read on opening,
+    columns are loaded as they're asked for
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError("'%s' is not a session log" % path)
+        length, = HEADER_LENGTH.unpack(self.file.read(HEADER_LENGTH.size))
+        self.header = json.loads(self.file.read(length).decode())
+
+        self.columns = [name for name, _ in self.header["channels"]]
+        self.types = dict((name, t) for name, t in self.header["channels"])
+        self.channels = self.columns[len(TIME_COLUMNS):]
+        self.decompress = COMPRESSORS[self.header["compression"]][1]
+        self.chunks = self.index()
+
+    def index(self):
+        chunks = []
+        while True:
+            head = self.file.read(CHUNK.size)
+            if len(head) < CHUNK.size:
+                break  # end of the file (or a chunk cut off mid write)
+            magic, rows, start, end = CHUNK.unpack(head)
+            if magic != CHUNK_MAGIC:
+                break
+            stats = {}
+            lengths = []
+            raw = self.file.read(COLUMN.size * len(self.columns))
+            if len(raw) < COLUMN.size * len(self.columns):
+                break
+            for i, name in enumerate(self.columns):
+                low, high, length = COLUMN.unpack_from(raw, i * COLUMN.size)
+                stats[name] = (low, high)
+                lengths.append(length)
+
+            offsets = {}
+            offset = self.file.tell()
+            for name, length in zip(self.columns, lengths):
+                offsets[name] = (offset, length)
+                offset += length
+            if offset > os.fstat(self.file.fileno()).st_size:
+                break
+            self.file.seek(offset)
+            chunks.append(Chunk(rows, start, end, stats, offsets))
+        return chunks
+
+    def __len__(self):
+        return sum(c.rows for c in self.chunks)
+
+    def column(self, chunk, name):
+        offset, length = chunk.offsets[name]
+        self.file.seek(offset)
+        return unpack(self.types[name], self.decompress(self.file.read(length)))
+
+    def read(self, name, start=None, end=None):
+        """
+        returns (times, values) arrays of one channel (or time column),
+        for the rows with wall clock times in [start, end]
+        """
+        if name not in self.types:
+            raise KeyError("No channel '%s' in %s" % (name, self.path))
+        times = array("d")
+        values = array(self.types[name])
+        for chunk in self.chunks:
+            if (start is not None and chunk.end < start) or (end is not None and chunk.start > end):
+                continue
+            t = self.column(chunk, "Time")
+            v = self.column(chunk, name)
+            if (start is None or chunk.start >= start) and (end is None or chunk.end <= end):
+                times.extend(t)
+                values.extend(v)
+            else:
+                for ti, vi in zip(t, v):
+                    if (start is None or ti >= start) and (end is None or ti <= end):
+                        times.append(ti)
+                        values.append(vi)
+        return times, values
+
+    def range(self, name):
+        """ the (min, max) of a channel, from the chunk headers alone """
+        stats = [c.stats[name] for c in self.chunks]
+        if not stats:
+            return None
+        return min(s[0] for s in stats), max(s[1] for s in stats)
+
+    def rows(self, names=None):
+        """ yields rows of (time, monotonic, value...) for some or all of the channels """
+        names = [name for name, _ in TIME_COLUMNS] + list(names or self.channels)
+        for chunk in self.chunks:
+            for row in zip(*[self.column(chunk, name) for name in names]):
+                yield row
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_session(base, name, start=None, end=None):
+    """ reads a channel across all the files of a rotated session """
+    times = None
+    values = None
+    for path in session_files(base):
+        with SessionLog(path) as log:
+            t, v = log.read(name, start, end)
+        if times is None:
+            times, values = t, v
+        else:
+            times.extend(t)
+            values.extend(v)
+    return times, values
+
+
+def to_csv(path, names=None, out=sys.stdout):
+    with SessionLog(path) as log:
+        writer = csv.writer(out)
+        writer.writerow(["Time", "Monotonic"] + list(names or log.channels))
+        for row in log.rows(names):
+            writer.writerow([iso_time(row[0]), "%.3f" % row[1]] + ["%g" % v for v in row[2:]])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python sessionlog.py <file.pilog> [channel ...]")
+        sys.exit(1)
+    to_csv(sys.argv[1], sys.argv[2:] or None)
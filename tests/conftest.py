@@ -1,2 +1,20 @@
+import pytest
+
+
 def pytest_addoption(parser):
     parser.addoption("--port", action="store", help="device file for doing end-to-end testing")
+    parser.addoption("--run-slow", action="store_true", help="also run the slow, timing-based benchmarks")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: timing-based benchmark, only collected with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """ leaves the wall-clock comparisons out of the default run """
+    if config.getoption("--run-slow"):
+        return
+    slow = [item for item in items if item.get_closest_marker("slow")]
+    if slow:
+        config.hook.pytest_deselected(items=slow)
+        items[:] = [item for item in items if item not in slow]
@@ -2,6 +2,11 @@
     Tests for the API layer
 """
 
+import os
+import threading
+import time
+import tracemalloc
+
 import obd
 from obd import ECU
 from obd.OBDCommand import OBDCommand
@@ -178,3 +183,158 @@ def test_fast():
     assert command.fast
     o.query(command, force=True)  # force since this command isn't in the tables
     # assert o.interface._test_last_command(command.command)
+
+
+def test_pooled_async():
+    o = obd.Async("/dev/null", pooled=True)
+    o.interface = FakeELM("/dev/null")
+    o.watch(obd.commands.RPM, force=True)
+
+    # the update loop refills the watched command's response in place
+    pooled = o.query(obd.commands.RPM)
+    r = obd.OBD.query(o, obd.commands.RPM, force=True)
+    assert r is pooled
+    assert r.command == obd.commands.RPM
+    assert not r.is_null()
+
+    # unwatched commands still get fresh responses
+    assert obd.OBD.query(o, obd.commands.SPEED, force=True) is not pooled
+
+
+class QuietELM(FakeELM):
+    """ FakeELM without the console output, so that it won't skew allocations """
+
+    data = b'response data'
+
+    def send_and_parse(self, cmd):
+        message = Message([])
+        message.data = bytearray(self.data)
+        message.ecu = ECU.ENGINE
+        return [message]
+
+
+class RpmELM(QuietELM):
+    """
+    answers every query with the same full length RPM message (nothing
+    to pad or chop), like an adapter that pools its parsed messages
+    """
+
+    data = b'\x41\x0C\x1A\xF8'
+
+    def __init__(self, portname):
+        super(RpmELM, self).__init__(portname)
+        self.messages = QuietELM.send_and_parse(self, None)
+
+    def send_and_parse(self, cmd):
+        return self.messages
+
+
+def poll_allocations(pooled, cycles=1000):
+    """
+    bytes the API layer allocates per polling cycle, that live on in
+    the responses handed to a callback keeping every one of them
+    """
+    o = obd.Async("/dev/null", pooled=pooled)
+    o.interface = RpmELM("/dev/null")
+    o.watch(obd.commands.RPM, force=True)
+
+    # warm up any lazily built state
+    for _ in range(100):
+        obd.OBD.query(o, obd.commands.RPM, force=True)
+
+    kept = [None] * cycles
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(cycles):
+        kept[i] = obd.OBD.query(o, obd.commands.RPM, force=True)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    assert kept[-1].value == 1726 * obd.Unit.rpm
+
+    api = [tracemalloc.Filter(True, os.path.join(os.path.dirname(obd.__file__), "*"))]
+    stats = after.filter_traces(api).compare_to(before.filter_traces(api), "filename")
+    return sum(stat.size_diff for stat in stats) / float(cycles)
+
+
+def test_pooled_async_allocations():
+    pooled = poll_allocations(pooled=True)
+    unpooled = poll_allocations(pooled=False)
+
+    # an unpooled cycle allocates a new response object (and its
+    # timestamp), a pooled one refills the previous response
+    assert pooled < 8
+    assert unpooled >= 64
+
+
+class CountingELM(QuietELM):
+    """ answers each query with the next count, in the first data byte """
+
+    def __init__(self, portname):
+        super(CountingELM, self).__init__(portname)
+        self.count = 0
+
+    def send_and_parse(self, cmd):
+        self.count = (self.count + 1) % 256
+        message = Message([])
+        message.data = bytearray([self.count])
+        message.ecu = ECU.ENGINE
+        return [message]
+
+
+def test_pooled_value_race():
+    entered = threading.Event()
+    refilled = threading.Event()
+    calls = []
+
+    def decode(messages):
+        calls.append(messages[0].data[0])
+        if len(calls) == 1:
+            # hold the first decode until the response has been refilled
+            entered.set()
+            refilled.wait(5)
+        return messages[0].data[0]
+
+    cmd = OBDCommand("COUNT", "count", b"0100", 1, decode, ECU.ENGINE, False)
+    o = obd.Async("/dev/null", pooled=True)
+    o.interface = CountingELM("/dev/null")
+    o.watch(cmd, force=True)
+
+    r = obd.OBD.query(o, cmd, force=True)
+    old = []
+    reader = threading.Thread(target=lambda: old.append(r.value))
+    reader.start()
+    assert entered.wait(5)
+
+    # the Async thread refills the response while it's being read
+    assert obd.OBD.query(o, cmd, force=True) is r
+    refilled.set()
+    reader.join()
+
+    # the slow reader gets the value it started decoding, and doesn't
+    # leave it in place of the new messages' value
+    assert old == [1]
+    assert r.value == 2
+    assert calls == [1, 2]
+
+
+def test_async_interval():
+    o = obd.Async("/dev/null", delay_cmds=0.01)
+    o.interface = QuietELM("/dev/null")
+
+    counts = {"RPM": 0, "COOLANT_TEMP": 0}
+
+    def counter(name):
+        def callback(r):
+            counts[name] += 1
+        return callback
+
+    o.watch(obd.commands.RPM, callback=counter("RPM"), force=True)
+    o.watch(obd.commands.COOLANT_TEMP, callback=counter("COOLANT_TEMP"), force=True, interval=60)
+    o.start()
+    time.sleep(0.2)
+    o.stop()
+
+    # queried once when first due, then skipped for the rest of the interval
+    assert counts["RPM"] > 5
+    assert counts["COOLANT_TEMP"] == 1
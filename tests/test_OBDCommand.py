@@ -1,3 +1,10 @@
+import copy
+import pickle
+import time
+
+import pytest
+
+import obd
 from obd.OBDCommand import OBDCommand
 from obd.decoders import noop
 from obd.protocols import *
@@ -80,3 +87,128 @@ def test_pid():
 
     cmd = OBDCommand("", "", b"totally not hex", 4, noop, ECU.ENGINE)
     assert cmd.mode == None
+
+
+def test_raw():
+    p = ISO_15765_4_11bit_500k([])
+    messages = p(["7E8 04 41 0C 1A F8"])
+
+    # numeric commands describe their unit up front
+    assert obd.commands.RPM.unit == "revolutions_per_minute"
+    assert obd.commands.COOLANT_TEMP.unit == "degree_Celsius"
+    assert obd.commands.STATUS.unit is None
+
+    r = obd.commands.RPM(messages)
+    raw = obd.commands.RPM(messages, raw=True)
+    assert raw.value == r.value.magnitude
+    assert raw.unit == r.unit
+    assert raw.quantity == r.value
+    assert r.quantity is r.value
+
+    # non-uas() decoders
+    messages = p(["7E8 03 41 05 7B"])
+    raw = obd.commands.COOLANT_TEMP(messages, raw=True)
+    assert raw.value == obd.commands.COOLANT_TEMP(messages).value.magnitude == 83
+
+    # non-numeric commands are decoded normally
+    messages = p(["7E8 06 41 01 00 07 65 00"])
+    assert obd.commands.STATUS(messages, raw=True).value.MIL is False
+
+
+@pytest.mark.slow
+def test_raw_speed():
+    p = ISO_15765_4_11bit_500k([])
+    messages = p(["7E8 04 41 0C 1A F8"])
+
+    # decoding is several times cheaper without pint
+    t = time.perf_counter()
+    for _ in range(2000):
+        obd.commands.RPM(messages).value
+    slow = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for _ in range(2000):
+        obd.commands.RPM(messages, raw=True).value
+    fast = time.perf_counter() - t
+
+    assert fast * 2 < slow
+
+
+def test_lazy_value():
+    calls = []
+
+    def decoder(messages):
+        calls.append(messages)
+        return messages[0].data
+
+    p = SAE_J1850_PWM(["48 6B 10 41 00 FF FF FF FF AA"])
+    messages = p(["48 6B 10 41 00 BE 1F B8 11 AA"])
+
+    # nothing is decoded until the value is read
+    cmd = OBDCommand("", "", b"0100", 6, decoder, ECU.ENGINE)
+    r = cmd(messages)
+    assert calls == []
+    assert r.messages[0].data == bytearray([0x41, 0x00, 0xBE, 0x1F, 0xB8, 0x11])
+
+    # then decoded once, and memoized
+    assert r.value == bytearray([0x41, 0x00, 0xBE, 0x1F, 0xB8, 0x11])
+    assert r.value is r.value
+    assert len(calls) == 1
+
+    # assigned values replace the pending decode
+    r = cmd(messages)
+    r.value = 5
+    assert r.value == 5
+    assert len(calls) == 1
+
+
+def test_immutable():
+    cmd = OBDCommand("Test", "example OBD command", b"0123", 2, noop, ECU.ENGINE)
+    assert cmd.request == ECU_HEADER.ENGINE + b"0123"
+    assert hash(cmd) == hash(ECU_HEADER.ENGINE + b"0123")
+
+    with pytest.raises(AttributeError):
+        cmd.command = b"0124"
+    with pytest.raises(AttributeError):
+        cmd.mode = 2
+    with pytest.raises(AttributeError):
+        del cmd.name
+
+    # equality is still by command and header
+    other = OBDCommand("Other", "", b"0123", 4, noop, ECU.ALL)
+    assert cmd == other
+    assert cmd != OBDCommand("Test", "", b"0123", 2, noop, ECU.ENGINE, header=b"7E1")
+    assert len(set([cmd, other, cmd.clone()])) == 1
+
+    # copies are rebuilt through the constructor
+    for c in (copy.copy(cmd), copy.deepcopy(cmd), pickle.loads(pickle.dumps(cmd))):
+        assert c == cmd
+        assert c.name == cmd.name
+        assert c.mode == 1
+        assert c.pid == 0x23
+
+    # non-OBD commands have no mode or PID
+    cmd = OBDCommand("ELM_VERSION", "", b"ATI", 0, noop)
+    assert cmd.mode is None
+    assert cmd.pid is None
+
+
+def test_copy_command_tables():
+    from binascii import unhexlify
+    from obd.protocols.protocol import Message
+
+    def messages(hex_data):
+        message = Message([])
+        message.data = bytearray(unhexlify(hex_data))
+        message.ecu = ECU.ENGINE
+        return [message]
+
+    # the real tables' decoders survive copies, and decode the same
+    for cmd, data in ((obd.commands.RPM, "410C1AF8"),
+                      (obd.commands.SPEED, "410D32"),
+                      (obd.commands.MAF, "4110ABCD"),
+                      (obd.commands.GET_DTC, "430201330104")):
+        for c in (copy.copy(cmd), copy.deepcopy(cmd), pickle.loads(pickle.dumps(cmd))):
+            assert c == cmd
+            assert c.name == cmd.name
+            assert c(messages(data)).value == cmd(messages(data)).value
@@ -0,0 +1,101 @@
+"""
+    Tests for the NumPy batch decoder, against the per-message path
+"""
+
+import random
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import obd
+from obd import batch
+from obd.protocols import ISO_15765_4_11bit_500k
+
+
+COMMANDS = [
+    obd.commands.RPM,
+    obd.commands.SPEED,
+    obd.commands.ENGINE_LOAD,
+    obd.commands.COOLANT_TEMP,
+    obd.commands.SHORT_FUEL_TRIM_1,
+    obd.commands.TIMING_ADVANCE,
+    obd.commands.MAF,
+    obd.commands.EVAP_VAPOR_PRESSURE,
+    obd.commands.CATALYST_TEMP_B1S1,
+    obd.commands.COMMANDED_EQUIV_RATIO,
+    obd.commands.FUEL_RATE,
+]
+
+
+def random_lines(cmd, n, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        payload = [rng.randrange(256) for _ in range(cmd.bytes - 2)]
+        data = [0x40 + cmd.mode, cmd.pid] + payload
+        lines.append("7E8 %02X " % len(data) + " ".join("%02X" % b for b in data))
+    return lines
+
+
+def test_supports():
+    for cmd in COMMANDS:
+        assert batch.supports(cmd)
+    assert not batch.supports(obd.commands.STATUS)
+    assert not batch.supports(obd.commands.GET_DTC)
+
+
+def test_matches_per_message():
+    p = ISO_15765_4_11bit_500k([])
+
+    for cmd in COMMANDS:
+        lines = random_lines(cmd, 50)
+        columns = batch.decode_lines(cmd, lines)
+
+        assert columns.valid.all()
+        for line, value in zip(lines, columns.values):
+            r = cmd(p([line]))
+            assert abs(r.value.magnitude - value) < 1e-9
+            assert r.unit == columns.unit
+
+
+def test_invalid_rows():
+    lines = [
+        "7E8 04 41 0C 1A F8",  # valid
+        "7E8 03 41 0D 20",  # another PID
+        "7E8 10 14 49 02 01 31 44 34",  # first frame of a multi-frame message
+        "7E8 04 41 0C 1A F",  # odd length
+        "7E0 04 41 0C 1A F8",  # request from the tester
+    ]
+    columns = batch.decode_lines(obd.commands.RPM, lines)
+    assert list(columns.valid) == [True, False, False, False, False]
+    assert columns.values[0] == 1726.0
+    assert np.isnan(columns.values[1:]).all()
+
+
+def test_decode_data():
+    data = np.array([[0x41, 0x05, 0x7B], [0x41, 0x05, 0x00]], dtype=np.uint8)
+    columns = batch.decode_data(obd.commands.COOLANT_TEMP, data)
+    assert list(columns.values) == [83.0, -40.0]
+
+    with pytest.raises(ValueError):
+        batch.decode_data(obd.commands.STATUS, data)
+
+
+@pytest.mark.slow
+def test_throughput():
+    cmd = obd.commands.RPM
+    lines = random_lines(cmd, 20000)
+    p = ISO_15765_4_11bit_500k([])
+
+    t = time.perf_counter()
+    batch.decode_lines(cmd, lines)
+    fast = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for line in lines[:2000]:
+        cmd(p([line])).value
+    slow = (time.perf_counter() - t) * 10
+
+    assert fast * 10 < slow
@@ -0,0 +1,141 @@
+"""
+    Tests for the decode result cache
+"""
+
+import threading
+
+import obd
+from obd import DecodeCache
+from obd.OBDResponse import MonitorTest
+from obd.protocols import ISO_15765_4_11bit_500k
+
+
+p = ISO_15765_4_11bit_500k([])
+
+
+def test_shared_value():
+    cache = DecodeCache()
+
+    r1 = obd.commands.COOLANT_TEMP(p(["7E8 03 41 05 7B"]), raw=True, cache=cache)
+    assert r1.value == 83  # decoded and cached on first read
+
+    r2 = obd.commands.COOLANT_TEMP(p(["7E8 03 41 05 7B"]), raw=True, cache=cache)
+    assert r1.value is r2.value
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+    # a new payload is decoded again
+    r3 = obd.commands.COOLANT_TEMP(p(["7E8 03 41 05 7C"]), raw=True, cache=cache)
+    assert r3.value == 84
+    assert len(cache) == 2
+    assert cache.misses == 2
+
+
+def test_mutable_values_are_not_shared():
+    cache = DecodeCache()
+
+    # Quantities, which can be converted in place
+    r1 = obd.commands.COOLANT_TEMP(p(["7E8 03 41 05 7B"]), cache=cache)
+    r1.value.ito("degF")
+    r2 = obd.commands.COOLANT_TEMP(p(["7E8 03 41 05 7B"]), cache=cache)
+    assert r2.value.magnitude == 83
+    assert str(r2.value.units) == "degree_Celsius"
+
+    # trouble code lists
+    r1 = obd.commands.GET_DTC(p(["7E8 06 43 02 01 33 01 04"]), cache=cache)
+    r1.value.append(("P0000", "appended"))
+    r2 = obd.commands.GET_DTC(p(["7E8 06 43 02 01 33 01 04"]), cache=cache)
+    assert [code for code, _ in r2.value] == ["P0133", "P0104"]
+
+    # Status objects, and their tests
+    r1 = obd.commands.STATUS(p(["7E8 06 41 01 83 07 65 04"]), cache=cache)
+    r1.value.MIL = False
+    r1.value.MISFIRE_MONITORING.complete = False
+    r2 = obd.commands.STATUS(p(["7E8 06 41 01 83 07 65 04"]), cache=cache)
+    assert r2.value is not r1.value
+    assert r2.value.MIL
+    assert r2.value.MISFIRE_MONITORING.complete
+
+    # Mode 06 monitors
+    r1 = obd.commands.MONITOR_O2_B1S1(p(["7E8 06 46 01 01 0A 0B B0"]), cache=cache)
+    test = MonitorTest()
+    test.tid = 0x02
+    r1.value.add_test(test)
+    assert r1.value[0x02] is test
+    r2 = obd.commands.MONITOR_O2_B1S1(p(["7E8 06 46 01 01 0A 0B B0"]), cache=cache)
+    assert r2.value[0x02].is_null()
+
+    assert len(cache) == 0
+
+
+def test_keys():
+    cache = DecodeCache()
+    messages = p(["7E8 04 41 0C 1A F8"])
+
+    # raw and Quantity values are kept apart (and Quantities aren't cached)
+    assert obd.commands.RPM(messages, raw=True, cache=cache).value == 1726
+    assert obd.commands.RPM(messages, cache=cache).value == 1726 * obd.Unit.rpm
+    assert obd.commands.RPM(messages, raw=True, cache=cache).value == 1726
+    assert cache.hits == 1
+    assert len(cache) == 1
+
+    # so are other ECUs
+    messages = p(["7E9 04 41 0C 1A F8"])
+    obd.commands.RPM(messages, raw=True, cache=cache).value
+    assert cache.hits == 1
+
+
+def test_unread_values_are_not_cached():
+    cache = DecodeCache()
+    obd.commands.RPM(p(["7E8 04 41 0C 1A F8"]), cache=cache)
+    assert len(cache) == 0
+
+
+def test_lru():
+    cache = DecodeCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)  # evicts "b", the least recently used
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_memory_cap():
+    cache = DecodeCache(max_bytes=2000)
+    for i in range(100):
+        cache.put(i, bytes(100))
+        assert cache.size <= 2000
+    assert 0 < len(cache) < 100
+
+    # values larger than the whole cache are skipped
+    cache.put("big", bytes(4000))
+    assert "big" not in cache
+
+
+def test_threads():
+    cache = DecodeCache(max_entries=16)
+    messages = [p(["7E8 04 41 0C 1A %02X" % i]) for i in range(32)]
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(20):
+                for m in messages:
+                    r = obd.commands.RPM(m, raw=True, cache=cache)
+                    assert r.value == (0x1A00 + m[0].data[3]) / 4.0
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(cache) <= 16
+    assert cache.hits + cache.misses == 4 * 20 * 32
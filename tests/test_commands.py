@@ -1,3 +1,5 @@
+import pytest
+
 import obd
 from obd.decoders import pid
 
@@ -110,3 +112,60 @@ def test_pid_getters():
 
             if cmd.decode == pid:
                 assert cmd in pid_getters
+
+
+def test_lookup():
+    assert obd.commands.from_request(b"010C") == obd.commands.RPM
+    assert obd.commands.from_request("010C") == obd.commands.RPM
+    assert obd.commands.from_request(b"ATRV") == obd.commands.ELM_VOLTAGE
+    assert obd.commands.from_request(b"010C", header=b"7E1") is None
+    assert obd.commands.from_request(b"01FF") is None
+
+    assert obd.commands.from_pid(1, 12) == obd.commands.RPM
+    assert obd.commands.from_pid(2, 12) == obd.commands.DTC_RPM
+    assert obd.commands.from_pid(3, None) == obd.commands.GET_DTC
+    assert obd.commands.from_pid(1, 12, header=b"7E1") is None
+
+    for command_list in obd.commands.modes:
+        for cmd in command_list:
+            if cmd is not None:
+                assert obd.commands.from_request(cmd.command) is cmd
+                assert obd.commands.from_pid(cmd.mode, cmd.pid) is cmd
+
+
+def test_add_command():
+    from obd import OBDCommand
+    from obd.decoders import noop
+
+    commands = obd.commands.__class__()  # don't touch the shared tables
+    custom = OBDCommand("TRANS_TEMP", "Transmission temperature", b"221E1C", 0, noop, header=b"7E1")
+    other = OBDCommand("TRANS_TEMP_2", "Transmission temperature", b"221E1C", 0, noop)
+
+    assert not commands.has_command(custom)
+    commands.add_command(custom)
+    commands.add_command(other)
+
+    assert commands.has_command(custom)
+    assert commands.has_name("TRANS_TEMP")
+    assert commands.TRANS_TEMP is custom
+    assert commands["TRANS_TEMP"] is custom
+    assert commands.from_request(b"221E1C", header=b"7E1") is custom
+    assert commands.from_request(b"221E1C") is other
+    assert commands.from_pid(0x22, 0x1E1C, header=b"7E1") is custom
+
+    # replacing a command by name drops its old request
+    renamed = OBDCommand("TRANS_TEMP", "Transmission temperature", b"221E1D", 0, noop, header=b"7E1")
+    commands.add_command(renamed)
+    assert commands.TRANS_TEMP is renamed
+    assert commands.from_request(b"221E1C", header=b"7E1") is None
+    assert not commands.has_command(custom)
+
+    # replacing a built in command by request
+    rpm = OBDCommand("MY_RPM", "Engine RPM", b"010C", 4, noop)
+    commands.add_command(rpm)
+    assert commands.from_pid(1, 12) is rpm
+    assert not commands.has_name("RPM")
+    assert obd.commands.from_pid(1, 12) is obd.commands.RPM
+
+    with pytest.raises(ValueError):
+        commands.add_command(OBDCommand("lower", "", b"0100", 0, noop))
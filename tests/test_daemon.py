@@ -0,0 +1,159 @@
+"""
+    Tests for the Unix socket daemon
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+import obd
+from obd.daemon import (OBDDaemon, OBDClient, encode_response, decode_response,
+                        pack, OP_WATCH, MAX_PAYLOAD)
+from obd.protocols.protocol import Frame, Message
+
+from test_OBD import FakeELM, QuietELM
+
+
+pytestmark = pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"),
+                                reason="Unix sockets are not available")
+
+
+@pytest.fixture
+def daemon():
+    connection = obd.Async("/dev/null", delay_cmds=0.01)
+    connection.interface = FakeELM("/dev/null")
+    connection.supported_commands.add(obd.commands.RPM)
+    connection.supported_commands.add(obd.commands.SPEED)
+
+    path = os.path.join(tempfile.mkdtemp(), "obd.sock")
+    d = OBDDaemon(connection, path)
+    d.start()
+    yield d
+    d.stop()
+    connection.stop()
+
+
+def test_encoding():
+    message = Message([Frame("7E8 04 41 0C 1A F8")])
+    message.data = bytearray(b"\x41\x0C\x1A\xF8")
+    message.ecu = obd.ECU.ENGINE
+
+    r = obd.commands.RPM([message])
+    r2 = decode_response(obd.commands.RPM, encode_response(r))
+
+    assert r2.value == r.value
+    assert r2.time == r.time
+    assert r2.messages[0].ecu == obd.ECU.ENGINE
+    assert r2.messages[0].raw() == message.raw()
+
+    # null responses survive the trip
+    assert decode_response(obd.commands.RPM, encode_response(obd.OBDResponse())).is_null()
+
+
+def test_query(daemon):
+    client = OBDClient(daemon.path)
+    r = client.query(obd.commands.RPM)
+    assert not r.is_null()
+    assert r.command == obd.commands.RPM
+    client.close()
+
+
+def test_watch(daemon):
+    client = OBDClient(daemon.path)
+    received = threading.Event()
+
+    client.watch(obd.commands.RPM, callback=lambda r: received.set())
+    assert received.wait(2.0)
+    assert not client.query(obd.commands.RPM).is_null()
+    assert daemon.connection.running
+
+    client.unwatch(obd.commands.RPM)
+    client.close()
+
+
+def test_unsupported(daemon):
+    client = OBDClient(daemon.path)
+    client.watch(obd.commands.COOLANT_TEMP)  # never marked as supported
+    assert client.query(obd.commands.COOLANT_TEMP).is_null()
+    client.close()
+
+
+def test_many_clients(daemon):
+    clients = [OBDClient(daemon.path) for _ in range(12)]
+    counts = [0] * len(clients)
+
+    def counter(i):
+        def callback(r):
+            counts[i] += 1
+        return callback
+
+    # every client watches the same commands, which are merged into one loop
+    for i, client in enumerate(clients):
+        client.watch(obd.commands.RPM, callback=counter(i))
+        client.watch(obd.commands.SPEED)
+
+    time.sleep(0.5)
+    assert all(n > 0 for n in counts)
+
+    # queries from all clients at once
+    for client in clients:
+        assert not client.query(obd.commands.SPEED).is_null()
+
+    for client in clients:
+        client.close()
+
+
+def test_stalled_client():
+    connection = obd.Async("/dev/null", delay_cmds=0)
+    connection.interface = QuietELM("/dev/null")
+    connection.supported_commands.add(obd.commands.RPM)
+
+    path = os.path.join(tempfile.mkdtemp(), "obd.sock")
+    d = OBDDaemon(connection, path, max_queue=8)
+    d.start()
+
+    # watches RPM, and never reads
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.connect(path)
+    stalled.sendall(pack(OP_WATCH, 1, b"RPM"))
+
+    client = OBDClient(path)
+    received = [0]
+
+    def callback(r):
+        received[0] += 1
+
+    client.watch(obd.commands.RPM, callback=callback)
+
+    # the other client keeps getting updates while the stalled one backs up
+    time.sleep(1.0)
+    before = received[0]
+    time.sleep(0.5)
+    assert received[0] > before > 0
+
+    # and the stalled client has been disconnected: the socket ends
+    stalled.settimeout(5.0)
+    while stalled.recv(65536):
+        pass
+    stalled.close()
+
+    client.close()
+    d.stop()
+    connection.stop()
+
+
+def test_oversized():
+    message = Message([])
+    message.data = bytearray(0x10000)
+    message.ecu = obd.ECU.ENGINE
+    r = obd.OBDResponse(obd.commands.RPM, [message])
+
+    # lengths that don't fit the wire format are refused, not wrapped
+    with pytest.raises(ValueError):
+        encode_response(r)
+    with pytest.raises(ValueError):
+        pack(OP_WATCH, 1, bytes(MAX_PAYLOAD + 1))
@@ -1,7 +1,15 @@
+import copy
+import functools
+import pickle
+import time
 from binascii import unhexlify
 
+import pytest
+
+import obd
 import obd.decoders as d
-from obd.UnitsAndScaling import Unit
+from obd.OBDResponse import NULL_MONITOR_TEST, NULL_STATUS_TEST, Status
+from obd.UnitsAndScaling import Unit, UAS, UAS_IDS
 from obd.codes import BASE_TESTS, COMPRESSION_TESTS, SPARK_TESTS, TEST_IDS
 from obd.protocols.protocol import Frame, Message
 
@@ -49,6 +57,57 @@ def test_pid():
     assert d.pid(m("4100" + "11")).bits == "00010001"
 
 
+def test_uas():
+    # compiled decoders match the generic conversion for every UAS ID
+    for id_, conversion in UAS_IDS.items():
+        if not isinstance(conversion, UAS):
+            continue
+        decoder = d.uas(id_)
+        assert decoder.uas_id == id_
+        for data in ("0000", "0001", "7FFF", "8000", "FFFF"):
+            assert decoder(m("4100" + data)) == conversion(unhexlify(data))
+            assert decoder.raw(m("4100" + data)) == conversion.raw(unhexlify(data))
+
+    assert d.uas(0x2E)(m("410001")) is True
+
+
+@pytest.mark.slow
+def test_uas_speed():
+    # compiled decoders skip the generic path:
+    # partial() --> UAS_IDS lookup --> UAS.raw()
+    def decode_uas(messages, id_):
+        return UAS_IDS[id_].raw(messages[0].data[2:])
+
+    messages = m("410C1AF8")
+    generic = functools.partial(decode_uas, id_=0x07)
+    compiled = d.uas(0x07).raw
+    assert generic(messages) == compiled(messages)
+
+    def bench(f, *args):
+        best = None
+        for _ in range(5):
+            t = time.perf_counter()
+            for _ in range(2000):
+                f(*args)
+            t = time.perf_counter() - t
+            best = t if best is None else min(best, t)
+        return best
+
+    assert bench(compiled, messages) < 0.9 * bench(generic, messages)
+
+
+def test_uas_pickle():
+    # the compiled decoders are rebuilt from their UAS ID
+    for cmd in (obd.commands.RPM, obd.commands.SPEED, obd.commands.MAF, obd.commands.RUN_TIME):
+        for decoder in (pickle.loads(pickle.dumps(cmd.decode)), copy.deepcopy(cmd.decode)):
+            assert decoder.uas_id == cmd.decode.uas_id
+            assert decoder(m("410C1AF8")) == cmd.decode(m("410C1AF8"))
+
+    rpm = pickle.loads(pickle.dumps(obd.commands.RPM))
+    assert rpm == obd.commands.RPM
+    assert rpm.decode(m("410C1AF8")) == obd.commands.RPM.decode(m("410C1AF8"))
+
+
 def test_percent():
     assert d.percent(m("4100" + "00")) == 0.0 * Unit.percent
     assert d.percent(m("4100" + "FF")) == 100.0 * Unit.percent
@@ -204,21 +263,23 @@ def test_status():
     assert status.DTC_count == 3
     assert status.ignition_type == "spark"
 
+    # the tests are built when first read, so are looked up with getattr
+    # (they're only in status.__dict__ after that)
     for name in BASE_TESTS:
-        assert status.__dict__[name].available
-        assert status.__dict__[name].complete
+        assert getattr(status, name).available
+        assert getattr(status, name).complete
 
     # check that NONE of the compression tests are available
     for name in COMPRESSION_TESTS:
         if name and name not in SPARK_TESTS:  # there's one test name in common between spark/compression
-            assert not status.__dict__[name].available
-            assert not status.__dict__[name].complete
+            assert not getattr(status, name).available
+            assert not getattr(status, name).complete
 
     # check that ALL of the spark tests are available
     for name in SPARK_TESTS:
         if name:
-            assert status.__dict__[name].available
-            assert status.__dict__[name].complete
+            assert getattr(status, name).available
+            assert getattr(status, name).complete
 
     # a different test
     status = d.status(m("4100" + "00790303"))
@@ -239,8 +300,8 @@ def test_status():
     # check that NONE of the spark tests are available
     for name in SPARK_TESTS:
         if name and name not in COMPRESSION_TESTS:
-            assert not status.__dict__[name].available
-            assert not status.__dict__[name].complete
+            assert not getattr(status, name).available
+            assert not getattr(status, name).complete
 
     # availability
     assert status.NMHC_CATALYST_MONITORING.available
@@ -259,9 +320,25 @@ def test_status():
     assert status.EGR_VVT_SYSTEM_MONITORING.complete
 
 
+def test_status_lazy():
+    status = d.status(m("4100" + "00790303"))
+    assert "MISFIRE_MONITORING" not in status.__dict__  # not built until looked up
+    assert status.MISFIRE_MONITORING is status.MISFIRE_MONITORING
+    assert status.__dict__["MISFIRE_MONITORING"] is status.MISFIRE_MONITORING
+
+    # tests for the other ignition type are the shared null test
+    assert status.CATALYST_MONITORING is NULL_STATUS_TEST
+    assert Status().MISFIRE_MONITORING is NULL_STATUS_TEST
+    with pytest.raises(AttributeError):
+        NULL_STATUS_TEST.available = True
+    with pytest.raises(AttributeError):
+        status.NOT_A_TEST
+
+
 def test_single_dtc():
     assert d.single_dtc(m("4100" + "0104")) == ("P0104", "Mass or Volume Air Flow Circuit Intermittent")
     assert d.single_dtc(m("4100" + "4123")) == ("C0123", "")  # reverse back into correct bit-order
+    assert d.single_dtc(m("4100" + "0A00")) == ("P0A00", "Motor Electronics Coolant Temperature Sensor Circuit")
     assert d.single_dtc(m("4100" + "01")) is None
     assert d.single_dtc(m("4100" + "010400")) is None
 
@@ -368,3 +445,31 @@ def test_monitor():
     # make sure that the standard tests are null
     for tid in TEST_IDS:
         assert v[tid].is_null()
+
+
+def test_monitor_lazy():
+    records = []
+
+    def parse(record):
+        records.append(record)
+        return d.parse_monitor_test(record)
+
+    v = d.monitor(m("41" + "01010A0BB00BB00BB00105100048000000640185240096004BFFFF"))
+    v._parse = parse
+    assert records == []  # nothing parsed yet
+
+    assert "RTL_SWITCH_TIME" not in v.__dict__
+    assert v.RTL_SWITCH_TIME is v[0x05]
+    assert v.__dict__["RTL_SWITCH_TIME"] is v[0x05]
+    assert len(records) == 3  # parsed once, on first look up
+    assert len(v) == 3
+    assert len(records) == 3
+
+    # unreported tests are the shared null test
+    assert v.MISFIRE_COUNT is NULL_MONITOR_TEST
+    assert v[0x0C] is NULL_MONITOR_TEST
+    assert v["MISFIRE_COUNT"] is NULL_MONITOR_TEST
+    with pytest.raises(AttributeError):
+        NULL_MONITOR_TEST.value = 1
+    with pytest.raises(AttributeError):
+        v.NOT_A_TEST
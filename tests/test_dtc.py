@@ -0,0 +1,58 @@
+"""
+    Tests for the DTC code lookup and description tables
+"""
+
+from obd.codes import DTC
+from obd.dtc import DTCTable, STANDARD_TABLE, dtc_code, write_table
+
+
+def test_dtc_code():
+    for value in range(0x10000):
+        a = value >> 8
+        b = value & 0xFF
+        code = "PCBU"[a >> 6] + str((a >> 4) & 0b0011) + ("%02X%02X" % (a, b))[1:4]
+        assert dtc_code(value) == code
+
+
+def test_standard_table():
+    assert DTC["P0104"] == "Mass or Volume Air Flow Circuit Intermittent"
+    assert DTC.get("P0A00") == "Motor Electronics Coolant Temperature Sensor Circuit"
+    assert DTC.get("C0123", "") == ""
+    assert "P0001" in DTC
+    assert "P9999" not in DTC
+    assert 12 not in DTC
+
+    # every entry in the file can be found by binary search
+    with open(STANDARD_TABLE, "rb") as f:
+        lines = f.read().decode("utf-8").splitlines()
+    assert len(DTC) == len(lines) > 2000
+    for line in lines:
+        code, desc = line.split("\t")
+        assert DTC[code] == desc
+
+
+def test_packs(tmp_path):
+    path = str(tmp_path / "pack.tsv")
+    write_table({
+        "P1234": "Manufacturer Specific Fault",
+        "P0104": "Overridden Description",
+    }, path)
+
+    table = DTCTable()
+    table.add_pack(path)
+
+    assert table["P1234"] == "Manufacturer Specific Fault"
+    assert table["P0104"] == "Overridden Description"
+    assert table["P0001"] == DTC["P0001"]
+    assert len(table) == len(DTC) + 1
+
+    # the shared standard table isn't affected
+    assert "P1234" not in DTC
+
+
+def test_empty_table(tmp_path):
+    path = str(tmp_path / "empty.tsv")
+    write_table({}, path)
+    table = DTCTable(path)
+    assert len(table) == 0
+    assert table.get("P0001") is None
@@ -0,0 +1,64 @@
+"""
+    Import time budget for the obd package
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cumulative microseconds for "import obd", as reported by -X importtime.
+# About 50ms on a desktop, building the pint registry alone took 500ms,
+# so this is only a loose bound for slow machines (the registry not being
+# built at all is checked by test_lazy_modules)
+IMPORT_BUDGET_US = 1000000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code, *flags):
+    """ runs code in a fresh interpreter, returning its (stdout, stderr) """
+    p = subprocess.Popen([sys.executable] + list(flags) + ["-c", code], cwd=ROOT,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         universal_newlines=True)
+    stdout, stderr = p.communicate()
+    assert p.returncode == 0, stderr
+    return stdout, stderr
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime needs Python 3.7")
+def test_import_time():
+    best = None
+    for _ in range(3):
+        stderr = run("import obd", "-X", "importtime")[1]
+        for line in stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == "obd":
+                t = int(fields[1])
+                best = t if best is None else min(best, t)
+    assert best is not None
+    assert best < IMPORT_BUDGET_US, "import obd took %d us" % best
+
+
+def test_lazy_modules():
+    code = "import sys, obd; print(obd.Unit.loaded); print(' '.join(sorted(sys.modules)))"
+    loaded, modules = run(code)[0].splitlines()
+    assert loaded == "False"  # the UnitRegistry isn't built
+    out = modules.split()
+    assert not [name for name in out if name == "pint" or name.startswith("pint.")]
+    assert "obd.decoders" not in out
+    assert "obd.command_tables" not in out
+
+
+def test_first_use():
+    code = "\n".join([
+        "import obd",
+        "assert obd.commands.RPM.unit == 'revolutions_per_minute'",
+        "assert obd.commands[1][12] is obd.commands.RPM",
+        "assert 'RPM' in obd.commands",
+        "assert obd.Unit('100 kph').magnitude == 100",
+        "assert obd.codes.DTC['P0104']",
+    ])
+    run(code)
@@ -193,3 +193,64 @@ def test_multi_line_mode_03():
 
 def test_can_29():
     pass
+
+
+def test_stream():
+    """
+        Lines fed one at a time should give the same messages as a batch,
+        and multi-frame messages should complete with their last frame.
+    """
+
+    for protocol_ in CAN_11_PROTOCOLS:
+        p = protocol_([])
+
+        test_case = [
+            "7E8 10 14 49 02 01 31 44 34",
+            "7E9 06 41 00 00 01 02 03",
+            "7E8 21 47 50 30 30 52 35 35",
+            "7E8 22 42 31 32 33 34 35 36",
+        ]
+
+        stream = p.stream()
+        stream.feed(test_case[0])
+        stream.feed(test_case[1])
+        stream.feed(test_case[2])
+        assert len(stream.ready) == 0
+
+        stream.feed(test_case[3])
+        assert 0x0 in stream.ready  # done before finish() is called
+
+        r = stream.finish()
+        assert len(r) == 2
+        check_message(r[0], 3, 0x0, bytearray(b"I\x02\x011D4GP00R55B123456"))
+        check_message(r[1], 1, 0x1, [0x41, 0x00, 0x00, 0x01, 0x02, 0x03])
+
+        assert [m.data for m in p(test_case)] == [m.data for m in r]
+
+
+def test_stream_out_of_order():
+    for protocol_ in CAN_11_PROTOCOLS:
+        p = protocol_([])
+
+        # consecutive frames ahead of their first frame
+        stream = p.stream()
+        for line in ["7E8 22 0B 0C 0D 0E 0F 10 11",
+                     "7E8 21 04 05 06 07 08 09 0A",
+                     "7E8 10 14 49 04 00 01 02 03"]:
+            stream.feed(line)
+
+        r = stream.finish()
+        assert len(r) == 1
+        check_message(r[0], 3, 0x0, [0x49, 0x04] + list(range(18)))
+
+        # duplicated frames are never contiguous
+        r = p(["7E8 10 14 49 04 00 01 02 03",
+               "7E8 21 04 05 06 07 08 09 0A",
+               "7E8 21 04 05 06 07 08 09 0A"])
+        assert len(r) == 0
+
+        # as are messages with two first frames
+        r = p(["7E8 10 14 49 04 00 01 02 03",
+               "7E8 10 14 49 04 00 01 02 03",
+               "7E8 21 04 05 06 07 08 09 0A"])
+        assert len(r) == 0
@@ -0,0 +1,149 @@
+"""
+    Tests for the bitset backed set of supported commands
+"""
+
+import random
+
+import obd
+from obd.OBDCommand import OBDCommand
+from obd.decoders import noop
+from obd.supported import SupportedCommands
+from obd.utils import BitArray
+
+
+def reference(mode, offset, bits):
+    """ the set that OBD.__load_commands used to build, one bit at a time """
+    supported = set()
+    for i in bits.set_bits():
+        pid = offset + i + 1
+        if obd.commands.has_pid(mode, pid):
+            supported.add(obd.commands[mode][pid])
+    return supported
+
+
+def test_add_bitmap():
+    rng = random.Random(0)
+    for getter in obd.commands.pid_getters():
+        for _ in range(20):
+            bits = BitArray(bytes(rng.randrange(256) for _ in range(4)))
+            s = SupportedCommands()
+            s.add_bitmap(getter.mode, getter.pid, bits)
+
+            expected = reference(getter.mode, getter.pid, bits)
+            assert s == expected
+            assert set(s) == expected
+            assert len(s) == len(expected)
+            for pid in range(getter.pid + 1, getter.pid + 33):
+                assert s.has_pid(getter.mode, pid) == any(c.pid == pid for c in expected)
+
+
+def test_set_api():
+    custom = OBDCommand("CUSTOM", "custom", b"2201", 0, noop)
+    other_header = obd.commands.RPM.clone()  # built from the same table entry
+
+    s = SupportedCommands([obd.commands.ELM_VOLTAGE, obd.commands.GET_DTC])
+    assert obd.commands.ELM_VOLTAGE in s
+    assert obd.commands.GET_DTC in s
+    assert s.has_pid(3, 0)  # lone commands sit at PID 0
+    assert obd.commands.RPM not in s
+    assert "RPM" not in s
+
+    s.add(obd.commands.RPM)
+    s.add(custom)
+    assert obd.commands.RPM in s
+    assert other_header in s  # equal commands are members, as with set()
+    assert custom in s
+    assert len(s) == 4
+
+    s.discard(obd.commands.RPM)
+    s.discard(custom)
+    assert obd.commands.RPM not in s
+    assert custom not in s
+    assert set(s) == {obd.commands.ELM_VOLTAGE, obd.commands.GET_DTC}
+
+    c = s.copy()
+    c.update([obd.commands.SPEED])
+    assert obd.commands.SPEED in c
+    assert obd.commands.SPEED not in s
+
+    s.clear()
+    assert len(s) == 0
+
+
+def test_intersection():
+    a = SupportedCommands([obd.commands.RPM, obd.commands.SPEED, obd.commands.ELM_VOLTAGE])
+    b = SupportedCommands([obd.commands.SPEED, obd.commands.ELM_VOLTAGE, obd.commands.MAF])
+
+    both = a & b
+    assert isinstance(both, SupportedCommands)
+    assert both.mask(1) == 1 << obd.commands.SPEED.pid
+    assert set(both) == {obd.commands.SPEED, obd.commands.ELM_VOLTAGE}
+
+    wanted = [obd.commands.RPM, obd.commands.MAF, obd.commands.COOLANT_TEMP]
+    assert set(a.intersection(wanted)) == {obd.commands.RPM}
+    assert set(a & set(wanted)) == {obd.commands.RPM}
+    assert set(set(wanted) & a) == {obd.commands.RPM}
+
+
+def test_named_set_methods():
+    custom = OBDCommand("CUSTOM", "custom", b"2201", 0, noop)
+    a = SupportedCommands([obd.commands.RPM, obd.commands.SPEED, custom])
+    wanted = [obd.commands.SPEED, obd.commands.MAF]
+
+    u = a.union(wanted, (obd.commands.ELM_VOLTAGE,))
+    assert isinstance(u, SupportedCommands)
+    assert set(u) == set(a) | {obd.commands.MAF, obd.commands.ELM_VOLTAGE}
+    assert set(a) == {obd.commands.RPM, obd.commands.SPEED, custom}
+
+    d = a.difference(wanted)
+    assert isinstance(d, SupportedCommands)
+    assert set(d) == {obd.commands.RPM, custom}
+    assert set(a.difference()) == set(a)
+    assert a.difference() is not a
+
+    x = a.symmetric_difference(wanted)
+    assert set(x) == {obd.commands.RPM, custom, obd.commands.MAF}
+
+    assert a.issubset(u)
+    assert a.issubset(list(u))
+    assert not a.issubset(wanted)
+    assert u.issuperset([obd.commands.MAF, custom])
+    assert not a.issuperset(wanted)
+    assert a.isdisjoint([obd.commands.MAF])
+    assert not a.isdisjoint(wanted)
+
+    # the named methods agree with the operators
+    b = SupportedCommands(wanted)
+    assert set(a.union(b)) == set(a | b)
+    assert set(a.difference(b)) == set(a - b)
+    assert set(a.symmetric_difference(b)) == set(a ^ b)
+    assert a.issubset(b) == (a <= b)
+
+
+def test_load_commands():
+    from obd.protocols.protocol import Message
+    from test_OBD import QuietELM
+
+    class PidELM(QuietELM):
+        """ supports PIDs 0x01-0x20 of mode 1, as given by this 0100 response """
+        def send_and_parse(self, cmd):
+            if not cmd.startswith(b"0100"):
+                return []
+            message = Message([])
+            message.data = bytearray(b"\x41\x00\xBE\x1F\xA8\x13")
+            message.ecu = obd.ECU.ENGINE
+            return [message]
+
+    o = obd.OBD("/dev/null")
+    o.interface = PidELM("/dev/null")
+    o.supported_commands = SupportedCommands(obd.commands.base_commands())
+    o._OBD__load_commands()
+
+    bits = BitArray(b"\xBE\x1F\xA8\x13")
+    for pid in range(1, 0x21):
+        expected = bits[pid - 1] and obd.commands.has_pid(1, pid)
+        assert o.supports(obd.commands[1][pid]) == expected
+        if obd.commands.has_pid(2, pid):
+            assert o.supports(obd.commands[2][pid]) == expected
+    assert o.supports(obd.commands.RPM)
+    assert not o.supports(obd.commands.PIDS_C)  # 0120 got no response
@@ -662,3 +662,18 @@ def test_FE():
     assert UAS_IDS[0xFE](b("0000")) == 0 * Unit.pascal
     assert UAS_IDS[0xFE](b("0004")) == 1 * Unit.pascal
     assert UAS_IDS[0xFE](b("7FFF")) == 8191.75 * Unit.pascal
+
+
+def test_unit_names():
+    # the unit names are written out so pint needn't be loaded to get them,
+    # and must match what pint prints for the resolved unit
+    import obd.decoders as d
+
+    for conversion in UAS_IDS.values():
+        if hasattr(conversion, "unit"):
+            assert str(Unit.Unit(conversion.unit)) == conversion.unit
+
+    for name in dir(d):
+        decoder = getattr(d, name)
+        if callable(decoder) and hasattr(decoder, "unit"):
+            assert str(Unit.Unit(decoder.unit)) == decoder.unit
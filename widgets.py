@@ -0,0 +1,335 @@
+"""
+Config driven pages for the dashboard
+
+The layout of each page is read from a JSON config (dash.json): the
+fixed labels and images drawn behind it, and the widgets showing live
+values. Each widget binds a value name to an OBD command (by its name
+in obd.commands), with a conversion from acquisition.CONVERSIONS, a
+default, and how often it needs refreshing (in seconds, left out for as
+often as possible). For example:
+
+    {"type": "value", "name": "coolant_temp", "command": "COOLANT_TEMP",
+     "convert": "fahrenheit", "default": 160, "refresh": 5,
+     "font": "font", "color": "silver", "pos": [500, 190]}
+
+A value shown by several widgets (the RPM needle and readout) only
+needs its command given once. An x coordinate of "center" (in a pos, or
+a needle's center) centers the image or needle across the screen,
+whatever its width. Widget types:
+
+    value   the value as text, format (str.format) with colors, a list
+            of [threshold, color] to switch to at or above threshold
+    needle  a needle on a gauge, rotated about center from angles[0] at
+            values[0] to angles[1] at values[1] (see gauge.py), following
+            a prediction of the value between readings (see predict.py)
+    codes   the trouble codes, one per line
+
+Only the channels of the page on screen are polled, see
+WidgetEngine.page_channels().
+"""
+
+import json
+
+import pygame
+
+from acquisition import Channel
+from constants import *
+from gauge import NeedleAtlas
+from glyphs import glyph_font
+from predict import Predictor
+
+
+# names the config can use for fonts, colors and images
+FONTS = {
+    "small": small_font,
+    "font": font,
+    "big": big_font,
+    "rpm": rpm_font,
+}
+
+COLORS = {
+    "red": red,
+    "black": black,
+    "green": green,
+    "white": white,
+    "silver": silver,
+    "orange": orange,
+}
+
+IMAGES = {
+    "quattro": quattro_image,
+    "gauge": gauge_image,
+    "needle": needle_image,
+}
+
+
+def get_color(color):
+    if isinstance(color, list):
+        return tuple(color)
+    if color in COLORS:
+        return COLORS[color]
+    return tuple(pygame.Color(color))  # any of pygame's colour names
+
+
+def place(pos, surface, width=0):
+    """ a position from the config, where an x of "center" centers something width wide on the surface """
+    x, y = pos
+    if x == "center":
+        x = (surface.get_width() - width) // 2
+    return (x, y)
+
+
+def get_image(config):
+    image = IMAGES[config["image"]]
+    if "size" in config:
+        image = pygame.transform.scale(image, tuple(config["size"]))
+    return image
+
+
+#############################
+#   Static parts            #
+#############################
+
+class Label():
+
+    def __init__(self, config):
+        self.image = FONTS[config.get("font", "small")].render(config["text"], True, get_color(config["color"]))
+        self.pos = tuple(config["pos"])
+
+    def draw(self, surface):
+        surface.blit(self.image, self.pos)
+
+
+class Image():
+
+    def __init__(self, config):
+        self.image = get_image(config)
+        self.pos = tuple(config["pos"])
+
+    def draw(self, surface):
+        surface.blit(self.image, place(self.pos, surface, self.image.get_width()))
+
+
+#############################
+#   Widgets                 #
+#############################
+
+class ValueWidget():
+
+    def __init__(self, config):
+        self.name = config["name"]
+        self.id = config.get("id", self.name)
+        self.format = config.get("format", "{}")
+        self.font = FONTS[config.get("font", "font")]
+        self.color = get_color(config.get("color", "white"))
+        self.colors = [(threshold, get_color(c)) for threshold, c in config.get("colors", [])]
+        self.pos = tuple(config["pos"])
+
+    def draw(self, renderer, values, now):
+        value = values[self.name]
+        color = self.color
+        for threshold, c in self.colors:
+            if value >= threshold:
+                color = c
+        # the formatted text doubles as the widget's key, and is drawn
+        # from cached glyphs rather than rendered (see glyphs.py)
+        text = self.format.format(value)
+        glyphs = glyph_font(self.font, color)
+        renderer.draw(self.id, (text, color), lambda surface: glyphs.draw(surface, text, self.pos))
+
+    def update(self, value, t):
+        return False
+
+    def animating(self, now):
+        return False
+
+    def reset(self):
+        pass
+
+
+class NeedleWidget():
+
+    def __init__(self, config):
+        self.name = config["name"]
+        self.id = config.get("id", self.name + "_needle")
+        self.values = config.get("values", [0, 9000])
+        self.angles = config.get("angles", [90, -234])
+        self.center = tuple(config["center"])
+        self.max_rate = config.get("max_rate")  # fastest the needle moves (per second)
+
+        # the needle is pre-rotated for every angle it can show, so
+        # drawing it is a lookup and a blit (see gauge.py)
+        self.atlas = NeedleAtlas(get_image(config), self.angle(self.values[0]), self.angle(self.values[1]),
+                                 step=config.get("step", 0.5), cache_file=needle_cache)
+        self.reset()
+
+    def angle(self, value):
+        v0, v1 = self.values
+        a0, a1 = self.angles
+        return a0 + (value - v0) * (a1 - a0) / float(v1 - v0)
+
+    def reset(self):
+        low, high = min(self.values), max(self.values)
+        self.predictor = Predictor(max_rate=self.max_rate, low=low, high=high)
+
+    def update(self, value, t):
+        """ returns whether the needle will move after this reading """
+        self.predictor.update(value, t)
+        return self.animating(None)
+
+    def draw(self, renderer, values, now):
+        value = self.predictor.estimate(now)
+        if value is None:
+            value = values[self.name]
+        angle = self.angle(value)
+        # only redraw the needle when it moves to another frame of the atlas
+        renderer.draw(self.id, self.atlas.index(angle),
+                      lambda surface: self.atlas.blit(surface, angle, place(self.center, surface)))
+
+    def animating(self, now):
+        return not self.predictor.settled(now)
+
+
+class CodesWidget():
+
+    def __init__(self, config):
+        self.name = config["name"]
+        self.id = config.get("id", self.name)
+        self.font = FONTS[config.get("font", "small")]
+        self.color = get_color(config.get("color", "white"))
+        self.pos = tuple(config["pos"])
+        self.spacing = config.get("spacing", 50)
+        self.none = self.font.render(config.get("none", "There are no codes at this time"), True, self.color)
+
+    def draw_codes(self, surface, codes):
+        x, y = self.pos
+        rect = pygame.Rect(x, y, 0, 0)
+        if len(codes) != 0:
+            for code in codes:
+                rect.union_ip(glyph_font(self.font, self.color).draw(surface, str(code), (x, y)))
+                y += self.spacing
+        else:
+            rect.union_ip(surface.blit(self.none, (x, y)))
+        return rect
+
+    def draw(self, renderer, values, now):
+        codes = values[self.name]
+        shown = tuple(str(code) for code in codes)
+        renderer.draw(self.id, shown, lambda surface: self.draw_codes(surface, codes))
+
+    def update(self, value, t):
+        return False
+
+    def animating(self, now):
+        return False
+
+    def reset(self):
+        pass
+
+
+WIDGETS = {
+    "value": ValueWidget,
+    "needle": NeedleWidget,
+    "codes": CodesWidget,
+}
+
+STATICS = {
+    "label": Label,
+    "image": Image,
+}
+
+
+#############################
+#   Pages                   #
+#############################
+
+class Page():
+
+    def __init__(self, name, statics, widgets, channels):
+        self.name = name
+        self.statics = statics
+        self.widgets = widgets
+        self.channels = channels  # the Channels this page's widgets show
+
+    def draw_static(self, surface):
+        """ the parts of the page that never change """
+        for static in self.statics:
+            static.draw(surface)
+
+    def draw(self, renderer, values, now=None):
+        for widget in self.widgets:
+            widget.draw(renderer, values, now)
+
+    def animating(self, now=None):
+        """ whether a widget is still moving between readings """
+        return any(widget.animating(now) for widget in self.widgets)
+
+
+class WidgetEngine():
+
+    def __init__(self, config_file):
+        with open(config_file, encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.channels = {}  # name -> Channel, for every page
+        self.widgets = {}  # name -> widgets showing that value, on any page
+        self.pages = {}
+        for name, page in config["pages"].items():
+            statics = [STATICS[s["type"]](s) for s in page.get("static", [])]
+            widgets = []
+            channels = []
+            for w in page.get("widgets", []):
+                widget = WIDGETS[w["type"]](w)
+                widgets.append(widget)
+                self.widgets.setdefault(widget.name, []).append(widget)
+                if "command" in w:
+                    self.add_channel(w)
+                if widget.name not in channels:
+                    channels.append(widget.name)
+            self.pages[name] = Page(name, statics, widgets, channels)
+
+        for page in self.pages.values():
+            missing = [name for name in page.channels if name not in self.channels]
+            if missing:
+                raise ValueError("No command given for %s in %s" % (", ".join(missing), config_file))
+            page.channels = [self.channels[name] for name in page.channels]
+
+    def add_channel(self, w):
+        name = w["name"]
+        default = [] if w.get("convert") == "codes" else w.get("default", 0.0)
+        channel = Channel(name, w["command"], w.get("convert", "float"), default, w.get("refresh"))
+        if name in self.channels:
+            # shown on another page too, so poll it as often as either asks
+            other = self.channels[name]
+            if (other.command, other.convert) != (channel.command, channel.convert):
+                raise ValueError("%s is bound to more than one command" % name)
+            if other.interval and channel.interval:
+                other.interval = min(other.interval, channel.interval)
+            else:
+                other.interval = None
+            return
+        self.channels[name] = channel
+
+    def page_channels(self, page):
+        """ the Channels to poll while a page is shown """
+        return self.pages[page].channels
+
+    @property
+    def defaults(self):
+        return dict((name, channel.default) for name, channel in self.channels.items())
+
+    def update(self, name, value, t):
+        """
+        passes a new reading to the widgets that follow it between
+        readings, and returns whether any of them will now move
+        """
+        moving = False
+        for widget in self.widgets.get(name, []):
+            if widget.update(value, t):
+                moving = True
+        return moving
+
+    def reset(self):
+        for widgets in self.widgets.values():
+            for widget in widgets:
+                widget.reset()